@@ -1,8 +1,14 @@
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, g, Response
+from flask import before_render_template, template_rendered
 import os
 import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 import game_logic
+import auction_state_store
+import auction_events
+import metrics
+import copy
+import time
 import traceback
 import random
 # import datetime # For timestamps - No longer needed here, AuctionManager handles its own timestamps
@@ -21,13 +27,107 @@ TEAMS_DISPLAY_DATA = {
     "PBKS": {"id": "pbks", "logo": "PBKS.png", "color": "#DD1F2D", "secondary_color": "#FFFFFF", "name": "Punjab Kings"}
 }
 
+# Build the shared player catalog once at startup; requests reuse it until the source files change.
+try:
+    game_logic.get_auction_catalog()
+except Exception:
+    pass # Data loading errors are reported by the routes that need the catalog
+
+# Auction state lives server-side; the signed cookie only carries user choices and an opaque state id.
+# Stored state is a compact delta against the shared catalog: team budgets, squads as player names,
+# and the names retained out of the auction pool.
+AUCTION_STATE_STORE = auction_state_store.create_state_store_from_env()
+
+def get_auction_state():
+    state_id = session.get('auction_state_id')
+    if not state_id:
+        return None
+    return AUCTION_STATE_STORE.get(state_id)
+
+def save_auction_state(auction_state):
+    state_id = session.get('auction_state_id')
+    if not state_id:
+        state_id = auction_state_store.new_state_id()
+        session['auction_state_id'] = state_id
+    AUCTION_STATE_STORE.set(state_id, auction_state)
+
+def clear_session_and_auction_state():
+    state_id = session.get('auction_state_id')
+    if state_id:
+        AUCTION_STATE_STORE.delete(state_id)
+    session.clear()
+
+def get_available_auction_pool(auction_state, catalog=None):
+    # Rebuild the post-retention pool from the catalog and the stored removed names
+    catalog = catalog or game_logic.get_auction_catalog()
+    removed_names = set(auction_state.get('auction_pool_removed_names', []))
+    return [dict(p) for p in catalog.auction_pool if p['name'] not in removed_names]
+
+# --- Request metrics (disabled entirely with AUCTION_METRICS_ENABLED=0) ---
+def _metrics_before_request():
+    g.metrics_request_start = time.perf_counter()
+    metrics.REGISTRY.add_to_gauge("auction_http_requests_in_flight", 1)
+    session_cookie = request.cookies.get(app.config["SESSION_COOKIE_NAME"], "")
+    metrics.REGISTRY.observe("auction_session_cookie_bytes", len(session_cookie), buckets=metrics.DEFAULT_SIZE_BUCKETS)
+
+def _metrics_after_request(response):
+    g.metrics_response_status = response.status_code
+    return response
+
+def _metrics_teardown_request(_exc):
+    # Runs even when the view raised, so the in-flight gauge always comes back down
+    request_start = g.pop('metrics_request_start', None)
+    if request_start is None:
+        return
+    metrics.REGISTRY.add_to_gauge("auction_http_requests_in_flight", -1)
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    status = str(g.pop('metrics_response_status', 500))
+    metrics.REGISTRY.observe("auction_http_request_seconds", time.perf_counter() - request_start,
+                             (("route", route), ("method", request.method), ("status", status)))
+
+def _metrics_template_render_started(_sender, template, context, **_extra):
+    g.metrics_render_start = time.perf_counter()
+
+def _metrics_template_rendered(_sender, template, context, **_extra):
+    render_start = g.pop('metrics_render_start', None)
+    if render_start is not None:
+        metrics.REGISTRY.observe("auction_template_render_seconds", time.perf_counter() - render_start, (("template", template.name),))
+
+def metrics_endpoint():
+    return Response(metrics.REGISTRY.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+if metrics.REGISTRY.enabled:
+    metrics.REGISTRY.describe("auction_http_requests_in_flight", "Requests currently being handled.")
+    metrics.REGISTRY.describe("auction_session_cookie_bytes", "Size of the incoming session cookie.")
+    metrics.REGISTRY.describe("auction_http_request_seconds", "Request latency by route, method and status.")
+    metrics.REGISTRY.describe("auction_template_render_seconds", "Jinja template render time.")
+    app.before_request(_metrics_before_request)
+    app.after_request(_metrics_after_request)
+    app.teardown_request(_metrics_teardown_request)
+    before_render_template.connect(_metrics_template_render_started, app)
+    template_rendered.connect(_metrics_template_rendered, app)
+    app.add_url_rule('/metrics', 'metrics_endpoint', metrics_endpoint)
+
+# Live auction events. An auction route that keeps an AuctionManager in-process registers it with
+# AUCTION_EVENT_HUB.attach(session['auction_state_id'], manager) (and detach()es it when the auction
+# ends); the browser then follows /auction/events with an EventSource instead of reloading pages.
+AUCTION_EVENT_HUB = auction_events.AuctionEventHub()
+
+@app.route('/auction/events')
+def auction_event_stream():
+    broadcaster = AUCTION_EVENT_HUB.get(session.get('auction_state_id'))
+    if broadcaster is None:
+        return jsonify({"error": "No live auction for this session."}), 404
+    return Response(auction_events.stream_events(broadcaster), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 # AuctionManager Helper Functions are removed as auction functionality is being disabled.
 # --- End AuctionManager Helper Functions ---
 
 
 @app.route('/')
 def index():
-    session.clear()
+    clear_session_and_auction_state()
     return render_template('select_team.html', teams_display_data=TEAMS_DISPLAY_DATA)
 
 @app.route('/select_team_action', methods=['POST'])
@@ -41,16 +141,14 @@ def select_team_action():
     session['user_team_display_info'] = TEAMS_DISPLAY_DATA[selected_team_display_key]
 
     try:
-        initial_pool, initial_teams_json_data = game_logic.initialize_auction_data()
-        session['initial_auction_pool'] = initial_pool
-        session['initial_teams_json_data'] = initial_teams_json_data
+        catalog = game_logic.get_auction_catalog()
 
         all_teams_objects = {}
-        for team_id_key, team_player_names in initial_teams_json_data.items():
+        for team_id_key, team_player_names in catalog.teams_json.items():
             all_teams_objects[team_id_key] = game_logic.Team(
                 name=team_id_key,
                 players_json_list=team_player_names,
-                full_auction_pool=initial_pool
+                full_auction_pool=catalog.player_index
             )
 
         teams_runtime_state = {}
@@ -64,8 +162,10 @@ def select_team_action():
                 "min_bowlers": team_obj.min_bowlers, "min_wicketkeepers": team_obj.min_wicketkeepers,
                 "min_allrounders": team_obj.min_allrounders
             }
-        session['teams_current_state'] = teams_runtime_state
-        session['auction_pool_available_for_auction'] = [p.copy() for p in initial_pool]
+        save_auction_state({
+            'teams_current_state': teams_runtime_state,
+            'auction_pool_removed_names': [] # Nothing retained yet; the whole catalog pool is available
+        })
         # session['sold_players_history'] = [] # Removed: No longer used as auction summary page is removed
 
     except Exception as e:
@@ -103,16 +203,19 @@ def retention_home():
         return redirect(url_for('choose_retention_mode'))
 
     user_team_display_info = session.get('user_team_display_info', {})
-    teams_state_all = session.get('teams_current_state', {})
+    auction_state = get_auction_state()
+    if not auction_state:
+        return redirect(url_for('index')) # Server-side state expired or was evicted
+    teams_state_all = auction_state.get('teams_current_state', {})
     user_team_current_state = teams_state_all.get(user_team_id)
 
     if not user_team_current_state:
          return f"User team state for {user_team_id} not found. <a href='{url_for('index')}'>Back</a>"
 
-    initial_auction_pool = session.get('initial_auction_pool', [])
+    initial_pool_index = game_logic.get_auction_catalog().player_index
     user_squad_player_names_before_ret = user_team_current_state.get('squad_before_retention', [])
-    user_squad_details_before_ret = [p for name in user_squad_player_names_before_ret
-                                     for p in initial_auction_pool if p['name'] == name]
+    user_squad_details_before_ret = [initial_pool_index.get(name) for name in user_squad_player_names_before_ret
+                                     if name in initial_pool_index]
     user_squad_details_before_ret.sort(key=lambda p: p.get('demand', 0), reverse=True)
 
     return render_template('retention_form.html',
@@ -141,13 +244,17 @@ def process_retention_choices():
     else: # any_number mode
         num_retain_exact_all_teams = 0 # Not used, but ensures it's defined
 
-    teams_state_all = session.get('teams_current_state', {}).copy()
-    auction_pool_after_retention = [p.copy() for p in session.get('initial_auction_pool', [])]
-    clean_initial_pool_for_sourcing = [p.copy() for p in session.get('initial_auction_pool', [])]
+    auction_state = get_auction_state()
+    if not auction_state:
+        return redirect(url_for('index'))
+    teams_state_all = copy.deepcopy(auction_state.get('teams_current_state', {})) # Stored state stays untouched on error paths
+    catalog = game_logic.get_auction_catalog()
+    auction_pool_after_retention = list(catalog.auction_pool) # Shallow list; retention only drops entries from it
+    clean_initial_pool_for_sourcing = catalog.player_index
 
     user_team_obj = game_logic.Team(name=user_team_id, initial_budget=teams_state_all[user_team_id]['budget'])
     user_initial_squad_names = teams_state_all[user_team_id]['squad_before_retention']
-    user_team_obj.squad = [p for name in user_initial_squad_names for p in clean_initial_pool_for_sourcing if p['name'] == name]
+    user_team_obj.squad = [clean_initial_pool_for_sourcing.get(name) for name in user_initial_squad_names if name in clean_initial_pool_for_sourcing]
 
     num_to_retain_for_user = len(retained_player_names) if retention_mode == 'any_number' else num_retain_exact_all_teams
     if retention_mode == 'exact' and len(retained_player_names) != num_to_retain_for_user:
@@ -155,39 +262,36 @@ def process_retention_choices():
     if retention_mode == 'any_number' and not (0 <= num_to_retain_for_user <= 8):
          return f"Select 0-8 players for 'Any Number' mode. <a href='{url_for('retention_home')}'>Try Again</a>"
 
-    try:
-        user_team_obj, auction_pool_after_retention = game_logic.perform_retention_for_team(
-            user_team_obj, auction_pool_after_retention, num_to_retain_for_user, retained_player_names, True)
-    except Exception as e:
-        return f"Error during user retention: {str(e)} <a href='{url_for('retention_home')}'>Try Again</a>"
-
-    teams_state_all[user_team_id]['budget'] = user_team_obj.budget
-    teams_state_all[user_team_id]['squad_after_retention'] = [p['name'] for p in user_team_obj.squad]
-    teams_state_all[user_team_id]['player_prices'] = {p['name']: p['Price'] for p in user_team_obj.squad}
-
-
+    # Collect every team's retention decision first, then apply them in one batched pass over the pool
+    retention_decisions = [(user_team_obj, num_to_retain_for_user, retained_player_names, True)]
     for team_id_iter, team_data_iter in teams_state_all.items():
         if team_id_iter == user_team_id: continue
         ai_team_obj = game_logic.Team(name=team_id_iter, initial_budget=team_data_iter['budget'])
         ai_initial_squad_names = team_data_iter['squad_before_retention']
-        ai_team_obj.squad = [p for name in ai_initial_squad_names for p in clean_initial_pool_for_sourcing if p['name'] == name]
+        ai_team_obj.squad = [clean_initial_pool_for_sourcing.get(name) for name in ai_initial_squad_names if name in clean_initial_pool_for_sourcing]
 
         num_to_retain_for_ai = num_retain_exact_all_teams if retention_mode == 'exact' else random.randint(1, min(4, len(ai_team_obj.squad) if ai_team_obj.squad else 1))
         num_to_retain_for_ai = min(num_to_retain_for_ai, ai_team_obj.max_squad_size -1, len(ai_team_obj.squad))
         if num_to_retain_for_ai < 0: num_to_retain_for_ai = 0
+        retention_decisions.append((ai_team_obj, num_to_retain_for_ai, None, False))
 
-        try:
-            ai_team_obj, auction_pool_after_retention = game_logic.perform_retention_for_team(
-                ai_team_obj, auction_pool_after_retention, num_to_retain_for_ai, None, False)
-        except Exception as e:
-             return f"Error in AI team ({team_id_iter}) retention: {str(e)} <a href='{url_for('retention_home')}'>Try Again</a>"
-
-        teams_state_all[team_id_iter]['budget'] = ai_team_obj.budget
-        teams_state_all[team_id_iter]['squad_after_retention'] = [p['name'] for p in ai_team_obj.squad]
-        teams_state_all[team_id_iter]['player_prices'] = {p['name']: p['Price'] for p in ai_team_obj.squad}
-
-    session['teams_current_state'] = teams_state_all
-    session['auction_pool_available_for_auction'] = auction_pool_after_retention
+    try:
+        retained_teams, auction_pool_after_retention = game_logic.perform_retention_for_all_teams(
+            retention_decisions, auction_pool_after_retention)
+    except Exception as e:
+        return f"Error during retention: {str(e)} <a href='{url_for('retention_home')}'>Try Again</a>"
+
+    team_ids_in_decision_order = [user_team_id] + [tid for tid in teams_state_all if tid != user_team_id]
+    for team_id_iter, retained_team_obj in zip(team_ids_in_decision_order, retained_teams):
+        teams_state_all[team_id_iter]['budget'] = retained_team_obj.budget
+        teams_state_all[team_id_iter]['squad_after_retention'] = [p['name'] for p in retained_team_obj.squad]
+        teams_state_all[team_id_iter]['player_prices'] = {p['name']: p['Price'] for p in retained_team_obj.squad}
+
+    remaining_pool_names = {p['name'] for p in auction_pool_after_retention}
+    save_auction_state({
+        'teams_current_state': teams_state_all,
+        'auction_pool_removed_names': [p['name'] for p in catalog.auction_pool if p['name'] not in remaining_pool_names]
+    })
     # session['auction_runtime_state'] = {'current_player_index': -1} # Removed: No longer used as auction main page is removed
 
     return redirect(url_for('retention_summary'))
@@ -196,8 +300,10 @@ def process_retention_choices():
 def retention_summary():
     user_team_id = session.get('user_team_id')
     user_team_display_info = session.get('user_team_display_info')
-    teams_current_state = session.get('teams_current_state')
-    initial_auction_pool = session.get('initial_auction_pool')
+    auction_state = get_auction_state() or {}
+    teams_current_state = auction_state.get('teams_current_state')
+    catalog = game_logic.get_auction_catalog()
+    initial_auction_pool = catalog.auction_pool
 
     if not all([user_team_id, user_team_display_info, teams_current_state, initial_auction_pool]):
         # Redirect to home or an error page if essential data is missing
@@ -208,12 +314,13 @@ def retention_summary():
     # teams_current_state has squad_after_retention as list of names.
     # initial_auction_pool has full player details but uses 'name' not 'id' for matching in this context.
 
+    initial_pool_index = catalog.player_index
     processed_teams_current_state = {}
     for team_id, team_data in teams_current_state.items():
         processed_team_data = team_data.copy()
         retained_player_details_list = []
         for player_name in team_data.get('squad_after_retention', []):
-            player_obj = get_player_details_from_pool(player_name, initial_auction_pool)
+            player_obj = get_player_details_from_pool(player_name, initial_pool_index)
             if player_obj:
                  # The template uses 'id' from the player object, ensure it's there.
                  # The price is fixed at 150L for retained players as per requirement.
@@ -231,7 +338,8 @@ def retention_summary():
 
 
 def get_player_details_from_pool(player_name, auction_pool_list):
-    return next((p for p in auction_pool_list if p['name'] == player_name), None)
+    # auction_pool_list may be a plain list or a prebuilt game_logic.PlayerIndex
+    return game_logic.as_player_index(auction_pool_list).get(player_name)
 
 # initialize_auction_turn_state_for_new_player function is removed as AuctionManager.start_bidding_for_next_player
 # now handles the initialization of bid logs including the initial system message with timestamp.
@@ -247,16 +355,17 @@ def get_player_details_from_pool(player_name, auction_pool_list):
 # independent of the auction flow.
 @app.route('/test_initialization/<team_key_for_test>')
 def test_initialization(team_key_for_test):
-    session.clear()
+    clear_session_and_auction_state()
     selected_team_display_key = team_key_for_test.upper()
     if not selected_team_display_key or selected_team_display_key not in TEAMS_DISPLAY_DATA:
         return jsonify({"error": "Invalid team key for test", "key_tested": team_key_for_test}), 400
     user_team_id_json = TEAMS_DISPLAY_DATA[selected_team_display_key]["id"]
     session['user_team_id'] = user_team_id_json
     try:
-        initial_pool, initial_teams_json_data = game_logic.initialize_auction_data()
-        all_teams_objects = {tid: game_logic.Team(name=tid, players_json_list=p_list,full_auction_pool=initial_pool)
-                             for tid, p_list in initial_teams_json_data.items()}
+        catalog = game_logic.get_auction_catalog()
+        initial_pool = catalog.auction_pool
+        all_teams_objects = {tid: game_logic.Team(name=tid, players_json_list=p_list,full_auction_pool=catalog.player_index)
+                             for tid, p_list in catalog.teams_json.items()}
         teams_runtime_state = {tid: {"name": to.name, "budget": to.budget,
                                    "squad_before_retention": [p["name"] for p in to.squad]}
                                for tid, to in all_teams_objects.items()}
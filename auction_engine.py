@@ -0,0 +1,129 @@
+import functools
+import random
+
+import game_logic
+
+# Headless auction runner for batch jobs: builds an AuctionManager from the shared catalog,
+# applies retention, then sells every lot using the same AI bidding as the web app
+# (simulate_ai_bidding_for_player). No I/O, no sleeps and no per-event message formatting.
+# When the manager has lifecycle hooks registered, each lot is reported to them as the
+# start_bidding_for_next_player / trigger_ai_bids_after_user_action / finalize_current_player_auction
+# phases, so batch runs can be profiled the same way as the web flow.
+
+DEFAULT_MAX_AI_ROUNDS_PER_LOT = 60 # Safety cap; bidding normally stops well before this
+
+
+def no_retention_policy(team_id, team_obj, rng):
+    return 0
+
+def ai_random_retention_policy(team_id, team_obj, rng):
+    # Same rule the web app applies to AI teams in 'any number' mode
+    num_to_retain = rng.randint(1, min(4, len(team_obj.squad) if team_obj.squad else 1))
+    return max(0, min(num_to_retain, team_obj.max_squad_size - 1, len(team_obj.squad)))
+
+def _exact_retention(num_to_retain, team_id, team_obj, rng):
+    return max(0, min(num_to_retain, team_obj.max_squad_size - 1, len(team_obj.squad)))
+
+def exact_retention_policy(num_to_retain):
+    # A partial rather than a closure so the policy can be sent to worker processes
+    return functools.partial(_exact_retention, num_to_retain)
+
+
+class HeadlessAuctionEngine:
+    """Runs complete auctions in-process. One engine can run any number of seeded auctions."""
+    def __init__(self, catalog=None, team_rosters=None, retention_policy=ai_random_retention_policy,
+                 max_ai_rounds_per_lot=DEFAULT_MAX_AI_ROUNDS_PER_LOT):
+        # retention_policy: callable(team_id, team_obj, rng) returning either a number of players
+        # (top players by demand are kept) or a list of player names to retain.
+        self.catalog = catalog or game_logic.get_auction_catalog()
+        self.team_rosters = team_rosters if team_rosters is not None else self.catalog.teams_json
+        self.retention_policy = retention_policy or no_retention_policy
+        self.max_ai_rounds_per_lot = max_ai_rounds_per_lot
+
+    def build_manager(self, rng, **manager_options):
+        # manager_options (hooks, bid_log) are passed through to AuctionManager
+        manager = game_logic.AuctionManager(self.catalog.auction_pool, self.team_rosters, rng=rng, **manager_options)
+        retention_decisions = []
+        for team_id, team_obj in manager.teams.items():
+            decision = self.retention_policy(team_id, team_obj, rng)
+            if isinstance(decision, int):
+                retention_decisions.append((team_obj, decision, None, False))
+            else:
+                retention_decisions.append((team_obj, len(decision), list(decision), True))
+        auction_pool = list(manager.original_master_auction_pool)
+        game_logic.perform_retention_for_all_teams(retention_decisions, auction_pool)
+        manager.current_auction_pool_for_bidding = auction_pool
+        rng.shuffle(auction_pool)
+        return manager
+
+    def run(self, seed=None, manager=None, rng=None):
+        # Pass manager/rng to continue an auction already set up (or part-way through); otherwise
+        # a fresh one is built from seed. Returns run_auction_to_end's result dict.
+        rng = rng or random.Random(seed)
+        manager = manager or self.build_manager(rng)
+        result = run_auction_to_end(manager, rng, self.max_ai_rounds_per_lot)
+        result["seed"] = seed
+        return result
+
+
+def run_auction_to_end(manager, rng, max_ai_rounds_per_lot=DEFAULT_MAX_AI_ROUNDS_PER_LOT):
+    # Sells every remaining lot in manager.current_auction_pool_for_bidding with AI-only bidding.
+    # sale_log rows are (player_name, team_id, price); unsold rows are player names.
+    hooks = manager.hooks if manager.hooks.active else None
+    simulate_bid = game_logic.simulate_ai_bidding_for_player
+    close_lot = _close_lot
+    if hooks:
+        simulate_bid = functools.partial(hooks.run_phase, "trigger_ai_bids_after_user_action", manager, simulate_bid)
+        close_lot = functools.partial(hooks.run_phase, "finalize_current_player_auction", manager, _close_lot)
+    manager._own_logs() # _close_lot appends to the logs directly
+    teams = list(manager.teams.values())
+    pool = manager.current_auction_pool_for_bidding
+    sale_log = []
+    unsold_names = []
+    open_teams = [t for t in teams if len(t.squad) < t.max_squad_size]
+
+    for lot_index in range(manager.current_player_auction_index + 1, len(pool)):
+        player = pool[lot_index]
+        if not open_teams:
+            unsold_names.append(player["name"]) # Every squad is full; nothing left can sell
+            manager.unsold_players_log.append(player)
+            continue
+        highest_bid = player.get("base_price", 20)
+        highest_bidder = None
+        if hooks:
+            hooks.run_phase("start_bidding_for_next_player", manager, _open_lot, manager, lot_index, player, highest_bid)
+        for _round in range(max_ai_rounds_per_lot):
+            bidders = open_teams if highest_bidder is None else [t for t in open_teams if t is not highest_bidder]
+            new_bid, winner, _bids = simulate_bid(player, bidders, highest_bid, "", rng)
+            if winner is None or new_bid <= highest_bid:
+                break
+            highest_bid, highest_bidder = new_bid, winner
+        if close_lot(manager, player, highest_bidder, highest_bid, sale_log, unsold_names):
+            open_teams = [t for t in open_teams if t is not highest_bidder]
+
+    manager.current_player_auction_index = len(pool)
+    manager.current_player_up_for_auction = None
+    return {
+        "manager": manager,
+        "teams": {team.name: {"budget": team.budget, "squad": [(p["name"], p.get("Price", 0)) for p in team.squad]} for team in teams},
+        "sale_log": sale_log,
+        "unsold": unsold_names,
+    }
+
+def _open_lot(manager, lot_index, player, opening_bid):
+    # Only called with hooks registered, so observers see the lot on the manager as in the web flow
+    manager.current_player_auction_index = lot_index
+    manager.current_player_up_for_auction = player
+    manager.current_highest_bid_amount = opening_bid
+    manager.current_highest_bidder_team_obj = None
+
+def _close_lot(manager, player, highest_bidder, highest_bid, sale_log, unsold_names):
+    # Records the sale (or no-sale); returns True when the buyer's squad is now full
+    if highest_bidder is None:
+        unsold_names.append(player["name"])
+        manager.unsold_players_log.append(player)
+        return False
+    highest_bidder.add_player_to_squad(player, highest_bid)
+    sale_log.append((player["name"], highest_bidder.name, highest_bid))
+    manager.sold_players_log.append({"name": player["name"], "price": highest_bid, "team_id": highest_bidder.name, "role": player.get("role", "N/A")})
+    return len(highest_bidder.squad) >= highest_bidder.max_squad_size
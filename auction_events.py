@@ -0,0 +1,180 @@
+import collections
+import json
+import threading
+
+import bid_event_log
+import game_logic
+
+# Live auction events for Server-Sent Events streams. An AuctionEventPublisher is registered as a
+# lifecycle hook on one AuctionManager; after each phase it turns the new entries of the manager's
+# bid log into small deltas (bid, sold, unsold, budget) and hands them to an AuctionEventBroadcaster.
+# Each subscriber has a bounded queue: when a slow client falls behind, its oldest events are dropped
+# and it is sent a "resync" event telling it to reload the full state once.
+
+DEFAULT_SUBSCRIBER_QUEUE_SIZE = 256
+KEEPALIVE_SECONDS = 15
+
+_PUBLISHED_EVENT_TYPES = {
+    bid_event_log.EVENT_LOT_OPENED: "lot",
+    bid_event_log.EVENT_BID: "bid",
+    bid_event_log.EVENT_SOLD: "sold",
+    bid_event_log.EVENT_SALE_FAILED: "unsold",
+    bid_event_log.EVENT_UNSOLD: "unsold",
+    bid_event_log.EVENT_ALL_LOTS_DONE: "auction_over",
+}
+_EVENT_TYPES_BY_NAME = {bid_event_log.EVENT_NAMES[code]: event_type for code, event_type in _PUBLISHED_EVENT_TYPES.items()}
+
+
+class EventSubscriber:
+    """One client's bounded queue of (event id, event type, data) tuples."""
+    def __init__(self, max_queue_size=DEFAULT_SUBSCRIBER_QUEUE_SIZE):
+        self._events = collections.deque(maxlen=max_queue_size)
+        self._condition = threading.Condition()
+        self.dropped_events = 0 # Since the last resync notice
+        self.closed = False
+
+    def put(self, event):
+        with self._condition:
+            if len(self._events) == self._events.maxlen:
+                self.dropped_events += 1 # deque drops the oldest on append
+            self._events.append(event)
+            self._condition.notify()
+
+    def get(self, timeout=None):
+        # Returns the next event, a ("resync", dropped count) notice after drops, or None on timeout/close
+        with self._condition:
+            if not self._events and not self.closed:
+                self._condition.wait(timeout)
+            if self.dropped_events:
+                dropped_events, self.dropped_events = self.dropped_events, 0
+                return (None, "resync", {"dropped": dropped_events})
+            return self._events.popleft() if self._events else None
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+class AuctionEventBroadcaster:
+    """Fans events for one auction out to any number of subscribers."""
+    def __init__(self, max_queue_size=DEFAULT_SUBSCRIBER_QUEUE_SIZE):
+        self.max_queue_size = max_queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._next_event_id = 0
+
+    def subscribe(self):
+        subscriber = EventSubscriber(self.max_queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        subscriber.close()
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event_type, data):
+        with self._lock:
+            event = (self._next_event_id, event_type, data)
+            self._next_event_id += 1
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.put(event)
+
+    def close(self):
+        with self._lock:
+            subscribers, self._subscribers = self._subscribers, set()
+        for subscriber in subscribers:
+            subscriber.close()
+
+
+class AuctionEventPublisher:
+    """Lifecycle hook that publishes a manager's new bid-log events and budget changes after each phase."""
+    def __init__(self, broadcaster, next_sequence=0):
+        self.broadcaster = broadcaster
+        self.next_sequence = next_sequence # First bid-log sequence number not yet published
+
+    def after_phase(self, phase, manager, result, elapsed_seconds):
+        publish = self.broadcaster.publish
+        if phase == "setup_auction_stage":
+            for team in manager.teams.values():
+                publish("budget", _budget_delta(team))
+        for sequence, _timestamp, event_name, team_name, amount, player_name in manager.bid_log.events(self.next_sequence):
+            amount = int(amount) if amount.is_integer() else amount
+            event_type = _EVENT_TYPES_BY_NAME[event_name]
+            data = {"team": team_name, "amount": amount, "player": player_name}
+            if event_type == "lot":
+                data["role"] = (manager.current_player_up_for_auction or {}).get("role", "N/A")
+            publish(event_type, data)
+            if event_name == "sold":
+                team = manager.get_team_object_by_name(team_name)
+                if team is not None:
+                    publish("budget", _budget_delta(team))
+            self.next_sequence = sequence + 1
+
+def _budget_delta(team):
+    return {"team": team.name, "budget": team.budget, "squad_size": len(team.squad)}
+
+
+def attach_event_stream(manager, broadcaster):
+    # Registers a publisher on the manager's own hook registry. A manager still on the shared
+    # game_logic.AUCTION_HOOKS is given a private copy first, so other auctions do not pay for it.
+    if manager.hooks is game_logic.AUCTION_HOOKS:
+        manager.hooks = game_logic.AUCTION_HOOKS.copy()
+    return manager.hooks.register(AuctionEventPublisher(broadcaster, manager.bid_log.total_recorded))
+
+
+class AuctionEventHub:
+    """Broadcasters keyed by auction id. detach() when the auction ends closes every open stream for it."""
+    def __init__(self, max_queue_size=DEFAULT_SUBSCRIBER_QUEUE_SIZE):
+        self.max_queue_size = max_queue_size
+        self._broadcasters = {}
+        self._lock = threading.Lock()
+
+    def attach(self, auction_id, manager):
+        with self._lock:
+            broadcaster = self._broadcasters.get(auction_id)
+            if broadcaster is None:
+                broadcaster = self._broadcasters[auction_id] = AuctionEventBroadcaster(self.max_queue_size)
+        attach_event_stream(manager, broadcaster)
+        return broadcaster
+
+    def get(self, auction_id):
+        with self._lock:
+            return self._broadcasters.get(auction_id)
+
+    def detach(self, auction_id):
+        with self._lock:
+            broadcaster = self._broadcasters.pop(auction_id, None)
+        if broadcaster is not None:
+            broadcaster.close()
+
+
+def format_sse(event_id, event_type, data):
+    id_line = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{id_line}event: {event_type}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+def stream_events(broadcaster, keepalive_seconds=KEEPALIVE_SECONDS):
+    # Generator for a Flask streaming Response; the subscription is dropped when the client disconnects
+    subscriber = broadcaster.subscribe()
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            # Read closed before get(): once closed nothing new arrives, so an empty get() then means the
+            # queue is drained and the final events (sold, auction_over) have all been sent
+            closed = subscriber.closed
+            event = subscriber.get(timeout=keepalive_seconds)
+            if event is None:
+                if closed:
+                    break
+                yield ": keep-alive\n\n"
+            else:
+                yield format_sse(*event)
+    finally:
+        broadcaster.unsubscribe(subscriber)
@@ -0,0 +1,118 @@
+import cProfile
+import io
+import pstats
+import threading
+import tracemalloc
+
+import game_logic
+
+# Ready-made AuctionManager lifecycle observers (see game_logic.AuctionHookRegistry). Register one on
+# game_logic.AUCTION_HOOKS to observe every auction, or on a manager's own registry:
+#
+#     counter = game_logic.AUCTION_HOOKS.register(auction_hooks.PhaseCounterHook())
+#     ... run auctions ...
+#     print(counter.report())
+#     game_logic.AUCTION_HOOKS.unregister(counter)
+
+
+class PhaseCounterHook:
+    """Call counts and total / max wall time per phase."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = {} # phase -> [calls, total_seconds, max_seconds]
+
+    def after_phase(self, phase, manager, result, elapsed_seconds):
+        with self._lock:
+            phase_stats = self.stats.get(phase)
+            if phase_stats is None:
+                phase_stats = self.stats[phase] = [0, 0.0, 0.0]
+            phase_stats[0] += 1
+            phase_stats[1] += elapsed_seconds
+            if elapsed_seconds > phase_stats[2]:
+                phase_stats[2] = elapsed_seconds
+
+    def report(self):
+        # Phases ordered by total time, so the dominant one comes first
+        with self._lock:
+            rows = [(phase, calls, total, total / calls, max_seconds) for phase, (calls, total, max_seconds) in self.stats.items()]
+        rows.sort(key=lambda row: row[2], reverse=True)
+        output_lines = [f"{'phase':36s} {'calls':>9s} {'total ms':>11s} {'mean us':>10s} {'max us':>10s}"]
+        for phase, calls, total, mean, max_seconds in rows:
+            output_lines.append(f"{phase:36s} {calls:9d} {total * 1e3:11.2f} {mean * 1e6:10.1f} {max_seconds * 1e6:10.1f}")
+        return "\n".join(output_lines)
+
+
+class CProfilePhaseHook:
+    """Runs cProfile over every sample_every-th call of the watched phases and accumulates the results."""
+    def __init__(self, phases=None, sample_every=1):
+        self.phases = frozenset(phases or game_logic.AUCTION_LIFECYCLE_PHASES)
+        self.sample_every = max(1, sample_every)
+        self.profiler = cProfile.Profile()
+        self.sampled_calls = 0
+        self._calls_seen = 0
+        self._profiling = False # cProfile cannot nest, so phases called from inside a profiled phase are skipped
+
+    def before_phase(self, phase, manager):
+        if phase not in self.phases or self._profiling:
+            return
+        self._calls_seen += 1
+        if self._calls_seen % self.sample_every == 0:
+            self._profiling = phase
+            self.profiler.enable()
+
+    def after_phase(self, phase, manager, result, elapsed_seconds):
+        if self._profiling == phase:
+            self.profiler.disable()
+            self._profiling = False
+            self.sampled_calls += 1
+
+    def report(self, sort_by="cumulative", limit=25):
+        if not self.sampled_calls:
+            return "No phases sampled."
+        stream = io.StringIO()
+        pstats.Stats(self.profiler, stream=stream).sort_stats(sort_by).print_stats(limit)
+        return stream.getvalue()
+
+
+class TracemallocPhaseHook:
+    """Net allocated bytes per phase, plus a tracemalloc snapshot after every snapshot_every-th call."""
+    def __init__(self, phases=None, snapshot_every=0, max_snapshots=10, traceback_frames=1):
+        self.phases = frozenset(phases or game_logic.AUCTION_LIFECYCLE_PHASES)
+        self.snapshot_every = snapshot_every # 0 disables snapshots; only the byte counts are kept
+        self.max_snapshots = max_snapshots
+        self.traceback_frames = traceback_frames
+        self.net_bytes = {} # phase -> [calls, net bytes allocated, peak bytes seen]
+        self.snapshots = [] # (phase, call number, tracemalloc.Snapshot)
+        self._started_tracing = False
+        self._start_sizes = {}
+
+    def before_phase(self, phase, manager):
+        if phase not in self.phases:
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.traceback_frames)
+            self._started_tracing = True
+        self._start_sizes[phase] = tracemalloc.get_traced_memory()[0]
+
+    def after_phase(self, phase, manager, result, elapsed_seconds):
+        start_size = self._start_sizes.pop(phase, None)
+        if start_size is None:
+            return
+        current_size, peak_size = tracemalloc.get_traced_memory()
+        phase_stats = self.net_bytes.setdefault(phase, [0, 0, 0])
+        phase_stats[0] += 1
+        phase_stats[1] += current_size - start_size
+        phase_stats[2] = max(phase_stats[2], peak_size)
+        if self.snapshot_every and phase_stats[0] % self.snapshot_every == 0 and len(self.snapshots) < self.max_snapshots:
+            self.snapshots.append((phase, phase_stats[0], tracemalloc.take_snapshot()))
+
+    def top_allocations(self, limit=10, key_type="lineno"):
+        # Differences between the first and last snapshots, largest growth first
+        if len(self.snapshots) < 2:
+            return []
+        return self.snapshots[-1][2].compare_to(self.snapshots[0][2], key_type)[:limit]
+
+    def stop(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
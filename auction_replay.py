@@ -0,0 +1,232 @@
+import argparse
+import bisect
+import os
+import random
+import tempfile
+import time
+from array import array
+
+import auction_snapshot
+import auction_wal
+import game_logic
+
+# Seekable replay of an auction recorded with auction_wal. Position i is the state after the first i
+# logged operations (retention, shuffle, lot start, user bid, AI turn, finalize) following the log's
+# last snapshot record; position 0 is that snapshot. Opening a replay makes one forward pass over the
+# log, keeping a snapshot (auction_snapshot bytes, ~4 KB) every checkpoint_interval operations and,
+# per operation, only its file offset and the running bid count. A seek then restores the nearest
+# checkpoint at or before the target (or continues from the current position when that is closer)
+# and re-applies at most checkpoint_interval - 1 records, read from the file as it goes.
+#
+# iter_diffs() streams what each operation changed (lot, highest bid, team budgets and squads, sales
+# and the bid events it produced) without materialising the history.
+#
+# Replays run with their own empty hook registry, so live hooks such as event publishers do not fire.
+#
+# Seek benchmark on a freshly recorded auction (or pass --log to use an existing one):
+#     python auction_replay.py --lots 200 --seeks 500
+
+DEFAULT_CHECKPOINT_INTERVAL = 64
+
+OPERATION_NAMES = {
+    auction_wal.REC_RETENTION: "retention",
+    auction_wal.REC_SHUFFLE: "shuffle",
+    auction_wal.REC_START_LOT: "start_lot",
+    auction_wal.REC_USER_BID: "user_bid",
+    auction_wal.REC_AI_TURN: "ai_turn",
+    auction_wal.REC_FINALIZE: "finalize",
+}
+
+
+def _state_summary(manager):
+    player = manager.current_player_up_for_auction
+    bidder = manager.current_highest_bidder_team_obj
+    return (manager.current_player_auction_index, player.get("name") if player else None,
+            manager.current_highest_bid_amount, bidder.name if bidder else None,
+            {team_name: (team.budget, len(team.squad)) for team_name, team in manager.teams.items()},
+            len(manager.sold_players_log), len(manager.unsold_players_log))
+
+def _diff(manager, before, after):
+    # Only the parts that changed; "events" and "bid_version" are always present
+    lot_index, player_name, amount, bidder_name, teams, sold_count, unsold_count = after
+    changes = {}
+    if (lot_index, player_name) != before[:2]:
+        changes["lot"] = {"index": lot_index, "player": player_name}
+    if amount != before[2]:
+        changes["highest_bid"] = amount
+    if bidder_name != before[3]:
+        changes["bidder"] = bidder_name
+    changed_teams = {team_name: {"budget": budget, "squad_size": squad_size}
+                     for team_name, (budget, squad_size) in teams.items() if before[4].get(team_name) != (budget, squad_size)}
+    if changed_teams:
+        changes["teams"] = changed_teams
+    if sold_count != before[5]:
+        changes["sold"] = [dict(sale) for sale in manager.sold_players_log[before[5]:]]
+    if unsold_count != before[6]:
+        changes["unsold"] = [player.get("name") for player in manager.unsold_players_log[before[6]:]]
+    return changes
+
+
+class AuctionReplay:
+    """Random access to the states of one recorded auction."""
+    def __init__(self, path, catalog=None, checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL, hooks=None):
+        if checkpoint_interval < 1:
+            raise ValueError("checkpoint_interval must be at least 1.")
+        self.path = path
+        self.catalog = catalog or game_logic.get_auction_catalog()
+        self.checkpoint_interval = checkpoint_interval
+        self.hooks = hooks if hooks is not None else game_logic.AuctionHookRegistry()
+        self.replayed_records = 0 # Records applied since opening, for measuring seeks
+        self._build_index()
+
+    def _build_index(self):
+        base_snapshot = None
+        offsets = array("q")
+        for offset, record_type, payload in auction_wal.iter_wal_records(self.path):
+            if record_type == auction_wal.REC_SNAPSHOT:
+                base_snapshot = payload # Operations before the last snapshot are superseded by it
+                del offsets[:]
+            else:
+                offsets.append(offset)
+        if base_snapshot is None:
+            raise auction_wal.WALReplayError("Log has no snapshot record to start from.")
+        self._offsets = offsets
+        self._checkpoints = {0: base_snapshot}
+        self._bids_before = array("I", [0]) # _bids_before[i]: bid events in the first i operations
+        self._restore(0)
+        bids = 0
+        for _offset, record_type, payload in self._records_from(0):
+            first_event = self.manager.bid_log.total_recorded
+            self._apply(record_type, payload)
+            bids += sum(1 for event in self.manager.bid_log.events(first_event) if event[2] == "bid")
+            self._bids_before.append(bids)
+
+    def __len__(self):
+        return len(self._offsets)
+
+    @property
+    def total_bids(self):
+        return self._bids_before[-1]
+
+    def _restore(self, checkpoint_position):
+        self.manager = auction_snapshot.restore_manager(self._checkpoints[checkpoint_position], self.catalog, self.hooks)
+        self.position = checkpoint_position
+
+    def _records_from(self, position):
+        if position >= len(self._offsets):
+            return iter(())
+        return auction_wal.iter_wal_records(self.path, self._offsets[position])
+
+    def _apply(self, record_type, payload):
+        auction_wal.apply_record(self.manager, record_type, payload, self.position)
+        self.position += 1
+        self.replayed_records += 1
+        if self.position % self.checkpoint_interval == 0 and self.position not in self._checkpoints:
+            self._checkpoints[self.position] = auction_snapshot.snapshot_manager(self.manager, self.catalog)
+
+    def seek(self, position):
+        """Moves to the state after the first position operations and returns the manager (treat it as read-only)."""
+        if not 0 <= position <= len(self._offsets):
+            raise IndexError(f"Replay position {position} is outside 0..{len(self._offsets)}")
+        checkpoint_position = position - position % self.checkpoint_interval
+        while checkpoint_position not in self._checkpoints: # Only missing if the interval changed after opening
+            checkpoint_position -= self.checkpoint_interval
+        if not checkpoint_position <= self.position <= position:
+            self._restore(checkpoint_position)
+        records = self._records_from(self.position)
+        while self.position < position:
+            _offset, record_type, payload = next(records)
+            self._apply(record_type, payload)
+        return self.manager
+
+    def position_of_bid(self, bid_number):
+        # Position just after the operation that produced the bid_number-th bid (1-based)
+        if not 1 <= bid_number <= self.total_bids:
+            raise IndexError(f"Bid {bid_number} is outside 1..{self.total_bids}")
+        return bisect.bisect_left(self._bids_before, bid_number)
+
+    def seek_bid(self, bid_number):
+        return self.seek(self.position_of_bid(bid_number))
+
+    def iter_diffs(self, start=0, stop=None):
+        """Yields one dict per operation in [start, stop): position, operation, bid_version, events and what changed."""
+        stop = len(self._offsets) if stop is None else min(stop, len(self._offsets))
+        self.seek(start)
+        expected_position = start
+        records = self._records_from(self.position)
+        summary = _state_summary(self.manager)
+        while expected_position < stop:
+            if self.position != expected_position:
+                # The caller seeked elsewhere between items; pick up where this iterator left off
+                self.seek(expected_position)
+                records = self._records_from(self.position)
+                summary = _state_summary(self.manager)
+            _offset, record_type, payload = next(records)
+            first_event = self.manager.bid_log.total_recorded
+            self._apply(record_type, payload)
+            expected_position = self.position
+            after = _state_summary(self.manager)
+            diff = {"position": self.position, "operation": OPERATION_NAMES[record_type], "bid_version": self.manager.bid_version,
+                    "events": [(event_name, team_name, amount, player_name)
+                               for _sequence, _timestamp, event_name, team_name, amount, player_name in self.manager.bid_log.events(first_event)]}
+            diff.update(_diff(self.manager, summary, after))
+            summary = after
+            yield diff
+
+
+# -------------------- Benchmark --------------------
+def record_auction(path, num_lots, seed=0):
+    # Records one auction through DurableAuction; returns the number of logged operations
+    catalog = game_logic.get_auction_catalog()
+    rng = random.Random(seed)
+    manager = game_logic.AuctionManager(catalog.auction_pool, catalog.teams_json_as_dict(), rng=random.Random(seed))
+    durable = auction_wal.DurableAuction.create(manager, path, catalog, use_fsync=False)
+    durable.apply_retention([(team_name, 3, None, False) for team_name in manager.teams])
+    durable.shuffle_pool()
+    for _ in range(num_lots):
+        (player, price, _auction_over), _lsn = durable.start_bidding_for_next_player()
+        if player is None:
+            break
+        if rng.random() < 0.5:
+            durable.process_user_bid("CSK", price + 10)
+        for _ in range(4):
+            durable.trigger_ai_bids_after_user_action("CSK")
+        durable.finalize_current_player_auction()
+    operations = durable.wal.appended_lsn - 1
+    durable.close()
+    return operations
+
+def run_seek_benchmark(path, num_seeks, checkpoint_interval, seed=0):
+    start = time.perf_counter()
+    replay = AuctionReplay(path, checkpoint_interval=checkpoint_interval)
+    index_seconds = time.perf_counter() - start
+    rng = random.Random(seed)
+    targets = [rng.randint(0, len(replay)) for _ in range(num_seeks)]
+    replayed_before = replay.replayed_records
+    start = time.perf_counter()
+    for target in targets:
+        replay.seek(target)
+    seek_seconds = time.perf_counter() - start
+    return {"operations": len(replay), "bids": replay.total_bids, "checkpoints": len(replay._checkpoints),
+            "index_ms": index_seconds * 1000, "seek_ms": seek_seconds * 1000 / num_seeks,
+            "records_per_seek": (replay.replayed_records - replayed_before) / num_seeks}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seek benchmark for checkpointed auction replay.")
+    parser.add_argument("--log", help="Existing auction_wal log; by default a new auction is recorded")
+    parser.add_argument("--lots", type=int, default=200)
+    parser.add_argument("--seeks", type=int, default=500)
+    parser.add_argument("--checkpoint-interval", type=int, default=DEFAULT_CHECKPOINT_INTERVAL)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    path = args.log
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="auction_replay_"), "auction.wal")
+        record_auction(path, args.lots, args.seed)
+    result = run_seek_benchmark(path, args.seeks, args.checkpoint_interval, args.seed)
+    print(f"{result['operations']} operations, {result['bids']} bids, {result['checkpoints']} checkpoints, "
+          f"index built in {result['index_ms']:.1f} ms")
+    print(f"random seek {result['seek_ms']:.3f} ms, {result['records_per_seek']:.1f} records re-applied per seek")
+
+if __name__ == "__main__":
+    main()
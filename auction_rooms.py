@@ -0,0 +1,259 @@
+import argparse
+import asyncio
+import random
+import time
+
+import auction_engine
+import auction_events
+import bid_event_log
+import game_logic
+
+# Hosts many independent auctions ("rooms") on one asyncio event loop. Each room owns an
+# AuctionManager and a single task that runs its lots: every tick the AI teams get a bidding turn,
+# and a lot with no new bid for one tick goes to "going once", then "going twice", then is sold
+# (or unsold). A human bid resets the countdown immediately. Room events reach subscribers through
+# bounded asyncio queues. Rooms with no bids, subscriptions or events delivered to a subscriber for
+# idle_timeout seconds are evicted, so a watched room with AI-only bidding stays up.
+#
+# Load test (one process, one core):
+#     python auction_rooms.py --rooms 300 --duration 20
+
+DEFAULT_TICK_SECONDS = 0.5
+DEFAULT_IDLE_TIMEOUT_SECONDS = 300
+DEFAULT_ROOM_QUEUE_SIZE = 256
+DEFAULT_ROOM_BID_LOG_EVENTS = 512 # Rooms only need recent events; the publisher drains the log every phase
+CALLS_BEFORE_SALE = ("going_once", "going_twice")
+
+
+class AuctionRoom:
+    """One auction: its manager, the task running its lots and its event subscribers."""
+    def __init__(self, room_id, manager, user_team_name="", tick_seconds=DEFAULT_TICK_SECONDS,
+                 max_queue_size=DEFAULT_ROOM_QUEUE_SIZE):
+        self.room_id = room_id
+        self.manager = manager
+        self.user_team_name = user_team_name
+        self.tick_seconds = tick_seconds
+        self.max_queue_size = max_queue_size
+        self.subscribers = set()
+        self.dropped_events = 0
+        self.last_activity = time.monotonic()
+        self.finished = False
+        self.timer_lag_seconds = [] # How late each tick fired; filled only while record_timer_lag is set
+        self.record_timer_lag = False
+        self._bid_placed = asyncio.Event()
+        self._task = None
+        auction_events.attach_event_stream(manager, self) # The room stands in for a broadcaster
+
+    # -------- Events --------
+    def publish(self, event_type, data):
+        event = (event_type, data, time.perf_counter())
+        if self.subscribers:
+            self.last_activity = time.monotonic() # Someone is watching this room
+        for queue in self.subscribers:
+            if queue.full():
+                queue.get_nowait() # Drop the oldest; slow subscribers see gaps, never unbounded growth
+                self.dropped_events += 1
+            queue.put_nowait(event)
+
+    def subscribe(self):
+        queue = asyncio.Queue(self.max_queue_size)
+        self.subscribers.add(queue)
+        self.last_activity = time.monotonic()
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+    # -------- Bidding --------
+    def submit_bid(self, team_name, amount, expected_version=None):
+        # Called on the event loop (e.g. from a request handler); returns (accepted, message).
+        # expected_version is the manager's bid_version the bidder saw; stale bids are rejected.
+        team_obj = self.manager.get_team_object_by_name(team_name)
+        if team_obj is None:
+            return False, f"Unknown team {team_name}."
+        accepted, message = self.manager.process_user_bid(team_obj, amount, expected_version)
+        self.last_activity = time.monotonic()
+        if accepted:
+            self._bid_placed.set()
+        return accepted, message
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run_lots(), name=f"auction-room-{self.room_id}")
+        return self._task
+
+    async def _run_lots(self):
+        try:
+            while True:
+                player, _price, _auction_over = self.manager.start_bidding_for_next_player()
+                if player is None:
+                    break
+                await self._run_lot()
+        finally:
+            self.finished = True
+
+    async def _run_lot(self):
+        manager = self.manager
+        calls_made = 0
+        while True:
+            self._bid_placed.clear()
+            tick_due = time.perf_counter() + self.tick_seconds
+            try:
+                await asyncio.wait_for(self._bid_placed.wait(), self.tick_seconds)
+                calls_made = 0 # A human bid reopens the lot
+                continue
+            except asyncio.TimeoutError:
+                pass
+            if self.record_timer_lag:
+                self.timer_lag_seconds.append(time.perf_counter() - tick_due)
+            version_before = manager.bid_version
+            manager.trigger_ai_bids_after_user_action(self.user_team_name)
+            if manager.bid_version != version_before:
+                calls_made = 0
+                continue
+            if calls_made < len(CALLS_BEFORE_SALE):
+                self.publish(CALLS_BEFORE_SALE[calls_made], {"player": manager.current_player_up_for_auction.get("name"),
+                                                             "amount": manager.current_highest_bid_amount})
+                calls_made += 1
+                continue
+            manager.finalize_current_player_auction()
+            return
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+        self.finished = True
+        self.publish("room_closed", {"room": self.room_id})
+        self.subscribers.clear()
+
+
+class AuctionRoomManager:
+    """Creates, looks up and evicts rooms; all of it runs on the calling event loop."""
+    def __init__(self, catalog=None, tick_seconds=DEFAULT_TICK_SECONDS, idle_timeout=DEFAULT_IDLE_TIMEOUT_SECONDS,
+                 retention_policy=auction_engine.ai_random_retention_policy, max_queue_size=DEFAULT_ROOM_QUEUE_SIZE):
+        self.engine = auction_engine.HeadlessAuctionEngine(catalog, retention_policy=retention_policy)
+        self.tick_seconds = tick_seconds
+        self.idle_timeout = idle_timeout
+        self.max_queue_size = max_queue_size
+        self.rooms = {}
+        self.evicted_rooms = 0
+        self._next_room_number = 0
+        self._sweeper = None
+
+    def create_room(self, room_id=None, seed=None, user_team_name=""):
+        if room_id is None:
+            room_id = f"room-{self._next_room_number}"
+            self._next_room_number += 1
+        if room_id in self.rooms:
+            raise ValueError(f"Room {room_id} already exists.")
+        manager = self.engine.build_manager(random.Random(seed),
+                                            bid_log=bid_event_log.BidEventLog(DEFAULT_ROOM_BID_LOG_EVENTS))
+        room = self.rooms[room_id] = AuctionRoom(room_id, manager, user_team_name, self.tick_seconds, self.max_queue_size)
+        room.start()
+        if self._sweeper is None:
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep_idle_rooms(), name="auction-room-sweeper")
+        return room
+
+    def get_room(self, room_id):
+        return self.rooms.get(room_id)
+
+    def close_room(self, room_id):
+        room = self.rooms.pop(room_id, None)
+        if room is not None:
+            room.close()
+
+    def evict_idle_rooms(self, now=None):
+        # Finished rooms and rooms without bids, new subscriptions or delivered events for idle_timeout seconds
+        now = time.monotonic() if now is None else now
+        idle_room_ids = [room_id for room_id, room in self.rooms.items()
+                         if room.finished or now - room.last_activity > self.idle_timeout]
+        for room_id in idle_room_ids:
+            self.close_room(room_id)
+        self.evicted_rooms += len(idle_room_ids)
+        return idle_room_ids
+
+    async def _sweep_idle_rooms(self):
+        sweep_interval = min(self.idle_timeout, 30)
+        while True:
+            await asyncio.sleep(sweep_interval)
+            self.evict_idle_rooms()
+
+    async def close(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        for room_id in list(self.rooms):
+            self.close_room(room_id)
+        await asyncio.sleep(0) # Let the cancelled room tasks unwind
+
+
+# -------------------- Load test --------------------
+def _nearest_rank(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, max(0, int(len(sorted_values) * fraction + 0.5) - 1))]
+
+async def _consume_room_events(queue, latencies, counts):
+    while True:
+        event_type, _data, published_at = await queue.get()
+        latencies.append(time.perf_counter() - published_at)
+        counts[event_type] = counts.get(event_type, 0) + 1
+
+async def _human_bidder(room, team_name, rng, mean_think_seconds):
+    # Bids the minimum increment on roughly one lot in three
+    while not room.finished:
+        await asyncio.sleep(rng.expovariate(1 / mean_think_seconds))
+        if room.manager.current_player_up_for_auction and rng.random() < 0.35:
+            room.submit_bid(team_name, room.manager.current_highest_bid_amount + 10)
+
+async def run_load_test(num_rooms, duration_seconds, tick_seconds, subscribers_per_room=1, seed=0):
+    room_manager = AuctionRoomManager(tick_seconds=tick_seconds, idle_timeout=duration_seconds * 2)
+    rng = random.Random(seed)
+    team_names = [name.upper() for name in room_manager.engine.team_rosters]
+    latencies, counts, background_tasks = [], {}, []
+    for room_number in range(num_rooms):
+        user_team_name = rng.choice(team_names)
+        room = room_manager.create_room(seed=seed + room_number, user_team_name=user_team_name)
+        room.record_timer_lag = True
+        for _ in range(subscribers_per_room):
+            background_tasks.append(asyncio.create_task(_consume_room_events(room.subscribe(), latencies, counts)))
+        background_tasks.append(asyncio.create_task(_human_bidder(room, user_team_name, random.Random(rng.random()), tick_seconds * 3)))
+
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    await asyncio.sleep(duration_seconds)
+    cpu_seconds, wall_seconds = time.process_time() - cpu_start, time.perf_counter() - wall_start
+
+    timer_lags = sorted(lag for room in room_manager.rooms.values() for lag in room.timer_lag_seconds)
+    dropped_events = sum(room.dropped_events for room in room_manager.rooms.values())
+    for task in background_tasks:
+        task.cancel()
+    await room_manager.close()
+    latencies.sort()
+    return {
+        "rooms": num_rooms, "duration_s": wall_seconds, "cpu_utilisation": cpu_seconds / wall_seconds,
+        "events": len(latencies), "events_per_s": len(latencies) / wall_seconds, "event_counts": counts,
+        "dropped_events": dropped_events,
+        "event_latency_p50_ms": _nearest_rank(latencies, 0.50) * 1000,
+        "event_latency_p99_ms": _nearest_rank(latencies, 0.99) * 1000,
+        "timer_lag_p50_ms": _nearest_rank(timer_lags, 0.50) * 1000,
+        "timer_lag_p99_ms": _nearest_rank(timer_lags, 0.99) * 1000,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test: many auction rooms on one asyncio event loop.")
+    parser.add_argument("--rooms", type=int, default=300)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds to run")
+    parser.add_argument("--tick", type=float, default=DEFAULT_TICK_SECONDS, help="Seconds between AI turns / calls")
+    parser.add_argument("--subscribers", type=int, default=1, help="Event subscribers per room")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    game_logic.get_auction_catalog() # Build the shared catalog before the clock starts
+    result = asyncio.run(run_load_test(args.rooms, args.duration, args.tick, args.subscribers, args.seed))
+    print(f"rooms {result['rooms']}  events {result['events']} ({result['events_per_s']:.0f}/s)  "
+          f"dropped {result['dropped_events']}  cpu {result['cpu_utilisation']:.0%}")
+    print(f"event latency p50 {result['event_latency_p50_ms']:.2f} ms  p99 {result['event_latency_p99_ms']:.2f} ms")
+    print(f"timer lag     p50 {result['timer_lag_p50_ms']:.2f} ms  p99 {result['timer_lag_p99_ms']:.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,461 @@
+import argparse
+import asyncio
+import multiprocessing
+import random
+import socket
+import struct
+import time
+import zlib
+
+import auction_rooms
+
+# Spreads auction rooms over worker processes. Room ids are hashed (crc32) to a worker; each worker
+# runs an AuctionRoomManager on its own event loop and owns the AuctionManagers of its rooms. The
+# front process (ShardedAuctionBroker) talks to every worker over a Unix domain socket pair and
+# routes room creation, bids and event subscriptions to the owning worker. Everything runs on one
+# machine; no external broker is involved.
+#
+# Wire format: each frame is a uint32 length, a protocol version byte, then one or more messages.
+# A message is (type byte, uint32 request id, field count byte) followed by tagged fields: None,
+# bool, int32, int64, float64 or a length-prefixed UTF-8 string. Messages queued during one loop
+# iteration are coalesced into a single frame.
+#
+# Throughput benchmark:
+#     python auction_shards.py --workers 1,2,4 --rooms 400 --duration 10
+
+PROTOCOL_VERSION = 1
+
+MSG_CREATE_ROOM = 1 # (room_id, seed, user_team_name)
+MSG_BID = 2 # (room_id, team_name, amount[, expected_version]) -> (ok, message, amount, version)
+MSG_SUBSCRIBE = 3 # (room_id,)
+MSG_UNSUBSCRIBE = 4 # (room_id,)
+MSG_CLOSE_ROOM = 5 # (room_id,)
+MSG_STATS = 6 # ()
+MSG_SHUTDOWN = 7 # ()
+MSG_REPLY = 16 # (ok, message, *values)
+MSG_EVENT = 17 # (room_id, event_type, key, value, key, value, ...)
+
+_FRAME_HEADER = struct.Struct("<IB")
+_MESSAGE_HEADER = struct.Struct("<BIB")
+_U16 = struct.Struct("<H")
+_I32 = struct.Struct("<i")
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+_TAG_NONE, _TAG_TRUE, _TAG_FALSE, _TAG_INT32, _TAG_INT64, _TAG_FLOAT, _TAG_STR = range(7)
+
+DEFAULT_WRITE_BACKLOG_BYTES = 1 << 20 # Events are dropped (not queued) past this much unsent data
+
+
+class ProtocolError(Exception):
+    pass
+
+
+# -------------------- Codec --------------------
+def encode_message(msg_type, request_id, fields):
+    parts = [_MESSAGE_HEADER.pack(msg_type, request_id, len(fields))]
+    for value in fields:
+        if value is None:
+            parts.append(bytes((_TAG_NONE,)))
+        elif value is True:
+            parts.append(bytes((_TAG_TRUE,)))
+        elif value is False:
+            parts.append(bytes((_TAG_FALSE,)))
+        elif isinstance(value, int):
+            if -0x80000000 <= value <= 0x7FFFFFFF:
+                parts.append(bytes((_TAG_INT32,)) + _I32.pack(value))
+            else:
+                parts.append(bytes((_TAG_INT64,)) + _I64.pack(value))
+        elif isinstance(value, float):
+            parts.append(bytes((_TAG_FLOAT,)) + _F64.pack(value))
+        elif isinstance(value, str):
+            encoded = value.encode("utf-8")
+            parts.append(bytes((_TAG_STR,)) + _U16.pack(len(encoded)) + encoded)
+        else:
+            raise ProtocolError(f"Cannot encode field of type {type(value).__name__}")
+    return b"".join(parts)
+
+def decode_messages(payload):
+    # Yields (msg_type, request_id, fields) for every message in a frame payload (after the version byte)
+    offset = 0
+    while offset < len(payload):
+        msg_type, request_id, field_count = _MESSAGE_HEADER.unpack_from(payload, offset)
+        offset += _MESSAGE_HEADER.size
+        fields = []
+        for _ in range(field_count):
+            tag = payload[offset]
+            offset += 1
+            if tag == _TAG_INT32:
+                fields.append(_I32.unpack_from(payload, offset)[0])
+                offset += 4
+            elif tag == _TAG_STR:
+                length = _U16.unpack_from(payload, offset)[0]
+                fields.append(payload[offset + 2:offset + 2 + length].decode("utf-8"))
+                offset += 2 + length
+            elif tag == _TAG_NONE:
+                fields.append(None)
+            elif tag == _TAG_TRUE or tag == _TAG_FALSE:
+                fields.append(tag == _TAG_TRUE)
+            elif tag == _TAG_INT64:
+                fields.append(_I64.unpack_from(payload, offset)[0])
+                offset += 8
+            elif tag == _TAG_FLOAT:
+                fields.append(_F64.unpack_from(payload, offset)[0])
+                offset += 8
+            else:
+                raise ProtocolError(f"Unknown field tag {tag}")
+        yield msg_type, request_id, fields
+
+def encode_event(room_id, event_type, data):
+    fields = [room_id, event_type]
+    for key, value in data.items():
+        fields.append(key)
+        fields.append(value)
+    return encode_message(MSG_EVENT, 0, fields)
+
+def decode_event_fields(fields):
+    return fields[0], fields[1], dict(zip(fields[2::2], fields[3::2]))
+
+
+class FrameChannel:
+    """Buffered, coalescing message writer over an asyncio stream."""
+    def __init__(self, writer, max_backlog_bytes=DEFAULT_WRITE_BACKLOG_BYTES):
+        self.writer = writer
+        self.max_backlog_bytes = max_backlog_bytes
+        self.dropped_events = 0
+        self._pending = []
+        self._flush_scheduled = False
+
+    def backlogged(self):
+        return self.writer.transport.get_write_buffer_size() > self.max_backlog_bytes
+
+    def send(self, encoded_message):
+        self._pending.append(encoded_message)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self.flush)
+
+    def flush(self):
+        self._flush_scheduled = False
+        if not self._pending or self.writer.is_closing():
+            self._pending.clear()
+            return
+        payload = b"".join(self._pending)
+        self._pending.clear()
+        self.writer.write(_FRAME_HEADER.pack(len(payload) + 1, PROTOCOL_VERSION) + payload)
+
+async def read_frame(reader):
+    # Returns a frame's message payload, or None at end of stream (including a reset or torn frame)
+    try:
+        header = await reader.readexactly(_FRAME_HEADER.size)
+        frame_length, version = _FRAME_HEADER.unpack(header)
+        if version != PROTOCOL_VERSION:
+            raise ProtocolError(f"Unsupported protocol version {version}")
+        return await reader.readexactly(frame_length - 1)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+
+
+# -------------------- Worker process --------------------
+class _EventForwarder:
+    """Stands in for a room subscriber queue and writes the room's events to the front process."""
+    def __init__(self, channel, room_id, forwarders):
+        self.channel = channel
+        self.room_id = room_id
+        self.forwarders = forwarders
+
+    def full(self):
+        return False
+
+    def put_nowait(self, event):
+        if event[0] == "room_closed" and self.forwarders.get(self.room_id) is self:
+            del self.forwarders[self.room_id] # Closed or evicted; a new room with this id needs a new forwarder
+        if self.channel.backlogged():
+            self.channel.dropped_events += 1 # The front is not keeping up; shed events rather than buffer them
+            return
+        event_type, data, _published_at = event
+        self.channel.send(encode_event(self.room_id, event_type, data))
+
+def _handle_worker_request(room_manager, channel, forwarders, msg_type, fields):
+    # Returns the reply fields (ok, message, *values)
+    if msg_type == MSG_BID:
+        room_id, team_name, amount = fields[:3]
+        expected_version = fields[3] if len(fields) > 3 else None
+        room = room_manager.get_room(room_id)
+        if room is None:
+            return [False, f"No room {room_id}.", None, None]
+        accepted, message = room.submit_bid(team_name, amount, expected_version)
+        # Stale or losing bids come back with the state to retry against
+        return [accepted, message, room.manager.current_highest_bid_amount, room.manager.bid_version]
+    if msg_type == MSG_CREATE_ROOM:
+        room_id, seed, user_team_name = fields
+        try:
+            room_manager.create_room(room_id, seed, user_team_name or "")
+        except ValueError as e:
+            return [False, str(e)]
+        return [True, ""]
+    if msg_type == MSG_SUBSCRIBE:
+        room = room_manager.get_room(fields[0])
+        if room is None:
+            return [False, f"No room {fields[0]}."]
+        forwarder = forwarders.get(fields[0])
+        if forwarder is None or forwarder not in room.subscribers: # Also covers an entry left by an earlier room with this id
+            forwarder = forwarders[fields[0]] = _EventForwarder(channel, fields[0], forwarders)
+            room.subscribers.add(forwarder)
+        room.last_activity = time.monotonic()
+        return [True, ""]
+    if msg_type == MSG_UNSUBSCRIBE:
+        room = room_manager.get_room(fields[0])
+        forwarder = forwarders.pop(fields[0], None)
+        if room is not None and forwarder is not None:
+            room.unsubscribe(forwarder)
+        return [True, ""]
+    if msg_type == MSG_CLOSE_ROOM:
+        forwarders.pop(fields[0], None)
+        room_manager.close_room(fields[0])
+        return [True, ""]
+    if msg_type == MSG_STATS:
+        lots_finished = sum(len(room.manager.sold_players_log) + len(room.manager.unsold_players_log)
+                            for room in room_manager.rooms.values())
+        return [True, "", len(room_manager.rooms), lots_finished, channel.dropped_events, room_manager.evicted_rooms]
+    return [False, f"Unknown message type {msg_type}."]
+
+async def _serve_worker(sock, tick_seconds, idle_timeout):
+    reader, writer = await asyncio.open_unix_connection(sock=sock)
+    channel = FrameChannel(writer)
+    room_manager = auction_rooms.AuctionRoomManager(tick_seconds=tick_seconds, idle_timeout=idle_timeout)
+    forwarders = {}
+    try:
+        while True:
+            payload = await read_frame(reader)
+            if payload is None:
+                break
+            for msg_type, request_id, fields in decode_messages(payload):
+                if msg_type == MSG_SHUTDOWN:
+                    channel.send(encode_message(MSG_REPLY, request_id, [True, ""]))
+                    channel.flush()
+                    await writer.drain()
+                    return
+                channel.send(encode_message(MSG_REPLY, request_id, _handle_worker_request(room_manager, channel, forwarders, msg_type, fields)))
+            if channel.backlogged():
+                await writer.drain() # Stop reading requests until the front catches up
+    finally:
+        await room_manager.close()
+        writer.close()
+
+def _worker_main(sock, tick_seconds, idle_timeout):
+    import game_logic
+    import metrics
+    metrics.disable_in_pool_worker() # Spans recorded here are never scraped
+    game_logic.get_auction_catalog() # Build the catalog before the first room is requested
+    asyncio.run(_serve_worker(sock, tick_seconds, idle_timeout))
+
+
+# -------------------- Front process --------------------
+class _WorkerLink:
+    def __init__(self, process, reader, writer):
+        self.process = process
+        self.reader = reader
+        self.channel = FrameChannel(writer)
+        self.reader_task = None
+        self.request_ids = set() # Requests awaiting a reply from this worker
+        self.closed = False
+
+
+class ShardedAuctionBroker:
+    """Front-end router for rooms hosted on worker processes. All methods run on the caller's event loop."""
+    def __init__(self, num_workers=None, tick_seconds=auction_rooms.DEFAULT_TICK_SECONDS,
+                 idle_timeout=auction_rooms.DEFAULT_IDLE_TIMEOUT_SECONDS, max_queue_size=auction_rooms.DEFAULT_ROOM_QUEUE_SIZE):
+        self.num_workers = num_workers or multiprocessing.cpu_count()
+        self.tick_seconds = tick_seconds
+        self.idle_timeout = idle_timeout
+        self.max_queue_size = max_queue_size
+        self.dropped_events = 0
+        self._links = []
+        self._pending_replies = {}
+        self._next_request_id = 1
+        self._subscriptions = {} # room_id -> set of asyncio.Queue
+
+    async def start(self):
+        mp_context = multiprocessing.get_context("spawn") # Never fork a process with a running event loop
+        for _ in range(self.num_workers):
+            parent_sock, child_sock = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+            process = mp_context.Process(target=_worker_main, args=(child_sock, self.tick_seconds, self.idle_timeout), daemon=True)
+            process.start()
+            child_sock.close()
+            reader, writer = await asyncio.open_unix_connection(sock=parent_sock)
+            link = _WorkerLink(process, reader, writer)
+            link.reader_task = asyncio.get_running_loop().create_task(self._read_worker(link))
+            self._links.append(link)
+        return self
+
+    def shard_for(self, room_id):
+        return zlib.crc32(room_id.encode("utf-8")) % self.num_workers
+
+    def _request(self, shard, msg_type, fields):
+        request_id = self._next_request_id
+        self._next_request_id = (request_id + 1) & 0xFFFFFFFF or 1
+        reply = asyncio.get_running_loop().create_future()
+        link = self._links[shard]
+        if link.closed:
+            reply.set_exception(ConnectionError(f"Worker for shard {shard} has closed its connection."))
+            return reply
+        self._pending_replies[request_id] = reply
+        link.request_ids.add(request_id)
+        link.channel.send(encode_message(msg_type, request_id, fields))
+        return reply
+
+    async def _read_worker(self, link):
+        pending_replies = self._pending_replies
+        try:
+            while True:
+                payload = await read_frame(link.reader)
+                if payload is None:
+                    break
+                for msg_type, request_id, fields in decode_messages(payload):
+                    if msg_type == MSG_EVENT:
+                        self._dispatch_event(*decode_event_fields(fields))
+                    else:
+                        link.request_ids.discard(request_id)
+                        reply = pending_replies.pop(request_id, None)
+                        if reply is not None and not reply.done():
+                            reply.set_result(fields)
+        finally:
+            # The worker died or the link is shutting down: fail this shard's callers instead of leaving them waiting
+            link.closed = True
+            for request_id in link.request_ids:
+                reply = pending_replies.pop(request_id, None)
+                if reply is not None and not reply.done():
+                    reply.set_exception(ConnectionError(f"Worker process {link.process.pid} closed its connection."))
+            link.request_ids.clear()
+
+    def _dispatch_event(self, room_id, event_type, data):
+        for queue in self._subscriptions.get(room_id, ()):
+            if queue.full():
+                queue.get_nowait()
+                self.dropped_events += 1
+            queue.put_nowait((event_type, data))
+        if event_type == "room_closed":
+            self._subscriptions.pop(room_id, None)
+
+    async def create_room(self, room_id, seed=None, user_team_name=""):
+        ok, message = await self._request(self.shard_for(room_id), MSG_CREATE_ROOM, [room_id, seed, user_team_name])
+        if not ok:
+            raise ValueError(message)
+        return room_id
+
+    async def submit_bid(self, room_id, team_name, amount, expected_version=None):
+        # Returns (accepted, message, current highest bid, current bid_version) for the room
+        fields = [room_id, team_name, amount] if expected_version is None else [room_id, team_name, amount, expected_version]
+        ok, message, current_amount, version = await self._request(self.shard_for(room_id), MSG_BID, fields)
+        return ok, message, current_amount, version
+
+    async def subscribe(self, room_id):
+        # Returns a bounded asyncio.Queue of (event_type, data); one worker subscription is shared per room
+        queue = asyncio.Queue(self.max_queue_size)
+        room_queues = self._subscriptions.setdefault(room_id, set())
+        room_queues.add(queue)
+        if len(room_queues) == 1:
+            ok, message = await self._request(self.shard_for(room_id), MSG_SUBSCRIBE, [room_id])
+            if not ok:
+                self._subscriptions.pop(room_id, None)
+                raise KeyError(message)
+        return queue
+
+    async def unsubscribe(self, room_id, queue):
+        room_queues = self._subscriptions.get(room_id)
+        if room_queues is None:
+            return
+        room_queues.discard(queue)
+        if not room_queues:
+            del self._subscriptions[room_id]
+            await self._request(self.shard_for(room_id), MSG_UNSUBSCRIBE, [room_id])
+
+    async def close_room(self, room_id):
+        await self._request(self.shard_for(room_id), MSG_CLOSE_ROOM, [room_id])
+        self._subscriptions.pop(room_id, None)
+
+    async def stats(self):
+        # Per-worker dicts of rooms, finished lots, events shed by the worker and evicted rooms
+        replies = await asyncio.gather(*(self._request(shard, MSG_STATS, []) for shard in range(self.num_workers)))
+        return [{"rooms": rooms, "lots_finished": lots, "dropped_events": dropped, "evicted_rooms": evicted}
+                for _ok, _message, rooms, lots, dropped, evicted in replies]
+
+    async def close(self):
+        shutdown_replies = [self._request(shard, MSG_SHUTDOWN, []) for shard in range(len(self._links))]
+        try:
+            await asyncio.wait_for(asyncio.gather(*shutdown_replies, return_exceptions=True), timeout=5) # A dead worker fails its reply
+        except asyncio.TimeoutError:
+            pass
+        for link in self._links:
+            link.reader_task.cancel()
+            link.channel.writer.close()
+            link.process.join(timeout=5)
+            if link.process.is_alive():
+                link.process.terminate()
+        self._links = []
+
+
+# -------------------- Throughput benchmark --------------------
+async def _bid_client(broker, room_ids, team_names, rng, counters, stop_at):
+    # Closed-loop client: one outstanding bid at a time, always the minimum raise
+    current_amounts = {}
+    while time.perf_counter() < stop_at:
+        room_id = rng.choice(room_ids)
+        amount = current_amounts.get(room_id, 20) + 10
+        accepted, _message, current_amount, _version = await broker.submit_bid(room_id, team_names[room_id], amount)
+        counters["bids"] += 1
+        counters["accepted"] += accepted
+        if current_amount is not None:
+            current_amounts[room_id] = current_amount
+
+async def _count_events(queue, counters):
+    while True:
+        await queue.get()
+        counters["events"] += 1
+
+async def run_throughput_benchmark(num_workers, num_rooms, duration_seconds, tick_seconds, num_clients, seed=0):
+    broker = await ShardedAuctionBroker(num_workers, tick_seconds=tick_seconds, idle_timeout=duration_seconds * 4).start()
+    rng = random.Random(seed)
+    team_codes = ("CSK", "DC", "KKR", "MI", "PBKS", "RCB", "RR", "SRH")
+    room_ids = [f"room-{n}" for n in range(num_rooms)]
+    team_names = {room_id: rng.choice(team_codes) for room_id in room_ids}
+    await asyncio.gather(*(broker.create_room(room_id, seed + n, team_names[room_id]) for n, room_id in enumerate(room_ids)))
+    counters = {"bids": 0, "accepted": 0, "events": 0}
+    queues = await asyncio.gather(*(broker.subscribe(room_id) for room_id in room_ids))
+    event_tasks = [asyncio.create_task(_count_events(queue, counters)) for queue in queues]
+    lots_before = sum(worker["lots_finished"] for worker in await broker.stats())
+
+    wall_start = time.perf_counter()
+    stop_at = wall_start + duration_seconds
+    await asyncio.gather(*(_bid_client(broker, room_ids, team_names, random.Random(rng.random()), counters, stop_at)
+                           for _ in range(num_clients)))
+    wall_seconds = time.perf_counter() - wall_start
+    worker_stats = await broker.stats()
+    for task in event_tasks:
+        task.cancel()
+    await broker.close()
+    return {
+        "workers": num_workers, "rooms": num_rooms, "duration_s": wall_seconds,
+        "bids_per_s": counters["bids"] / wall_seconds, "accepted_bids": counters["accepted"],
+        "events_per_s": counters["events"] / wall_seconds,
+        "lots_per_s": (sum(worker["lots_finished"] for worker in worker_stats) - lots_before) / wall_seconds,
+        "dropped_events": broker.dropped_events + sum(worker["dropped_events"] for worker in worker_stats),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Throughput benchmark for auction rooms sharded over worker processes.")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts to compare")
+    parser.add_argument("--rooms", type=int, default=400)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per worker count")
+    parser.add_argument("--tick", type=float, default=0.01, help="Seconds between AI turns in each room")
+    parser.add_argument("--clients", type=int, default=64, help="Concurrent closed-loop bid clients")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    for num_workers in [int(w) for w in args.workers.split(",") if w]:
+        result = asyncio.run(run_throughput_benchmark(num_workers, args.rooms, args.duration, args.tick, args.clients, args.seed))
+        print(f"workers {result['workers']:2d}  bids/s {result['bids_per_s']:9.0f}  events/s {result['events_per_s']:9.0f}  "
+              f"lots/s {result['lots_per_s']:7.0f}  dropped {result['dropped_events']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+import random
+import struct
+import threading
+import weakref
+import zlib
+from array import array
+
+import bid_event_log
+import game_logic
+
+# Compact binary snapshots of an AuctionManager. Players are stored as their position in the shared
+# AuctionCatalog (catalog.player_ids), so a snapshot holds ids, prices, budgets and bid state rather
+# than player dicts, and restoring rebuilds the manager from the catalog without re-reading JSON.
+# The encoding is explicit (struct / array), versioned and never uses pickle.
+#
+# Layout: header (magic, format version, catalog fingerprint), teams (each followed by its squad as
+# an id array and a price array, NaN marking entries without a Price), the master pool and bidding
+# pool as id arrays, sold / unsold logs, the current lot and bid state, then the RNG state.
+# Amounts are stored as doubles; whole values are restored as ints. The bid event log and lifecycle
+# hooks are not part of the snapshot: a restored manager starts a fresh log and uses the hooks
+# passed to restore_manager (the shared registry by default).
+
+SNAPSHOT_MAGIC = b"AUSN"
+SNAPSHOT_FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<4sHIII") # magic, version, catalog fingerprint, catalog size, team count
+_TEAM = struct.Struct("<dHHHHHHH") # budget, max squad, min bat/bowl/wk/ar, max overseas, squad length
+_SOLD_ENTRY = struct.Struct("<idh") # player id, price, team position
+_LOT_STATE = struct.Struct("<iBdhq") # lot index, lot open flag, highest bid, highest bidder position, bid_version
+_U8 = struct.Struct("<B")
+_U32 = struct.Struct("<I")
+_F64 = struct.Struct("<d")
+
+_RNG_GLOBAL = 0 # Manager uses the random module; its state is not captured
+_RNG_INSTANCE = 1
+_NO_TEAM = -1
+_NAN = float("nan")
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+# -------------------- Per-catalog tables --------------------
+class _CatalogTables:
+    """Plain-dict player records and the fingerprint for one catalog, built once and shared by restores."""
+    def __init__(self, catalog):
+        self.records = [dict(p) for p in catalog.auction_pool] # Read-only by convention, like the catalog itself
+        self.player_index = game_logic.PlayerIndex(self.records)
+        self.player_ids = catalog.player_ids
+        names = "\x1f".join(p.get("name", "") for p in catalog.auction_pool)
+        self.fingerprint = zlib.crc32(names.encode("utf-8"))
+
+_catalog_tables = weakref.WeakKeyDictionary()
+_catalog_tables_lock = threading.Lock()
+
+def _tables_for(catalog):
+    tables = _catalog_tables.get(catalog)
+    if tables is None:
+        with _catalog_tables_lock:
+            tables = _catalog_tables.get(catalog)
+            if tables is None:
+                tables = _catalog_tables[catalog] = _CatalogTables(catalog)
+    return tables
+
+def _player_id(tables, player):
+    player_id = tables.player_ids.get(player.get("name"))
+    if player_id is None:
+        raise SnapshotError(f"Player {player.get('name')!r} is not in the catalog; snapshots only cover catalog players.")
+    return player_id
+
+def _id_array(tables, players):
+    return array("i", [_player_id(tables, p) for p in players])
+
+def _restore_amount(value):
+    return int(value) if value.is_integer() else value
+
+def _encode_name(name):
+    encoded = name.encode("utf-8")
+    return _U8.pack(len(encoded)) + encoded
+
+
+# -------------------- Snapshot --------------------
+def snapshot_manager(manager, catalog=None):
+    """Returns the manager's state as bytes. Catalog defaults to the shared one and must be the one used to restore."""
+    tables = _tables_for(catalog or game_logic.get_auction_catalog())
+    team_list = list(manager.teams.values())
+    team_positions = {id(team): position for position, team in enumerate(team_list)}
+    team_positions_by_name = {team.name: position for position, team in enumerate(team_list)}
+    parts = [_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, tables.fingerprint, len(tables.records), len(team_list))]
+
+    for team in team_list:
+        parts.append(_encode_name(team.name))
+        parts.append(_TEAM.pack(team.budget, team.max_squad_size, team.min_batters, team.min_bowlers,
+                                team.min_wicketkeepers, team.min_allrounders, team.max_overseas, len(team.squad)))
+        parts.append(_id_array(tables, team.squad).tobytes())
+        parts.append(array("d", [player.get("Price", _NAN) for player in team.squad]).tobytes())
+
+    for players in (manager.original_master_auction_pool, manager.current_auction_pool_for_bidding, manager.unsold_players_log):
+        ids = _id_array(tables, players)
+        parts.append(_U32.pack(len(ids)))
+        parts.append(ids.tobytes())
+
+    parts.append(_U32.pack(len(manager.sold_players_log)))
+    for sale in manager.sold_players_log:
+        parts.append(_SOLD_ENTRY.pack(_player_id(tables, sale), sale["price"], team_positions_by_name.get(sale["team_id"], _NO_TEAM)))
+
+    bidder = manager.current_highest_bidder_team_obj
+    parts.append(_LOT_STATE.pack(manager.current_player_auction_index, manager.current_player_up_for_auction is not None,
+                                 manager.current_highest_bid_amount,
+                                 team_positions.get(id(bidder), _NO_TEAM) if bidder is not None else _NO_TEAM,
+                                 manager.bid_version))
+
+    if isinstance(manager.rng, random.Random):
+        rng_version, mt_state, gauss_next = manager.rng.getstate()
+        parts.append(_U8.pack(_RNG_INSTANCE) + _U8.pack(rng_version))
+        parts.append(array("I", mt_state).tobytes())
+        parts.append(_F64.pack(_NAN if gauss_next is None else gauss_next))
+    else:
+        parts.append(_U8.pack(_RNG_GLOBAL))
+    return b"".join(parts)
+
+
+# -------------------- Restore --------------------
+class _Reader:
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def unpack(self, fmt):
+        values = fmt.unpack_from(self.data, self.offset)
+        self.offset += fmt.size
+        return values
+
+    def name(self):
+        (length,) = self.unpack(_U8)
+        value = bytes(self.data[self.offset:self.offset + length]).decode("utf-8")
+        self.offset += length
+        return value
+
+    def array(self, typecode, count):
+        values = array(typecode)
+        end = self.offset + values.itemsize * count
+        if end > len(self.data):
+            raise struct.error("array runs past the end of the snapshot")
+        values.frombytes(self.data[self.offset:end])
+        self.offset = end
+        return values
+
+def restore_manager(data, catalog=None, hooks=None, bid_log=None):
+    """Builds an AuctionManager from snapshot_manager() bytes against the same catalog."""
+    tables = _tables_for(catalog or game_logic.get_auction_catalog())
+    records = tables.records
+    reader = _Reader(data)
+    try:
+        magic, version, fingerprint, catalog_size, team_count = reader.unpack(_HEADER)
+    except struct.error:
+        raise SnapshotError("Snapshot is truncated.")
+    if magic != SNAPSHOT_MAGIC:
+        raise SnapshotError("Not an auction snapshot.")
+    if version != SNAPSHOT_FORMAT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot format version {version}.")
+    if fingerprint != tables.fingerprint or catalog_size != len(records):
+        raise SnapshotError("Snapshot was taken against a different player catalog.")
+
+    try:
+        # Bypass __init__: it rebuilds teams from rosters and copies the whole pool, which a restore replaces anyway
+        manager = game_logic.AuctionManager.__new__(game_logic.AuctionManager)
+        manager.hooks = hooks or game_logic.AUCTION_HOOKS
+        manager.bid_log = bid_log if bid_log is not None else bid_event_log.BidEventLog()
+        manager._current_lot_first_event = manager.bid_log.total_recorded
+        manager._bid_lock = threading.Lock()
+        manager._logs_shared = False
+
+        manager.teams = {}
+        team_list = []
+        for _ in range(team_count):
+            team = game_logic.Team.__new__(game_logic.Team)
+            team.name = reader.name()
+            budget, team.max_squad_size, team.min_batters, team.min_bowlers, team.min_wicketkeepers, \
+                team.min_allrounders, team.max_overseas, squad_length = reader.unpack(_TEAM)
+            team.budget = _restore_amount(budget)
+            squad_ids, squad_prices = reader.array("i", squad_length), reader.array("d", squad_length)
+            team.squad = [dict(records[player_id]) if price != price # NaN: no Price key
+                          else {**records[player_id], "Price": int(price) if price.is_integer() else price}
+                          for player_id, price in zip(squad_ids, squad_prices)] # The setter recomputes the role / value counters
+            manager.teams[team.name] = team
+            team_list.append(team)
+
+        pools = []
+        for _ in range(3):
+            (count,) = reader.unpack(_U32)
+            pools.append([records[player_id] for player_id in reader.array("i", count)])
+        manager.original_master_auction_pool, manager.current_auction_pool_for_bidding, manager.unsold_players_log = pools
+        manager.master_pool_index = tables.player_index if len(pools[0]) == len(records) else game_logic.PlayerIndex(pools[0])
+
+        (sold_count,) = reader.unpack(_U32)
+        manager.sold_players_log = []
+        for player_id, price, team_position in _SOLD_ENTRY.iter_unpack(reader.data[reader.offset:reader.offset + _SOLD_ENTRY.size * sold_count]):
+            player = records[player_id]
+            manager.sold_players_log.append({"name": player["name"], "price": _restore_amount(price),
+                                             "team_id": team_list[team_position].name if team_position != _NO_TEAM else None,
+                                             "role": player.get("role", "N/A")})
+        reader.offset += _SOLD_ENTRY.size * sold_count
+
+        lot_index, lot_open, highest_bid, bidder_position, manager.bid_version = reader.unpack(_LOT_STATE)
+        manager.current_player_auction_index = lot_index
+        manager.current_player_up_for_auction = manager.current_auction_pool_for_bidding[lot_index] if lot_open else None
+        manager.current_highest_bid_amount = _restore_amount(highest_bid)
+        manager.current_highest_bidder_team_obj = team_list[bidder_position] if bidder_position != _NO_TEAM else None
+
+        (rng_kind,) = reader.unpack(_U8)
+        if rng_kind == _RNG_INSTANCE:
+            (rng_version,) = reader.unpack(_U8)
+            mt_state = tuple(reader.array("I", 625))
+            (gauss_next,) = reader.unpack(_F64)
+            manager.rng = random.Random(0) # Cheap fixed seed; the state is replaced next
+            manager.rng.setstate((rng_version, mt_state, None if gauss_next != gauss_next else gauss_next))
+        else:
+            manager.rng = random
+    except (struct.error, IndexError, UnicodeDecodeError):
+        raise SnapshotError("Snapshot is truncated or corrupt.")
+    if reader.offset != len(reader.data):
+        raise SnapshotError("Snapshot has trailing data.")
+    return manager
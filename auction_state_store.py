@@ -0,0 +1,127 @@
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Server-side storage for per-user auction state. The Flask cookie only carries an opaque
+# state id; the (compact, name-based) state itself lives in one of these stores.
+# States expire ttl_seconds after they were last written.
+
+DEFAULT_STATE_TTL_SECONDS = 2 * 60 * 60
+
+
+def new_state_id():
+    return secrets.token_urlsafe(24)
+
+
+class InMemoryAuctionStateStore:
+    """Process-local LRU store with TTL eviction. States are kept as live objects, not copies."""
+    def __init__(self, max_entries=10000, ttl_seconds=DEFAULT_STATE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict() # state_id -> (expires_at, state), least recently used first
+        self._lock = threading.Lock()
+
+    def get(self, state_id):
+        with self._lock:
+            entry = self._entries.get(state_id)
+            if entry is None:
+                return None
+            expires_at, state = entry
+            if expires_at <= time.monotonic():
+                del self._entries[state_id]
+                return None
+            self._entries.move_to_end(state_id)
+            return state
+
+    def set(self, state_id, state):
+        now = time.monotonic()
+        with self._lock:
+            self._entries[state_id] = (now + self.ttl_seconds, state)
+            self._entries.move_to_end(state_id)
+            self._evict(now)
+
+    def delete(self, state_id):
+        with self._lock:
+            self._entries.pop(state_id, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self, now):
+        # Drop from the LRU end while entries are expired or the store is over capacity.
+        # Expired entries further in are dropped when reached here or on their next get().
+        while self._entries:
+            oldest_state_id, (expires_at, _state) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[oldest_state_id]
+
+
+class SQLiteAuctionStateStore:
+    """Durable store shared by every worker process that points at the same database file."""
+    def __init__(self, db_path, ttl_seconds=DEFAULT_STATE_TTL_SECONDS, purge_every_n_writes=500):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.purge_every_n_writes = purge_every_n_writes
+        self._writes_since_purge = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS auction_state ("
+            "state_id TEXT PRIMARY KEY, payload TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def get(self, state_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, expires_at FROM auction_state WHERE state_id = ?", (state_id,)
+            ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return json.loads(row[0])
+
+    def set(self, state_id, state):
+        payload = json.dumps(state, separators=(",", ":"))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO auction_state (state_id, payload, expires_at) VALUES (?, ?, ?)",
+                (state_id, payload, now + self.ttl_seconds)
+            )
+            self._writes_since_purge += 1
+            if self._writes_since_purge >= self.purge_every_n_writes:
+                self._writes_since_purge = 0
+                self._conn.execute("DELETE FROM auction_state WHERE expires_at <= ?", (now,))
+
+    def delete(self, state_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM auction_state WHERE state_id = ?", (state_id,))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM auction_state WHERE expires_at > ?", (time.time(),)
+            ).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_state_store_from_env():
+    # AUCTION_STATE_BACKEND=memory (default) or sqlite; AUCTION_STATE_SQLITE_PATH picks the db file
+    backend = os.environ.get("AUCTION_STATE_BACKEND", "memory").lower()
+    ttl_seconds = float(os.environ.get("AUCTION_STATE_TTL_SECONDS", DEFAULT_STATE_TTL_SECONDS))
+    if backend == "sqlite":
+        db_path = os.environ.get("AUCTION_STATE_SQLITE_PATH", "auction_state.sqlite3")
+        return SQLiteAuctionStateStore(db_path, ttl_seconds=ttl_seconds)
+    if backend == "memory":
+        max_entries = int(os.environ.get("AUCTION_STATE_MAX_ENTRIES", 10000))
+        return InMemoryAuctionStateStore(max_entries=max_entries, ttl_seconds=ttl_seconds)
+    raise ValueError(f"Unknown AUCTION_STATE_BACKEND: {backend}")
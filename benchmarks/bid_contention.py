@@ -0,0 +1,136 @@
+"""Stress test for versioned (compare-and-set) bidding on one AuctionManager.
+
+Several bidder threads race to raise the bid on the current lot, each passing the bid_version it
+read. One thread runs AI turns and an auctioneer thread closes lots and opens the next at random
+points. Afterwards the bid log is audited: within every lot the bids must strictly increase, the
+sale price must equal the last bid, and every bid a thread saw accepted must be in the log:
+
+    python benchmarks/bid_contention.py --threads 8 --lots 200
+
+Exits with status 1 if any update was lost.
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPO_DIR)
+import bid_event_log
+import game_logic
+
+BIDDER_TEAMS = ("CSK", "MI", "RCB", "KKR", "DC", "RR", "SRH", "PBKS")
+
+
+def build_manager(num_lots, seed):
+    catalog = game_logic.get_auction_catalog()
+    rng = random.Random(seed)
+    manager = game_logic.AuctionManager(catalog.auction_pool, catalog.teams_json_as_dict(), rng=rng,
+                                        bid_log=bid_event_log.BidEventLog(max_events=1 << 22))
+    for team in manager.teams.values():
+        team.squad = []
+        team.budget = 10 ** 12 # Budgets and squad sizes must never be the reason a bid fails here
+        team.max_squad_size = num_lots + 1
+    manager.current_auction_pool_for_bidding = [rng.choice(catalog.auction_pool) for _ in range(num_lots)]
+    return manager
+
+def run_stress(num_threads=8, num_lots=200, bids_per_lot=400, seed=0, versioned=True):
+    manager = build_manager(num_lots, seed)
+    manager.start_bidding_for_next_player()
+    accepted_bids = [] # (team, amount) as reported to the bidder threads; list.append is atomic
+    attempts = [0] * num_threads
+    stop = threading.Event()
+
+    def bidder(thread_index):
+        rng = random.Random(seed * 1000 + thread_index)
+        team = manager.teams[BIDDER_TEAMS[thread_index % len(BIDDER_TEAMS)]]
+        while not stop.is_set():
+            state = manager.current_lot_state()
+            if state["player"] is None:
+                continue
+            amount = state["amount"] + rng.choice(game_logic.AI_BID_INCREMENTS)
+            accepted, _message = manager.process_user_bid(team, amount, state["version"] if versioned else None)
+            attempts[thread_index] += 1
+            if accepted:
+                accepted_bids.append((team.name, amount))
+
+    def ai_turns():
+        while not stop.is_set():
+            manager.trigger_ai_bids_after_user_action("")
+
+    def auctioneer():
+        rng = random.Random(seed)
+        for _lot in range(num_lots):
+            target = manager.bid_version + rng.randint(1, bids_per_lot)
+            while manager.bid_version < target:
+                time.sleep(0)
+            manager.finalize_current_player_auction()
+            manager.start_bidding_for_next_player()
+        stop.set()
+
+    previous_switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6) # Force frequent thread switches so the races actually happen
+    threads = [threading.Thread(target=bidder, args=(i,)) for i in range(num_threads)]
+    threads += [threading.Thread(target=ai_turns), threading.Thread(target=auctioneer)]
+    start = time.perf_counter()
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(previous_switch_interval)
+    elapsed = time.perf_counter() - start
+    return manager, accepted_bids, sum(attempts), elapsed
+
+def audit(manager, accepted_bids):
+    # Returns a list of violation strings; empty means no lost or out-of-order updates
+    violations = []
+    logged_bids = []
+    lot_bids, lot_base_price = [], None
+    for _sequence, _timestamp, event_name, team_name, amount, player_name in manager.bid_log.events():
+        if event_name == "lot_opened":
+            lot_bids, lot_base_price = [], amount
+        elif event_name == "bid":
+            previous = lot_bids[-1] if lot_bids else lot_base_price
+            if amount <= previous:
+                violations.append(f"{player_name or 'lot'}: bid {amount} by {team_name} does not beat {previous}")
+            lot_bids.append(amount)
+            logged_bids.append((team_name, amount))
+        elif event_name == "sold":
+            if not lot_bids or amount != lot_bids[-1]:
+                violations.append(f"{player_name}: sold for {amount} but the last bid was {lot_bids[-1] if lot_bids else None}")
+        elif event_name in ("unsold", "sale_failed") and lot_bids:
+            violations.append(f"{player_name}: unsold despite {len(lot_bids)} bids")
+    remaining = {}
+    for bid in logged_bids:
+        remaining[bid] = remaining.get(bid, 0) + 1
+    for bid in accepted_bids:
+        if remaining.get(bid, 0) == 0:
+            violations.append(f"accepted bid {bid} is missing from the log")
+        else:
+            remaining[bid] -= 1
+    return violations
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent bidding stress test for AuctionManager.")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--lots", type=int, default=200)
+    parser.add_argument("--bids-per-lot", type=int, default=400, help="Upper bound on accepted bids before a lot is closed")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--unversioned", action="store_true", help="Bid without expected_version (amount check only)")
+    args = parser.parse_args(argv)
+
+    manager, accepted_bids, attempts, elapsed = run_stress(args.threads, args.lots, args.bids_per_lot, args.seed, not args.unversioned)
+    violations = audit(manager, accepted_bids)
+    print(f"{attempts} bid attempts in {elapsed:.2f} s ({attempts / elapsed:.0f}/s), {len(accepted_bids)} accepted, "
+          f"{attempts - len(accepted_bids)} rejected as stale or too low, "
+          f"{len(manager.sold_players_log)} lots sold, {len(violations)} violations")
+    for violation in violations[:20]:
+        print("  " + violation)
+    return 1 if violations else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""Benchmarks for the auction hot paths.
+
+Times catalog loading, Team construction, retention, one AI bidding round per player, a complete
+auction and the Flask retention flow against seeded 88-, 1k- and 10k-player fixtures. Results are
+written as JSON and can be compared with a stored baseline:
+
+    python benchmarks/run_benchmarks.py --output bench_results.json --save-baseline benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json --threshold 0.25
+
+Exits with status 1 when any case is slower than baseline * (1 + threshold).
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPO_DIR)
+import game_logic
+import auction_engine
+import catalog_generator
+
+DEFAULT_SIZES = (88, 1000, 10000)
+FIXTURE_SEED = 20240501
+TEAM_IDS = catalog_generator.REAL_TEAM_IDS # Must match app.TEAMS_DISPLAY_DATA ids for the Flask flow
+# The repository's data files, fixed here: game_logic.CATALOG_SOURCE_FILES is repointed while a fixture is active
+REPOSITORY_SOURCE_FILES = (("bat_stats", "batStats.json"), ("bowl_stats", "bowlStats.json"), ("teams", "teams.json"))
+
+
+# -------------------- Fixtures --------------------
+def write_fixture_files(num_players, fixture_dir, seed=FIXTURE_SEED):
+    # 88 players uses the repository data files as-is; larger sizes come from the synthetic catalog generator
+    if num_players == 88:
+        source_files = {}
+        for source_key, filename in REPOSITORY_SOURCE_FILES:
+            source_files[source_key] = os.path.join(fixture_dir, filename)
+            shutil.copyfile(os.path.join(REPO_DIR, filename), source_files[source_key])
+        return source_files
+    bat_stats, bowl_stats, teams_json = catalog_generator.generate_catalog(num_players, len(TEAM_IDS), seed=seed + num_players)
+    return catalog_generator.write_catalog_files(fixture_dir, bat_stats, bowl_stats, teams_json, write_ascii_tables=False)
+
+
+class Fixture:
+    def __init__(self, num_players, source_files):
+        self.num_players = num_players
+        self.source_files = source_files
+        self.catalog = game_logic.get_auction_catalog(source_files)
+        self.teams_json = self.catalog.teams_json_as_dict()
+        self._saved_source_files = None
+
+    def activate(self):
+        # Point the default catalog (used by initialize_auction_data and the Flask app) at this fixture
+        if self._saved_source_files is None:
+            self._saved_source_files = dict(game_logic.CATALOG_SOURCE_FILES)
+        game_logic.CATALOG_SOURCE_FILES.update(self.source_files)
+        game_logic.invalidate_auction_catalog()
+
+    def deactivate(self):
+        # Restores what activate() replaced; call before the fixture directory is deleted
+        if self._saved_source_files is not None:
+            game_logic.CATALOG_SOURCE_FILES.clear()
+            game_logic.CATALOG_SOURCE_FILES.update(self._saved_source_files)
+            self._saved_source_files = None
+            game_logic.invalidate_auction_catalog()
+
+
+# -------------------- Cases --------------------
+def case_initialize_auction_data(fixture):
+    fixture.activate()
+    return lambda: game_logic.initialize_auction_data()
+
+def case_team_construction(fixture):
+    index = fixture.catalog.player_index
+    return lambda: [game_logic.Team(name=tid, players_json_list=names, full_auction_pool=index)
+                    for tid, names in fixture.teams_json.items()]
+
+def case_perform_retention_for_team(fixture):
+    index = fixture.catalog.player_index
+    def run():
+        pool = fixture.catalog.pool_as_list()
+        for team_id, names in fixture.teams_json.items():
+            team_obj = game_logic.Team(name=team_id, players_json_list=names, full_auction_pool=index)
+            game_logic.perform_retention_for_team(team_obj, pool, 4, None, False)
+    return run
+
+def case_simulate_ai_bidding_for_player(fixture):
+    teams = [game_logic.Team(name=tid, initial_budget=200000) for tid in fixture.teams_json]
+    players = fixture.catalog.auction_pool
+    def run():
+        rng = random.Random(FIXTURE_SEED)
+        for player in players:
+            game_logic.simulate_ai_bidding_for_player(player, teams, player.get("base_price", 20), "", rng)
+    return run
+
+def case_full_auction(fixture):
+    engine = auction_engine.HeadlessAuctionEngine(fixture.catalog, retention_policy=auction_engine.exact_retention_policy(3))
+    return lambda: engine.run(FIXTURE_SEED)
+
+def case_flask_retention_flow(fixture):
+    fixture.activate()
+    import app as flask_app
+    flask_app.app.config["TESTING"] = True
+    user_team_names = fixture.teams_json["csk"][:3]
+    def run():
+        random.seed(FIXTURE_SEED) # process_retention_choices draws AI retention counts from the global rng
+        client = flask_app.app.test_client()
+        responses = [
+            client.post("/select_team_action", data={"selected_team_key": "CSK"}),
+            client.get("/retention?retention_mode_selection=any"),
+            client.post("/retention/process", data={"retention_mode": "any_number", "retained_players": user_team_names}),
+            client.get("/retention_summary"),
+        ]
+        if responses[-1].status_code != 200:
+            raise RuntimeError(f"Flask flow failed with status {[r.status_code for r in responses]}")
+    return run
+
+CASES = {
+    "initialize_auction_data": case_initialize_auction_data,
+    "team_construction": case_team_construction,
+    "perform_retention_for_team": case_perform_retention_for_team,
+    "simulate_ai_bidding_for_player": case_simulate_ai_bidding_for_player,
+    "full_auction": case_full_auction,
+    "flask_retention_flow": case_flask_retention_flow,
+}
+
+
+# -------------------- Runner --------------------
+def time_callable(func, repeat, warmup=1):
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {"median_s": statistics.median(timings), "min_s": min(timings), "repeat": repeat}
+
+def run_benchmarks(sizes=DEFAULT_SIZES, case_names=None, repeat=5):
+    case_names = case_names or list(CASES)
+    results = {}
+    for num_players in sizes:
+        fixture_dir = tempfile.mkdtemp(prefix=f"auction_bench_{num_players}_")
+        fixture = None
+        try:
+            fixture = Fixture(num_players, write_fixture_files(num_players, fixture_dir))
+            for case_name in case_names:
+                results[f"{case_name}@{num_players}"] = time_callable(CASES[case_name](fixture), repeat)
+        finally:
+            if fixture is not None:
+                fixture.deactivate()
+            shutil.rmtree(fixture_dir, ignore_errors=True)
+    return {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(), "repeat": repeat,
+                 "fixture_seed": FIXTURE_SEED, "created_at": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": results,
+    }
+
+def compare_with_baseline(current, baseline, threshold):
+    # Returns (case, baseline_s, current_s, ratio) rows for cases slower than baseline * (1 + threshold)
+    regressions = []
+    for case_key, baseline_result in baseline.get("results", {}).items():
+        current_result = current["results"].get(case_key)
+        if not current_result or not baseline_result["median_s"]:
+            continue
+        ratio = current_result["median_s"] / baseline_result["median_s"]
+        if ratio > 1 + threshold:
+            regressions.append((case_key, baseline_result["median_s"], current_result["median_s"], ratio))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the auction hot paths.")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES), help="Comma-separated player counts")
+    parser.add_argument("--cases", default="", help="Comma-separated case names (default: all)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", help="Also write the results to this baseline path")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown before a case counts as a regression")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    case_names = [c for c in args.cases.split(",") if c] or None
+    unknown_cases = set(case_names or []) - set(CASES)
+    if unknown_cases:
+        parser.error(f"Unknown cases: {', '.join(sorted(unknown_cases))}")
+
+    current = run_benchmarks(sizes, case_names, args.repeat)
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(current, file, indent=2, sort_keys=True)
+    for case_key, result in current["results"].items():
+        print(f"{case_key:45s} median {result['median_s'] * 1000:10.3f} ms   min {result['min_s'] * 1000:10.3f} ms")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressions = compare_with_baseline(current, baseline, args.threshold)
+        for case_key, baseline_s, current_s, ratio in regressions:
+            print(f"REGRESSION {case_key}: {baseline_s * 1000:.3f} ms -> {current_s * 1000:.3f} ms ({ratio:.2f}x)")
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,311 @@
+import argparse
+import math
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import auction_engine
+import auction_snapshot
+import game_logic
+import metrics
+
+# Bid advice for the lot currently up in a live AuctionManager. For each rollout seed the rest of
+# the auction is simulated once with the user's team passing on the lot and once per candidate
+# price with the user's team buying it at that price; the user's team is then scored (below). The
+# pass and buy branches share their random draws after the lot (common random numbers), so the
+# paired score differences are far less noisy than independent runs. The recommended max bid is
+# where the mean difference crosses zero; the bounds are where its 95% confidence band does.
+#
+# Rollouts run in a warm process pool: the live state goes to workers as auction_snapshot bytes and
+# each rollout runs on a fork of the restored manager. Work is split into small chunks so partial
+# advice streams back as they finish; at the wall-clock budget outstanding chunks are abandoned
+# (workers also stop at the deadline) and the advice covers the rollouts that completed. For a fixed
+# set of completed seeds the result is deterministic.
+#
+# After the lot every team, the user's included, bids with the AI policy; that stands in for the
+# user's future decisions.
+#
+#     python bid_advisor.py --budget-ms 200 --team CSK
+
+DEFAULT_BUDGET_SECONDS = 0.2
+DEFAULT_CANDIDATE_PRICES = 8
+DEFAULT_CHUNK_ROLLOUTS = 2
+ROLE_SHORTFALL_PENALTY = 100 # Score lost per player missing from a role minimum at the end of the auction
+BUDGET_WEIGHT = 1.0 # Score per lakh left unspent
+CONFIDENCE_Z = 1.96
+
+
+def squad_score(team_obj, budget_weight=BUDGET_WEIGHT):
+    # Player quality as base price plus demand, minus role shortfalls, plus what is left to spend
+    quality = sum(player.get("base_price", 20) + player.get("demand", 0) for player in team_obj.squad)
+    shortfall = (max(0, team_obj.min_batters - team_obj.role_counts["Batter"])
+                 + max(0, team_obj.min_bowlers - team_obj.role_counts["Bowler"])
+                 + max(0, team_obj.min_wicketkeepers - team_obj.role_counts["Wicketkeeper"])
+                 + max(0, team_obj.min_allrounders - team_obj.role_counts["All-Rounder"]))
+    return quality - ROLE_SHORTFALL_PENALTY * shortfall + budget_weight * team_obj.budget
+
+def can_buy(team_obj, player, price):
+    # Team.can_add_player (squad size, budget) plus the overseas cap, which it does not enforce itself
+    allowed, reason = team_obj.can_add_player(player, price)
+    if allowed and player.get("overseas") and team_obj.overseas_count >= team_obj.max_overseas:
+        return False, "Overseas limit reached"
+    return allowed, reason
+
+def candidate_prices_for(manager, team_obj, count=DEFAULT_CANDIDATE_PRICES):
+    # Evenly spaced multiples of 10 from the minimum next bid up to twice the most the player can add to
+    # squad_score (base price + demand + filling a role shortfall)
+    player = manager.current_player_up_for_auction
+    lowest = manager.current_highest_bid_amount + 10
+    highest = min(team_obj.budget, max(lowest, 2 * (player.get("base_price", 20) + player.get("demand", 0) + ROLE_SHORTFALL_PENALTY)))
+    if count < 2 or highest <= lowest:
+        return [lowest]
+    return sorted({int(round((lowest + (highest - lowest) * i / (count - 1)) / 10)) * 10 for i in range(count)})
+
+
+class RolloutStats:
+    """Running sums of (buy at price - pass) score differences per candidate price; combine with merge()."""
+    def __init__(self, prices):
+        self.prices = list(prices)
+        self.rollouts = 0
+        self.sums = [0.0] * len(self.prices)
+        self.sums_of_squares = [0.0] * len(self.prices)
+
+    def add(self, differences):
+        self.rollouts += 1
+        for i, difference in enumerate(differences):
+            self.sums[i] += difference
+            self.sums_of_squares[i] += difference * difference
+
+    def merge(self, other):
+        self.rollouts += other.rollouts
+        for i in range(len(self.prices)):
+            self.sums[i] += other.sums[i]
+            self.sums_of_squares[i] += other.sums_of_squares[i]
+        return self
+
+    def mean_and_half_width(self, i):
+        n = self.rollouts
+        mean = self.sums[i] / n
+        if n < 2:
+            return mean, math.inf
+        variance = max(0.0, (self.sums_of_squares[i] - n * mean * mean) / (n - 1))
+        return mean, CONFIDENCE_Z * math.sqrt(variance / n)
+
+    def advice(self):
+        if not self.rollouts:
+            return {"rollouts": 0, "recommended_max_bid": None, "low": None, "high": None, "capped": False, "expected_gain": {}}
+        means, lows, highs = [], [], []
+        for i in range(len(self.prices)):
+            mean, half_width = self.mean_and_half_width(i)
+            means.append(mean)
+            lows.append(mean - half_width)
+            highs.append(mean + half_width)
+        return {"rollouts": self.rollouts,
+                "recommended_max_bid": _zero_crossing(self.prices, means),
+                "low": _zero_crossing(self.prices, lows), # Confidently worth buying up to here
+                "high": _zero_crossing(self.prices, highs), # Not worth more than this even optimistically
+                "capped": means[-1] > 0, # Still worth buying at the highest candidate price; the true max is higher
+                "expected_gain": dict(zip(self.prices, means))}
+
+def _zero_crossing(prices, values):
+    # Highest price where values (one per price) is still positive, interpolated linearly to the
+    # first non-positive one; None if buying loses even at the lowest price
+    if values[0] <= 0:
+        return None
+    for i in range(1, len(prices)):
+        if values[i] <= 0:
+            previous_price, price = prices[i - 1], prices[i]
+            fraction = values[i - 1] / (values[i - 1] - values[i]) if math.isfinite(values[i]) else 0.0
+            return int((previous_price + (price - previous_price) * fraction) / 10) * 10
+    return prices[-1]
+
+
+# -------------------- Rollouts (run in workers, or in-process with max_workers=1) --------------------
+def _finish_lot_without(manager, team_name, max_rounds):
+    # AI teams bid on the current lot until nobody raises, then it is finalized
+    for _round in range(max_rounds):
+        version_before = manager.bid_version
+        manager.trigger_ai_bids_after_user_action(team_name)
+        if manager.bid_version == version_before:
+            break
+    manager.finalize_current_player_auction()
+
+def _buy_lot(manager, team_name, price):
+    manager.current_highest_bid_amount = price
+    manager.current_highest_bidder_team_obj = manager.teams[team_name]
+    manager.finalize_current_player_auction()
+
+def run_rollouts(manager, team_name, prices, seeds, deadline=None, max_rounds=auction_engine.DEFAULT_MAX_AI_ROUNDS_PER_LOT):
+    """Paired rollouts from the manager's current lot; returns RolloutStats. Stops early at deadline (time.time())."""
+    player = manager.current_player_up_for_auction
+    for price in prices:
+        allowed, reason = can_buy(manager.teams[team_name], player, price)
+        if not allowed: # A buy branch would force an illegal signing
+            raise ValueError(f"{team_name} cannot buy {player.get('name')} at {price}L: {reason}")
+    stats = RolloutStats(prices)
+    for seed in seeds:
+        if deadline is not None and time.time() >= deadline:
+            break
+        rollout = manager.fork(rng=random.Random(seed * 2))
+        _finish_lot_without(rollout, team_name, max_rounds)
+        auction_engine.run_auction_to_end(rollout, random.Random(seed * 2 + 1), max_rounds)
+        pass_score = squad_score(rollout.teams[team_name])
+        differences = []
+        for price in prices:
+            rollout = manager.fork(rng=random.Random(seed * 2))
+            _buy_lot(rollout, team_name, price)
+            auction_engine.run_auction_to_end(rollout, random.Random(seed * 2 + 1), max_rounds)
+            differences.append(squad_score(rollout.teams[team_name]) - pass_score)
+        stats.add(differences)
+    return stats
+
+_worker_catalog = None
+
+def _init_worker(auction_pool, teams_json, pool_worker=False):
+    global _worker_catalog
+    if pool_worker:
+        metrics.disable_in_pool_worker()
+    _worker_catalog = game_logic.AuctionCatalog(auction_pool, teams_json)
+
+def _run_rollout_chunk(snapshot, team_name, prices, seeds, deadline):
+    manager = auction_snapshot.restore_manager(snapshot, _worker_catalog, game_logic.AuctionHookRegistry())
+    return run_rollouts(manager, team_name, prices, seeds, deadline)
+
+
+class BidAdvisor:
+    """Keeps a process pool warm between lots; advise() / advise_stream() evaluate the current lot."""
+    def __init__(self, catalog=None, max_workers=None, chunk_rollouts=DEFAULT_CHUNK_ROLLOUTS):
+        # max_workers=1 runs rollouts in-process without a pool
+        self.catalog = catalog or game_logic.get_auction_catalog()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_rollouts = chunk_rollouts
+        self._executor = None
+        if self.max_workers > 1:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                                 initargs=(self.catalog.pool_as_list(), self.catalog.teams_json_as_dict(), True))
+
+    def warm_up(self):
+        # Starts every worker (and builds its catalog) so the first advice does not pay for it
+        if self._executor is not None:
+            for future in [self._executor.submit(time.sleep, 0.05) for _ in range(self.max_workers)]:
+                future.result()
+
+    def advise_stream(self, manager, team_name, budget_seconds=DEFAULT_BUDGET_SECONDS, seed=0, prices=None, max_rollouts=None):
+        """Yields advice dicts as rollouts complete; the last one is final (its "final" key is True).
+
+        Candidate prices the team cannot legally pay are dropped. If none remain the only advice is a
+        final "no bid" one: recommended_max_bid None and no_bid_reason saying why.
+        """
+        team_obj = manager.get_team_object_by_name(team_name)
+        if team_obj is None:
+            raise ValueError(f"Unknown team {team_name}.")
+        if manager.current_player_up_for_auction is None:
+            raise ValueError("No lot is open.")
+        started = time.perf_counter()
+        deadline = time.time() + budget_seconds
+        player = manager.current_player_up_for_auction
+        prices = list(prices) if prices else candidate_prices_for(manager, team_obj)
+        no_bid_reason = None
+        legal_prices = [price for price in prices if can_buy(team_obj, player, price)[0]]
+        if not legal_prices:
+            no_bid_reason = can_buy(team_obj, player, min(prices, default=manager.current_highest_bid_amount + 10))[1]
+        prices = legal_prices
+        total = RolloutStats(prices)
+        max_rollouts = max_rollouts or 1 << 30
+        seed_chunks = (range(start, min(start + self.chunk_rollouts, seed + max_rollouts))
+                       for start in range(seed, seed + max_rollouts, self.chunk_rollouts))
+
+        def report(final):
+            advice = total.advice()
+            advice.update({"player": manager.current_player_up_for_auction.get("name"), "team": team_obj.name,
+                           "current_bid": manager.current_highest_bid_amount,
+                           "elapsed_seconds": time.perf_counter() - started, "final": final, "no_bid_reason": no_bid_reason})
+            return advice
+
+        if no_bid_reason is not None:
+            yield report(True)
+            return
+
+        if self._executor is None:
+            for seeds in seed_chunks:
+                if time.time() >= deadline:
+                    break
+                total.merge(run_rollouts(manager, team_obj.name, prices, seeds, deadline))
+                if time.time() < deadline and total.rollouts < max_rollouts: # Otherwise the final advice follows at once
+                    yield report(False)
+            yield report(True)
+            return
+
+        snapshot = auction_snapshot.snapshot_manager(manager, self.catalog)
+        pending = set()
+        try:
+            for seeds in seed_chunks: # Keep two chunks per worker queued so no worker idles between results
+                while len(pending) >= self.max_workers * 2:
+                    done, pending = wait(pending, timeout=max(0.0, deadline - time.time()), return_when=FIRST_COMPLETED)
+                    if not done:
+                        break
+                    for future in done:
+                        total.merge(future.result())
+                    if time.time() < deadline:
+                        yield report(False)
+                if time.time() >= deadline:
+                    break
+                pending.add(self._executor.submit(_run_rollout_chunk, snapshot, team_obj.name, prices, seeds, deadline))
+            while pending and time.time() < deadline:
+                done, pending = wait(pending, timeout=max(0.0, deadline - time.time()), return_when=FIRST_COMPLETED)
+                for future in done:
+                    total.merge(future.result())
+                if done and pending and time.time() < deadline: # The last results go straight into the final advice
+                    yield report(False)
+        finally:
+            for future in pending:
+                future.cancel() # Running chunks stop on their own at the deadline
+        yield report(True)
+
+    def advise(self, manager, team_name, budget_seconds=DEFAULT_BUDGET_SECONDS, seed=0, prices=None, max_rollouts=None):
+        advice = None
+        for advice in self.advise_stream(manager, team_name, budget_seconds, seed, prices, max_rollouts):
+            pass
+        return advice
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recommend a max bid for the current lot from parallel rollouts.")
+    parser.add_argument("--team", default="CSK")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_SECONDS * 1000)
+    parser.add_argument("--lots", type=int, default=3, help="Lot to advise on, counted from the start of the auction")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    engine = auction_engine.HeadlessAuctionEngine()
+    manager = engine.build_manager(random.Random(args.seed))
+    for lot in range(args.lots):
+        manager.start_bidding_for_next_player()
+        manager.trigger_ai_bids_after_user_action(args.team)
+        if lot < args.lots - 1:
+            manager.finalize_current_player_auction()
+    advisor = BidAdvisor(engine.catalog, args.workers)
+    try:
+        advisor.warm_up()
+        printed_rollouts = None
+        for advice in advisor.advise_stream(manager, args.team, args.budget_ms / 1000, args.seed):
+            if advice["final"] and advice["rollouts"] == printed_rollouts:
+                continue # No chunk finished after the last partial line; it already shows the final numbers
+            printed_rollouts = advice["rollouts"]
+            print(f"{advice['elapsed_seconds'] * 1000:7.1f} ms  {advice['rollouts']:4d} rollouts  "
+                  f"max bid {advice['recommended_max_bid']}  (95%: {advice['low']} .. {advice['high']})"
+                  f"{'  final' if advice['final'] else ''}")
+        print(f"{advice['player']} at {advice['current_bid']}L for {advice['team']}; expected gain by price: "
+              + ", ".join(f"{price}: {gain:.0f}" for price, gain in advice["expected_gain"].items()))
+    finally:
+        advisor.close()
+
+if __name__ == "__main__":
+    main()
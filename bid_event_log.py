@@ -0,0 +1,173 @@
+import datetime
+import itertools
+import os
+import struct
+import time
+from array import array
+
+# Compact auction event log. Each event is a row across parallel typed arrays (monotonic timestamp,
+# event code, team id, amount, player id); team and player names are interned once, and the
+# human-readable messages are only built when entries are read. The buffer is a fixed-size ring:
+# once full, the oldest events are overwritten, or, when a spill path is set, the whole buffer is
+# appended to that file as one binary block and recording continues in the emptied buffer.
+
+EVENT_LOT_OPENED = 0
+EVENT_BID = 1
+EVENT_SOLD = 2
+EVENT_SALE_FAILED = 3
+EVENT_UNSOLD = 4
+EVENT_ALL_LOTS_DONE = 5
+
+EVENT_NAMES = ("lot_opened", "bid", "sold", "sale_failed", "unsold", "all_lots_done")
+SYSTEM_BIDDER = "System"
+NO_ID = -1
+
+DEFAULT_MAX_EVENTS = int(os.environ.get("AUCTION_BID_LOG_MAX_EVENTS", "4096"))
+
+# Spill block: header (first sequence number, event count) followed by each column's raw bytes
+_SPILL_BLOCK_HEADER = struct.Struct("<qI")
+_COLUMN_TYPECODES = ("d", "b", "h", "d", "i") # timestamps, codes, team ids, amounts, player ids
+
+
+def _format_message(code, team_name, amount, player_name, player_role):
+    # Same wording as the log entries AuctionManager used to build eagerly
+    if amount.is_integer(): # Amounts are stored as doubles; whole ones print as the ints they were logged as
+        amount = int(amount)
+    if code == EVENT_BID:
+        return f"bids {amount}L."
+    if code == EVENT_LOT_OPENED:
+        return f"Auction started for {player_name} (Role: {player_role}) at base price {amount}L."
+    if code == EVENT_SOLD:
+        return f"SOLD to {team_name} for {amount}L."
+    if code == EVENT_SALE_FAILED:
+        return f"Sale FAILED for {player_name} to {team_name} (post-bid squad/budget issue). Player UNSOLD."
+    if code == EVENT_UNSOLD:
+        return f"{player_name} is UNSOLD at {amount}L."
+    return "All players auctioned."
+
+
+class BidEventLog:
+    """Bounded, array-backed log of auction events with lazily formatted entries."""
+    def __init__(self, max_events=DEFAULT_MAX_EVENTS, spill_path=None):
+        if max_events < 1:
+            raise ValueError("max_events must be positive.")
+        self.max_events = max_events
+        self.spill_path = spill_path
+        self._columns = tuple(array(typecode, bytes(array(typecode).itemsize * max_events)) for typecode in _COLUMN_TYPECODES)
+        self._timestamps, self._codes, self._team_ids, self._amounts, self._player_ids = self._columns
+        self._next = 0 # Ring position of the next write
+        self._size = 0
+        self.total_recorded = 0 # Sequence number of the next event
+        self.spilled_events = 0
+        self._team_names, self._team_ids_by_name = [], {}
+        self._players, self._player_ids_by_name = [], {} # (name, role)
+        # Anchor pairing the monotonic clock with wall time, for display timestamps only
+        self._anchor_monotonic = time.monotonic()
+        self._anchor_wall = time.time()
+
+    def __len__(self):
+        return self._size
+
+    def _intern_team(self, team_name):
+        team_id = self._team_ids_by_name.get(team_name)
+        if team_id is None:
+            team_id = self._team_ids_by_name[team_name] = len(self._team_names)
+            self._team_names.append(team_name)
+        return team_id
+
+    def _intern_player(self, player):
+        player_name = player.get("name", "Unknown")
+        player_id = self._player_ids_by_name.get(player_name)
+        if player_id is None:
+            player_id = self._player_ids_by_name[player_name] = len(self._players)
+            self._players.append((player_name, player.get("role", "N/A")))
+        return player_id
+
+    def record(self, code, team_name=None, amount=0, player=None):
+        position = self._next
+        self._timestamps[position] = time.monotonic()
+        self._codes[position] = code
+        self._team_ids[position] = NO_ID if team_name is None else self._intern_team(team_name)
+        self._amounts[position] = amount
+        self._player_ids[position] = NO_ID if player is None else self._intern_player(player)
+        self.total_recorded += 1
+        if self._size < self.max_events:
+            self._size += 1
+        position += 1
+        if position == self.max_events:
+            position = 0
+            if self.spill_path:
+                self._spill()
+        self._next = position
+
+    def _spill(self):
+        # Called with the buffer full and in order (the ring has just wrapped to position 0)
+        with open(self.spill_path, "ab") as file:
+            file.write(_SPILL_BLOCK_HEADER.pack(self.total_recorded - self._size, self._size))
+            for column in self._columns:
+                file.write(column.tobytes())
+        self.spilled_events += self._size
+        self._size = 0
+
+    @property
+    def first_sequence(self):
+        # Sequence number of the oldest event still held in memory
+        return self.total_recorded - self._size
+
+    def _iter_raw(self, since_sequence=0):
+        start_sequence = max(since_sequence, self.first_sequence)
+        for sequence in range(start_sequence, self.total_recorded):
+            position = (self._next - (self.total_recorded - sequence)) % self.max_events
+            yield (sequence, self._timestamps[position], self._codes[position], self._team_ids[position],
+                   self._amounts[position], self._player_ids[position])
+
+    def _iter_spilled_raw(self):
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return
+        with open(self.spill_path, "rb") as file:
+            while True:
+                header = file.read(_SPILL_BLOCK_HEADER.size)
+                if len(header) < _SPILL_BLOCK_HEADER.size:
+                    return
+                first_sequence, count = _SPILL_BLOCK_HEADER.unpack(header)
+                columns = []
+                for typecode in _COLUMN_TYPECODES:
+                    column = array(typecode)
+                    column.frombytes(file.read(column.itemsize * count))
+                    columns.append(column)
+                for offset, row in enumerate(zip(*columns)):
+                    yield (first_sequence + offset,) + row
+
+    def _raw_events(self, since_sequence, include_spilled):
+        # Spilled events can only be decoded by the log that wrote them (the name tables live in memory)
+        if not include_spilled:
+            return self._iter_raw(since_sequence)
+        spilled = (row for row in self._iter_spilled_raw() if row[0] >= since_sequence)
+        return itertools.chain(spilled, self._iter_raw(since_sequence))
+
+    def events(self, since_sequence=0, include_spilled=False):
+        # Yields (sequence, monotonic_ts, event_name, team_name, amount, player_name) without formatting messages
+        for sequence, timestamp, code, team_id, amount, player_id in self._raw_events(since_sequence, include_spilled):
+            team_name = self._team_names[team_id] if team_id != NO_ID else None
+            player_name = self._players[player_id][0] if player_id != NO_ID else None
+            yield sequence, timestamp, EVENT_NAMES[code], team_name, amount, player_name
+
+    def entries(self, since_sequence=0, include_spilled=False):
+        # Display form: [{"bidder", "info", "timestamp"}] as AuctionManager's bid log always had
+        formatted_entries = []
+        for _sequence, timestamp, code, team_id, amount, player_id in self._raw_events(since_sequence, include_spilled):
+            team_name = self._team_names[team_id] if team_id != NO_ID else None
+            player_name, player_role = self._players[player_id] if player_id != NO_ID else ("Unknown", "N/A")
+            formatted_entries.append({
+                "bidder": team_name if code == EVENT_BID else SYSTEM_BIDDER,
+                "info": _format_message(code, team_name, amount, player_name, player_role),
+                "timestamp": self.wall_clock(timestamp).strftime("%H:%M:%S"),
+            })
+        return formatted_entries
+
+    def wall_clock(self, monotonic_timestamp):
+        return datetime.datetime.fromtimestamp(self._anchor_wall + (monotonic_timestamp - self._anchor_monotonic))
+
+    def clear(self):
+        self._next = 0
+        self._size = 0
@@ -0,0 +1,201 @@
+import argparse
+import json
+import math
+import os
+import random
+
+# Synthetic catalog generator for scale testing. Produces batStats / bowlStats / teams data in the
+# same JSON and ASCII-table formats as the repository files. Each synthetic stat line starts from
+# a real row (so the joint shape of runs, strike rate, wickets and economy follows the real data)
+# and is then rescaled with seeded noise. Output is fully determined by the seed and options.
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+REAL_TEAM_IDS = ("csk", "dc", "kkr", "mi", "pbks", "rcb", "rr", "srh")
+BAT_COLUMNS = ("Player", "Innings", "Runs", "Average", "Highest", "SR", "Balls")
+BOWL_COLUMNS = ("Player", "Wickets", "Overs", "Runs Conceded", "Economy")
+
+SURNAMES = (
+    "Sharma", "Patel", "Singh", "Yadav", "Kumar", "Iyer", "Rahane", "Pandya", "Chahar", "Khan", "Ahmed",
+    "Gill", "Rana", "Tripathi", "Malik", "Thakur", "Samson", "Kishan", "Pant", "Jadeja", "Ashwin", "Bishnoi",
+    "Varma", "Dubey", "Gaikwad", "Agarwal", "Shaw", "Dhawan", "Saha", "Karthik", "Pooran", "Maxwell", "Warner",
+    "Buttler", "Stokes", "Curran", "Livingstone", "Bairstow", "Brook", "Klaasen", "Miller", "Markram", "Rabada",
+    "Nortje", "Ngidi", "Boult", "Southee", "Ferguson", "Conway", "Williamson", "Green", "Marsh", "Hazlewood",
+    "Starc", "Cummins", "Russell", "Narine", "Hetmyer", "Holder", "Powell", "Rashid", "Farooqi", "Gurbaz",
+)
+
+
+def load_real_stat_rows(repo_dir=REPO_DIR):
+    with open(os.path.join(repo_dir, "batStats.json"), "r", encoding="utf-8") as file:
+        bat_rows = json.load(file)
+    with open(os.path.join(repo_dir, "bowlStats.json"), "r", encoding="utf-8") as file:
+        bowl_rows = json.load(file)
+    return bat_rows, bowl_rows
+
+
+def _synthetic_name(player_number):
+    # Initials + surname cover the first ~40k names; later ones get a numeric suffix to stay unique
+    first_initial = chr(ord("A") + player_number % 26)
+    second_initial = chr(ord("A") + (player_number // 26) % 26)
+    surname = SURNAMES[(player_number // 676) % len(SURNAMES)]
+    name = f"{first_initial}{second_initial} {surname}"
+    cycle = player_number // (676 * len(SURNAMES))
+    return f"{name} {cycle + 1}" if cycle else name
+
+def _maybe_missing(value, rng, missing_value_rate):
+    return None if missing_value_rate and rng.random() < missing_value_rate else value
+
+def _synthetic_bat_row(player_name, template, rng, missing_value_rate):
+    scale = min(2.0, max(0.3, rng.lognormvariate(0, 0.35))) # Clamp so no season is far outside the real range
+    innings = max(1, min(16, round((template.get("Innings") or 1) * rng.uniform(0.7, 1.3))))
+    runs = int((template.get("Runs") or 0) * scale)
+    balls = int((template.get("Balls") or 0) * scale * rng.uniform(0.9, 1.1)) if runs else 0
+    if runs and not balls:
+        balls = max(1, int(runs / 1.3))
+    dismissals = max(0, innings - rng.choice((0, 0, 1, 1, 2, 3)))
+    highest = min(runs, max(runs // innings, int((template.get("Highest") or 0) * scale)))
+    return {
+        "Player": player_name, "Innings": innings, "Runs": runs,
+        "Average": _maybe_missing(round(runs / dismissals, 2), rng, missing_value_rate) if runs and dismissals else None,
+        "Highest": highest,
+        "SR": _maybe_missing(round(100 * runs / balls, 2), rng, missing_value_rate) if balls else None,
+        "Balls": balls,
+    }
+
+def _synthetic_bowl_row(player_name, template, rng, missing_value_rate):
+    template_overs = template.get("Overs") or 0.0
+    template_balls = int(template_overs) * 6 + round((template_overs % 1) * 10)
+    balls_bowled = int(template_balls * rng.uniform(0.7, 1.3))
+    overs = balls_bowled // 6 + (balls_bowled % 6) / 10
+    economy = round(template["Economy"] * rng.uniform(0.9, 1.1), 2) if template.get("Economy") and balls_bowled else None
+    wickets = round((template.get("Wickets") or 0) * (balls_bowled / template_balls if template_balls else 0) * rng.lognormvariate(0, 0.3))
+    return {
+        "Player": player_name, "Wickets": wickets, "Overs": overs,
+        "Runs Conceded": int(balls_bowled / 6 * economy) if economy else 0,
+        "Economy": _maybe_missing(economy, rng, missing_value_rate) if economy else None,
+    }
+
+def team_ids_for(num_teams):
+    return list(REAL_TEAM_IDS[:num_teams]) + [f"team{n:03d}" for n in range(len(REAL_TEAM_IDS) + 1, num_teams + 1)]
+
+
+def generate_catalog(num_players, num_teams=8, seed=0, name_collision_rate=0.0,
+                     missing_bat_rate=0.0, missing_bowl_rate=0.0, missing_value_rate=0.0, template_rows=None):
+    """Returns (bat_stats, bowl_stats, teams_json) lists/dicts ready to be written or passed to build_auction_pool.
+
+    name_collision_rate: share of players that reuse an earlier player's name (duplicate stat rows and roster entries).
+    missing_bat_rate / missing_bowl_rate: share of players with no batting / bowling row at all.
+    missing_value_rate: share of Average / SR / Economy values written as NA.
+    """
+    if num_players < 1 or num_teams < 1:
+        raise ValueError("num_players and num_teams must be positive.")
+    rng = random.Random(seed)
+    bat_templates, bowl_templates = template_rows or load_real_stat_rows()
+    # Pair each batting template with the same real player's bowling row so bat/bowl stats stay correlated
+    bowl_templates_by_name = {row["Player"]: row for row in bowl_templates}
+    paired_bowl_templates = [bowl_templates_by_name.get(row["Player"], bowl_templates[i % len(bowl_templates)])
+                             for i, row in enumerate(bat_templates)]
+    team_ids = team_ids_for(num_teams)
+    teams_json = {team_id: [] for team_id in team_ids}
+    bat_stats, bowl_stats = [], []
+    used_names = []
+
+    for player_number in range(num_players):
+        if used_names and name_collision_rate and rng.random() < name_collision_rate:
+            player_name = rng.choice(used_names)
+        else:
+            player_name = _synthetic_name(player_number)
+            used_names.append(player_name)
+        teams_json[team_ids[player_number % num_teams]].append(player_name)
+        template_index = rng.randrange(len(bat_templates))
+        if rng.random() >= missing_bat_rate:
+            bat_stats.append(_synthetic_bat_row(player_name, bat_templates[template_index], rng, missing_value_rate))
+        if rng.random() >= missing_bowl_rate:
+            bowl_stats.append(_synthetic_bowl_row(player_name, paired_bowl_templates[template_index], rng, missing_value_rate))
+
+    bat_stats.sort(key=lambda row: row["Runs"], reverse=True) # The repository files are ordered this way
+    bowl_stats.sort(key=lambda row: row["Wickets"], reverse=True)
+    return bat_stats, bowl_stats, teams_json
+
+
+# -------------------- Writers (repository file formats) --------------------
+def dump_stats_json(rows, filepath):
+    # One object per line, matching batStats.json / bowlStats.json
+    with open(filepath, "w", encoding="utf-8") as file:
+        file.write("[\n")
+        file.write(",\n".join("    " + json.dumps(row) for row in rows))
+        file.write("\n]\n")
+
+def _format_float(value):
+    return format(value, "g") if math.isfinite(value) else str(value)
+
+def format_ascii_table(rows, columns):
+    # Grid table in the style of batStats.txt: numeric columns right-aligned, all-float columns
+    # aligned on the decimal point, columns containing NA (or text) left-aligned.
+    column_cells, right_aligned = [], []
+    for column in columns:
+        values = [row.get(column) for row in rows]
+        is_numeric = all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values)
+        if is_numeric and any(isinstance(v, float) for v in values):
+            parts = [_format_float(float(v)).partition(".") for v in values]
+            int_width = max((len(whole) for whole, _dot, _frac in parts), default=0)
+            frac_width = max((len(dot + frac) for _whole, dot, frac in parts), default=0)
+            cells = [whole.rjust(int_width) + (dot + frac).ljust(frac_width) for whole, dot, frac in parts]
+        else:
+            cells = ["NA" if v is None else str(v) for v in values]
+        column_cells.append(cells)
+        right_aligned.append(is_numeric)
+
+    # Like tabulate's grid format, headers get two characters of slack beyond their own width
+    widths = [max([len(column) + 2] + [len(cell) for cell in cells]) for column, cells in zip(columns, column_cells)]
+    def border(fill):
+        return "+" + "+".join(fill * (width + 2) for width in widths) + "+"
+    def line(cells):
+        return "|" + "|".join(" " + (cell.rjust(width) if right else cell.ljust(width)) + " "
+                              for cell, width, right in zip(cells, widths, right_aligned)) + "|"
+
+    output_lines = [border("-"), line(columns), border("=")]
+    for row_index in range(len(rows)):
+        output_lines.append(line([cells[row_index] for cells in column_cells]))
+        output_lines.append(border("-"))
+    return "\n".join(output_lines)
+
+def write_catalog_files(output_dir, bat_stats, bowl_stats, teams_json, write_ascii_tables=True):
+    # Writes batStats.json, bowlStats.json, teams.json (+ .txt tables); returns a CATALOG_SOURCE_FILES-style dict
+    os.makedirs(output_dir, exist_ok=True)
+    source_files = {
+        "bat_stats": os.path.join(output_dir, "batStats.json"),
+        "bowl_stats": os.path.join(output_dir, "bowlStats.json"),
+        "teams": os.path.join(output_dir, "teams.json"),
+    }
+    dump_stats_json(bat_stats, source_files["bat_stats"])
+    dump_stats_json(bowl_stats, source_files["bowl_stats"])
+    with open(source_files["teams"], "w", encoding="utf-8") as file:
+        json.dump(teams_json, file, indent=4)
+    if write_ascii_tables:
+        for rows, columns, filename in ((bat_stats, BAT_COLUMNS, "batStats.txt"), (bowl_stats, BOWL_COLUMNS, "bowlStats.txt")):
+            with open(os.path.join(output_dir, filename), "w", encoding="utf-8") as file:
+                file.write(format_ascii_table(rows, columns) + "\n")
+    return source_files
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic player catalog for scale testing.")
+    parser.add_argument("--players", type=int, default=10000)
+    parser.add_argument("--teams", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--collision-rate", type=float, default=0.0, help="Share of players reusing an earlier name")
+    parser.add_argument("--missing-bat-rate", type=float, default=0.0)
+    parser.add_argument("--missing-bowl-rate", type=float, default=0.0)
+    parser.add_argument("--missing-value-rate", type=float, default=0.0, help="Share of Average/SR/Economy values written as NA")
+    parser.add_argument("--output-dir", default="synthetic_catalog")
+    parser.add_argument("--no-ascii", action="store_true", help="Skip the batStats.txt / bowlStats.txt tables")
+    args = parser.parse_args(argv)
+
+    bat_stats, bowl_stats, teams_json = generate_catalog(
+        args.players, args.teams, args.seed, args.collision_rate,
+        args.missing_bat_rate, args.missing_bowl_rate, args.missing_value_rate)
+    write_catalog_files(args.output_dir, bat_stats, bowl_stats, teams_json, not args.no_ascii)
+    print(f"Wrote {len(bat_stats)} batting rows, {len(bowl_stats)} bowling rows and {len(teams_json)} teams to {args.output_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,13 @@
+import functools
 import json
+import os
 import random
-import datetime # For timestamps
+import threading
+import time
+from types import MappingProxyType
+
+import metrics
+import bid_event_log
 
 # NAME_MAPPING and other initial parts (get_role, Team, AuctionManager etc. remain unchanged from the previous version)
 
@@ -85,21 +92,51 @@ def get_role(runs, wickets, player_name):
         return "Bowler"
     return "All-Rounder" if wickets > 0 else "Batter"
 
+class PlayerIndex:
+    """O(1) lookup of player dicts by "name" and by "stats_name"."""
+    def __init__(self, players=()):
+        self._by_name = {}
+        self._by_stats_name = {}
+        for player in players:
+            self.add(player)
+
+    def add(self, player):
+        # First record wins, matching the next(...) scans this index replaces
+        self._by_name.setdefault(player["name"], player)
+        stats_name = player.get("stats_name")
+        if stats_name:
+            self._by_stats_name.setdefault(stats_name, player)
+
+    def get(self, player_name, default=None):
+        return self._by_name.get(player_name, default)
+
+    def get_by_stats_name(self, stats_name, default=None):
+        return self._by_stats_name.get(stats_name, default)
+
+    def __contains__(self, player_name):
+        return player_name in self._by_name
+
+    def __len__(self):
+        return len(self._by_name)
+
+    def __iter__(self):
+        return iter(self._by_name.values())
+
+def as_player_index(players):
+    return players if isinstance(players, PlayerIndex) else PlayerIndex(players)
+
 INITIAL_AUCTION_POOL = []
 INITIAL_TEAMS_JSON = {}
 
-def initialize_auction_data():
-    global INITIAL_AUCTION_POOL, INITIAL_TEAMS_JSON
-
-    bat_stats_list = load_stats_from_json("batStats.json")
-    bowl_stats_list = load_stats_from_json("bowlStats.json")
-    INITIAL_TEAMS_JSON = load_teams_data_from_json("teams.json")
+CATALOG_SOURCE_FILES = {"bat_stats": "batStats.json", "bowl_stats": "bowlStats.json", "teams": "teams.json"}
 
-    if not INITIAL_TEAMS_JSON: # bat/bowl lists being empty is handled later by player not found
+@metrics.timed("game_logic.build_auction_pool")
+def build_auction_pool(bat_stats_list, bowl_stats_list, teams_json):
+    if not teams_json: # bat/bowl lists being empty is handled later by player not found
          raise Exception("Failed to load teams.json. This file is critical.")
 
     bowl_stats_dict = {player_stat['Player'].strip(): player_stat for player_stat in bowl_stats_list}
-    merged_player_data = []
+    merged_player_data = {} # Keyed by stats "Player" name
     processed_bat_players = set()
 
     def to_numeric(value, default_val=0, type_func=float):
@@ -123,7 +160,7 @@ def initialize_auction_data():
             "Wickets": to_numeric(bowl_player_stats.get("Wickets"), 0, int),
             "Economy": to_numeric(bowl_player_stats.get("Economy"), 15.0, float) # Default high economy for non-bowlers
         }
-        merged_player_data.append(player_merged)
+        merged_player_data.setdefault(player_name, player_merged)
 
     for bowl_player_name_key, bowl_player_val in bowl_stats_dict.items():
         if bowl_player_name_key not in processed_bat_players:
@@ -133,11 +170,11 @@ def initialize_auction_data():
                 "Wickets": to_numeric(bowl_player_val.get("Wickets"), 0, int),
                 "Economy": to_numeric(bowl_player_val.get("Economy"), 15.0, float)
             }
-            merged_player_data.append(player_merged)
+            merged_player_data.setdefault(player_name, player_merged)
 
     current_auction_pool = []
     player_names_in_pool = set()
-    for _team_name, players_in_team_from_json in INITIAL_TEAMS_JSON.items():
+    for _team_name, players_in_team_from_json in teams_json.items():
         for player_name_from_json_raw in players_in_team_from_json:
             player_name_from_json = str(player_name_from_json_raw).strip()
             if not player_name_from_json or player_name_from_json in player_names_in_pool:
@@ -145,7 +182,7 @@ def initialize_auction_data():
             player_names_in_pool.add(player_name_from_json)
 
             stats_name_to_find = NAME_MAPPING.get(player_name_from_json, player_name_from_json)
-            player_stats_found = next((p_stat for p_stat in merged_player_data if p_stat["Player"] == stats_name_to_find), None)
+            player_stats_found = merged_player_data.get(stats_name_to_find)
 
             if not player_stats_found:
                 # If player from teams.json not in stats, create a default entry
@@ -173,10 +210,87 @@ def initialize_auction_data():
             }
             current_auction_pool.append(player_dict)
 
-    INITIAL_AUCTION_POOL = current_auction_pool
+    return current_auction_pool
+
+def initialize_auction_data():
+    global INITIAL_AUCTION_POOL, INITIAL_TEAMS_JSON
+
+    bat_stats_list = load_stats_from_json(CATALOG_SOURCE_FILES["bat_stats"])
+    bowl_stats_list = load_stats_from_json(CATALOG_SOURCE_FILES["bowl_stats"])
+    INITIAL_TEAMS_JSON = load_teams_data_from_json(CATALOG_SOURCE_FILES["teams"])
+
+    INITIAL_AUCTION_POOL = build_auction_pool(bat_stats_list, bowl_stats_list, INITIAL_TEAMS_JSON)
     return INITIAL_AUCTION_POOL, INITIAL_TEAMS_JSON
 
+class AuctionCatalog:
+    """Read-only auction pool and team rosters shared by every request and session."""
+    def __init__(self, auction_pool, teams_json, source_signature=None):
+        self.auction_pool = tuple(MappingProxyType(dict(p)) for p in auction_pool)
+        self.teams_json = MappingProxyType({team_id: tuple(player_names) for team_id, player_names in teams_json.items()})
+        self.player_index = PlayerIndex(self.auction_pool)
+        self.player_ids = {} # Name -> position in auction_pool (first wins, as in player_index); compact ids for snapshots
+        for player_id, player in enumerate(self.auction_pool):
+            self.player_ids.setdefault(player.get("name"), player_id)
+        self.source_signature = source_signature
+
+    def pool_as_list(self):
+        # Mutable copies for callers that edit player dicts (squads, session state)
+        return [dict(p) for p in self.auction_pool]
+
+    def teams_json_as_dict(self):
+        return {team_id: list(player_names) for team_id, player_names in self.teams_json.items()}
+
+_catalog_cache = None
+_catalog_cache_lock = threading.Lock()
+
+def _catalog_source_signature(source_files):
+    signature = []
+    for source_key in sorted(source_files):
+        filepath = source_files[source_key]
+        try:
+            file_stat = os.stat(filepath)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Error: File not found {filepath}")
+        signature.append((filepath, file_stat.st_mtime_ns, file_stat.st_size))
+    return tuple(signature)
+
+def get_auction_catalog(source_files=None):
+    # Built once and reused; rebuilt only when a source file's mtime or size changes
+    global _catalog_cache
+    source_files = source_files or CATALOG_SOURCE_FILES
+    signature = _catalog_source_signature(source_files)
+    catalog = _catalog_cache
+    if catalog is not None and catalog.source_signature == signature:
+        return catalog
+    with _catalog_cache_lock:
+        catalog = _catalog_cache
+        if catalog is not None and catalog.source_signature == signature:
+            return catalog # Another thread rebuilt it while we waited
+        with metrics.span("game_logic.catalog_rebuild"):
+            bat_stats_list = load_stats_from_json(source_files["bat_stats"])
+            bowl_stats_list = load_stats_from_json(source_files["bowl_stats"])
+            teams_json = load_teams_data_from_json(source_files["teams"])
+            catalog = AuctionCatalog(build_auction_pool(bat_stats_list, bowl_stats_list, teams_json), teams_json, signature)
+        _catalog_cache = catalog
+        return catalog
+
+def invalidate_auction_catalog():
+    global _catalog_cache
+    with _catalog_cache_lock:
+        _catalog_cache = None
+
+ROLE_CATEGORIES = ("Batter", "Bowler", "Wicketkeeper", "All-Rounder")
+
+def get_role_category(role):
+    # Maps a player role onto the categories used by count_players_by_role
+    if "Wicketkeeper" in role: return "Wicketkeeper"
+    if "Batter" in role: return "Batter"
+    if role == "Bowler": return "Bowler"
+    if role == "All-Rounder": return "All-Rounder"
+    return None
+
 class Team:
+    @metrics.timed("game_logic.Team.__init__")
     def __init__(self, name, initial_budget=200000, players_json_list=None, full_auction_pool=None):
         self.name = name.upper()
         self.squad = []
@@ -188,95 +302,169 @@ class Team:
         self.min_allrounders = 2
         self.max_overseas = 6 # This is not currently enforced in logic, but good to have
         if players_json_list and full_auction_pool:
+            pool_index = as_player_index(full_auction_pool) # Pass a PlayerIndex to avoid re-indexing per team
             for player_name_from_json in players_json_list:
-                player_obj_from_pool = next((p.copy() for p in full_auction_pool if p["name"] == player_name_from_json), None)
+                player_obj_from_pool = pool_index.get(player_name_from_json)
                 if player_obj_from_pool:
-                    self.squad.append(player_obj_from_pool)
+                    self._squad.append(player_obj_from_pool.copy())
+                    self._count_player(player_obj_from_pool, 1)
+
+    # Role counts, squad value and overseas count are maintained incrementally so that
+    # urgency checks during bidding are O(1). Assigning a new squad list recounts it;
+    # mutate squads through add_player_to_squad / remove_player_from_squad_before_retention.
+    # After fork() the squad list and role counts are shared until either side next changes its squad.
+    @property
+    def squad(self):
+        return self._squad
+
+    @squad.setter
+    def squad(self, players):
+        self._squad = list(players)
+        self._squad_shared = False
+        self.role_counts = dict.fromkeys(ROLE_CATEGORIES, 0)
+        self.squad_value = 0
+        self.overseas_count = 0
+        for player in self._squad:
+            self._count_player(player, 1)
+
+    def fork(self):
+        twin = Team.__new__(Team)
+        twin.__dict__.update(self.__dict__)
+        twin._squad_shared = self._squad_shared = True
+        return twin
+
+    def _own_squad(self):
+        # Copy-on-write: take private copies of the squad and role counts before the first change after a fork
+        if self._squad_shared:
+            self._squad = list(self._squad)
+            self.role_counts = dict(self.role_counts)
+            self._squad_shared = False
+
+    def _count_player(self, player_obj, delta):
+        role_category = get_role_category(player_obj.get("role", ""))
+        if role_category:
+            self.role_counts[role_category] += delta
+        self.squad_value += player_obj.get("Price", 0) * delta
+        if player_obj.get("overseas"): # No overseas flag in the current data, so this stays 0
+            self.overseas_count += delta
 
     def count_players_by_role(self, role_category):
-        count = 0
-        if role_category == "Batter": count = sum(1 for p in self.squad if "Batter" in p["role"] and "Wicketkeeper" not in p["role"])
-        elif role_category == "Bowler": count = sum(1 for p in self.squad if p["role"] == "Bowler")
-        elif role_category == "Wicketkeeper": count = sum(1 for p in self.squad if "Wicketkeeper" in p["role"])
-        elif role_category == "All-Rounder": count = sum(1 for p in self.squad if p["role"] == "All-Rounder")
-        return count
+        return self.role_counts.get(role_category, 0)
 
     def can_add_player(self, player_obj_to_add, bid_price):
-        if len(self.squad) >= self.max_squad_size: return False, "Squad full"
+        if len(self._squad) >= self.max_squad_size: return False, "Squad full"
         if self.budget < bid_price: return False, "Cannot afford"
         return True, "Can add"
 
     def needs_role_urgency(self, role_to_check):
-        batters = self.count_players_by_role("Batter")
-        bowlers = self.count_players_by_role("Bowler")
-        wicketkeepers = self.count_players_by_role("Wicketkeeper")
-        allrounders = self.count_players_by_role("All-Rounder")
-        if "Batter" in role_to_check and "Wicketkeeper" not in role_to_check and batters < self.min_batters: return 3.0
-        if role_to_check == "Bowler" and bowlers < self.min_bowlers: return 3.0
-        if "Wicketkeeper" in role_to_check and wicketkeepers < self.min_wicketkeepers: return 3.5
-        if role_to_check == "All-Rounder" and allrounders < self.min_allrounders: return 2.5
-        if len(self.squad) < self.max_squad_size / 2 : return 1.5
+        role_counts = self.role_counts
+        if "Batter" in role_to_check and "Wicketkeeper" not in role_to_check and role_counts["Batter"] < self.min_batters: return 3.0
+        if role_to_check == "Bowler" and role_counts["Bowler"] < self.min_bowlers: return 3.0
+        if "Wicketkeeper" in role_to_check and role_counts["Wicketkeeper"] < self.min_wicketkeepers: return 3.5
+        if role_to_check == "All-Rounder" and role_counts["All-Rounder"] < self.min_allrounders: return 2.5
+        if len(self._squad) < self.max_squad_size / 2 : return 1.5
         return 1.0
 
     def add_player_to_squad(self, player_obj, price):
         player_with_price = {**player_obj.copy(), "Price": price}
-        self.squad.append(player_with_price)
+        self._own_squad()
+        self._squad.append(player_with_price)
+        self._count_player(player_with_price, 1)
         self.budget -= price
         return True
 
     def remove_player_from_squad_before_retention(self, player_name):
-        original_len = len(self.squad)
-        self.squad = [p for p in self.squad if p["name"] != player_name]
-        return len(self.squad) < original_len
+        self._own_squad()
+        kept_players = []
+        for player in self._squad:
+            if player["name"] != player_name:
+                kept_players.append(player)
+            else:
+                self._count_player(player, -1)
+        removed = len(kept_players) < len(self._squad)
+        self._squad = kept_players
+        return removed
 
-def perform_retention_for_team(team_obj, global_auction_pool_list, num_players_to_retain_target, list_of_player_names_to_retain=None, is_user_team=False):
+RETENTION_FEE_PER_PLAYER = 150
+AI_BID_INCREMENTS = (10, 20, 50, 70)
+
+def _apply_retention_to_team(team_obj, num_players_to_retain_target, list_of_player_names_to_retain=None, is_user_team=False):
+    # Picks and pays for the team's retentions; the caller removes the returned names from the pool
     retained_this_round_for_team = []
-    retention_fee_per_player = 150
+    retention_fee_per_player = RETENTION_FEE_PER_PLAYER
     players_available_for_retention_in_team = [p.copy() for p in team_obj.squad] # squad is from teams.json initially
     players_available_for_retention_in_team.sort(key=lambda p: p.get("demand",0), reverse=True) # Use .get for safety
 
     if is_user_team and list_of_player_names_to_retain:
+        squad_index = PlayerIndex(players_available_for_retention_in_team)
         for name_to_retain in list_of_player_names_to_retain:
-            player_to_retain_obj = next((p for p in players_available_for_retention_in_team if p["name"] == name_to_retain), None)
+            player_to_retain_obj = squad_index.get(name_to_retain)
             if player_to_retain_obj and len(retained_this_round_for_team) < num_players_to_retain_target:
                 retained_this_round_for_team.append(player_to_retain_obj)
     else: # AI retention logic
         retained_this_round_for_team = players_available_for_retention_in_team[:num_players_to_retain_target]
 
     final_squad_for_team_after_this_retention = []
+    retained_names = []
     for player_data_to_retain in retained_this_round_for_team:
         if team_obj.budget >= retention_fee_per_player:
             team_obj.budget -= retention_fee_per_player
             player_with_retention_price = {**player_data_to_retain, "Price": retention_fee_per_player}
             final_squad_for_team_after_this_retention.append(player_with_retention_price)
-            global_auction_pool_list[:] = [p for p in global_auction_pool_list if p.get("name") != player_data_to_retain.get("name")]
+            retained_names.append(player_data_to_retain.get("name"))
         else:
             pass # Cannot afford, player stays in pool (or rather, was never removed)
     team_obj.squad = final_squad_for_team_after_this_retention # Squad now only has retained players
+    return retained_names
+
+def _remove_players_from_pool(global_auction_pool_list, player_names_to_remove):
+    # Single pass over the pool, in place so callers holding the list see the change
+    if player_names_to_remove:
+        names_to_remove = set(player_names_to_remove)
+        global_auction_pool_list[:] = [p for p in global_auction_pool_list if p.get("name") not in names_to_remove]
+
+@metrics.timed("game_logic.perform_retention_for_team")
+def perform_retention_for_team(team_obj, global_auction_pool_list, num_players_to_retain_target, list_of_player_names_to_retain=None, is_user_team=False):
+    retained_names = _apply_retention_to_team(team_obj, num_players_to_retain_target, list_of_player_names_to_retain, is_user_team)
+    _remove_players_from_pool(global_auction_pool_list, retained_names)
     return team_obj, global_auction_pool_list
 
-def simulate_ai_bidding_for_player(player_being_auctioned, participating_ai_teams_list, current_highest_bid_amount, user_team_name_str_if_involved):
+@metrics.timed("game_logic.perform_retention_for_all_teams")
+def perform_retention_for_all_teams(retention_decisions, global_auction_pool_list):
+    # retention_decisions: iterable of (team_obj, num_players_to_retain_target, list_of_player_names_to_retain, is_user_team).
+    # Same budgets, squads and pool as calling perform_retention_for_team per team, with one pool pass in total.
+    retained_teams = []
+    all_retained_names = []
+    for team_obj, num_players_to_retain_target, list_of_player_names_to_retain, is_user_team in retention_decisions:
+        all_retained_names.extend(_apply_retention_to_team(team_obj, num_players_to_retain_target, list_of_player_names_to_retain, is_user_team))
+        retained_teams.append(team_obj)
+    _remove_players_from_pool(global_auction_pool_list, all_retained_names)
+    return retained_teams, global_auction_pool_list
+
+@metrics.timed("game_logic.simulate_ai_bidding_for_player")
+def simulate_ai_bidding_for_player(player_being_auctioned, participating_ai_teams_list, current_highest_bid_amount, user_team_name_str_if_involved, rng=random):
+    # rng: anything with uniform()/choice(), e.g. a seeded random.Random; defaults to the module-level generator
     bids_log_for_this_round = []
     new_highest_bid_this_round = current_highest_bid_amount
     winning_team_obj_this_round = None
+    user_team_name_upper = user_team_name_str_if_involved.upper()
+    min_next_bid = new_highest_bid_this_round + 10 # Check min increment
     eligible_ai_bidders = [
         team for team in participating_ai_teams_list
-        if team.name.upper() != user_team_name_str_if_involved.upper()
-           and team.can_add_player(player_being_auctioned, new_highest_bid_this_round + 10)[0] # Check min increment
+        if team.name.upper() != user_team_name_upper
+           and team.can_add_player(player_being_auctioned, min_next_bid)[0]
     ]
     if not eligible_ai_bidders:
         return new_highest_bid_this_round, winning_team_obj_this_round, bids_log_for_this_round
 
-    eligible_ai_bidders.sort(key=lambda t: (t.needs_role_urgency(player_being_auctioned.get("role","Batter")), player_being_auctioned.get("demand",0), t.budget), reverse=True)
-
-    if not eligible_ai_bidders: # Re-check after sort, though unlikely to change emptiness
-        return new_highest_bid_this_round, winning_team_obj_this_round, bids_log_for_this_round
-
-    top_ai_bidder_candidate = eligible_ai_bidders[0]
-    role_need_multiplier = top_ai_bidder_candidate.needs_role_urgency(player_being_auctioned.get("role","Batter"))
-    ai_perceived_value = player_being_auctioned.get("base_price",20) + (player_being_auctioned.get("demand",0) * role_need_multiplier * random.uniform(0.7, 1.3))
-    max_bid_ai_willing_to_make = min(ai_perceived_value, top_ai_bidder_candidate.budget * random.uniform(0.3, 0.5), top_ai_bidder_candidate.budget -10) # ensure some budget left
-    potential_ai_bid = int((new_highest_bid_this_round + random.choice([10, 20, 50, 70])) / 10) * 10 # round to 10s
+    # Only the top candidate bids. max() returns the same team a stable descending sort would put first;
+    # the player's demand is identical for every team so it does not affect the order.
+    player_role = player_being_auctioned.get("role","Batter")
+    top_ai_bidder_candidate = max(eligible_ai_bidders, key=lambda t: (t.needs_role_urgency(player_role), t.budget))
+    role_need_multiplier = top_ai_bidder_candidate.needs_role_urgency(player_role)
+    ai_perceived_value = player_being_auctioned.get("base_price",20) + (player_being_auctioned.get("demand",0) * role_need_multiplier * rng.uniform(0.7, 1.3))
+    max_bid_ai_willing_to_make = min(ai_perceived_value, top_ai_bidder_candidate.budget * rng.uniform(0.3, 0.5), top_ai_bidder_candidate.budget -10) # ensure some budget left
+    potential_ai_bid = int((new_highest_bid_this_round + rng.choice(AI_BID_INCREMENTS)) / 10) * 10 # round to 10s
 
     if potential_ai_bid <= top_ai_bidder_candidate.budget and potential_ai_bid <= max_bid_ai_willing_to_make and potential_ai_bid > new_highest_bid_this_round:
         new_highest_bid_this_round = potential_ai_bid
@@ -285,22 +473,110 @@ def simulate_ai_bidding_for_player(player_being_auctioned, participating_ai_team
 
     return new_highest_bid_this_round, winning_team_obj_this_round, bids_log_for_this_round
 
+FORK_BID_LOG_MAX_EVENTS = 256 # Forks are for rollouts; nobody reads far back in their bid log
+STALE_BID_MESSAGE = "The bidding has moved on since you last looked; refresh and bid again."
+
+AUCTION_LIFECYCLE_PHASES = (
+    "setup_auction_stage", "start_bidding_for_next_player", "process_user_bid",
+    "trigger_ai_bids_after_user_action", "finalize_current_player_auction",
+)
+
+class AuctionHookRegistry:
+    """Observers for AuctionManager lifecycle phases.
+
+    A hook may define before_phase(phase, manager) and/or after_phase(phase, manager, result, elapsed_seconds);
+    after_phase also runs (with result None) when the phase raises. With nothing registered a phase call
+    costs a single attribute check.
+    """
+    def __init__(self):
+        self._hooks = {phase: [] for phase in AUCTION_LIFECYCLE_PHASES}
+        self._before = {phase: () for phase in AUCTION_LIFECYCLE_PHASES}
+        self._after = {phase: () for phase in AUCTION_LIFECYCLE_PHASES}
+        self.active = False
+
+    def register(self, hook, phases=None):
+        for phase in phases or AUCTION_LIFECYCLE_PHASES:
+            if phase not in self._hooks:
+                raise ValueError(f"Unknown auction phase: {phase}")
+            if hook not in self._hooks[phase]:
+                self._hooks[phase].append(hook)
+        self._rebuild()
+        return hook
+
+    def copy(self):
+        # Independent registry starting with the same hooks
+        registry = AuctionHookRegistry()
+        for phase, phase_hooks in self._hooks.items():
+            registry._hooks[phase] = list(phase_hooks)
+        registry._rebuild()
+        return registry
+
+    def unregister(self, hook):
+        for phase_hooks in self._hooks.values():
+            if hook in phase_hooks:
+                phase_hooks.remove(hook)
+        self._rebuild()
+
+    def _rebuild(self):
+        # Hooks are flattened into tuples of bound callbacks so dispatch does no attribute lookups
+        for phase, phase_hooks in self._hooks.items():
+            self._before[phase] = tuple(h.before_phase for h in phase_hooks if hasattr(h, "before_phase"))
+            self._after[phase] = tuple(h.after_phase for h in phase_hooks if hasattr(h, "after_phase"))
+        self.active = any(self._hooks.values())
+
+    def run_phase(self, phase, manager, func, *args, **kwargs):
+        for before_phase in self._before[phase]:
+            before_phase(phase, manager)
+        result = None
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+            return result
+        finally:
+            elapsed_seconds = time.perf_counter() - start
+            for after_phase in self._after[phase]:
+                after_phase(phase, manager, result, elapsed_seconds)
+
+AUCTION_HOOKS = AuctionHookRegistry() # Shared by every AuctionManager that is not given its own registry
+
+def _lifecycle_phase(phase):
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            hooks = self.hooks
+            if not hooks.active:
+                return method(self, *args, **kwargs)
+            return hooks.run_phase(phase, self, method, self, *args, **kwargs)
+        return wrapper
+    return decorator
+
 class AuctionManager:
-    def __init__(self, all_players_master_list, team_details_from_json):
+    def __init__(self, all_players_master_list, team_details_from_json, rng=None, hooks=None, bid_log=None):
+        self.rng = rng or random # Pass a seeded random.Random for reproducible auctions
+        self.hooks = hooks or AUCTION_HOOKS
+        self.bid_log = bid_log if bid_log is not None else bid_event_log.BidEventLog() # Pass a BidEventLog(max_events, spill_path) to change the cap or spill to disk
+        self._current_lot_first_event = 0
         self.original_master_auction_pool = [p.copy() for p in all_players_master_list]
+        self.master_pool_index = PlayerIndex(self.original_master_auction_pool)
         self.current_auction_pool_for_bidding = []
         self.teams = {}
         self.sold_players_log = []
         self.unsold_players_log = []
         self.current_player_auction_index = -1
         self.current_player_up_for_auction = None
-        self.current_bids_log_for_player = []
         self.current_highest_bid_amount = 0
         self.current_highest_bidder_team_obj = None
+        # bid_version changes whenever the lot or its highest bid changes. Bidders that pass the version
+        # they last saw get compare-and-set semantics; _bid_lock only covers the compare and the write.
+        self.bid_version = 0
+        self._bid_lock = threading.Lock()
+        self._logs_shared = False # Set by fork(); the sold / unsold logs are copied before the next append
         for team_name_key, initial_player_names_list in team_details_from_json.items():
             team_name_upper = team_name_key.upper()
-            self.teams[team_name_upper] = Team(name=team_name_upper, players_json_list=initial_player_names_list, full_auction_pool=self.original_master_auction_pool)
+            self.teams[team_name_upper] = Team(name=team_name_upper, players_json_list=initial_player_names_list, full_auction_pool=self.master_pool_index)
 
+    @_lifecycle_phase("setup_auction_stage")
+    @metrics.timed("game_logic.AuctionManager.setup_auction_stage")
     def setup_auction_stage(self, teams_state_after_retention_dict, auction_pool_after_retention_list):
         # teams_state_after_retention_dict is session['teams_current_state']
         # self.teams already contains Team objects from __init__
@@ -315,10 +591,10 @@ class AuctionManager:
                 # team_session_data['player_prices'] has prices for these names
 
                 new_squad_for_team_obj = []
-                initial_pool = self.original_master_auction_pool # Use the manager's initial pool for consistency
+                initial_pool_index = self.master_pool_index # Use the manager's initial pool for consistency
 
                 for player_name in team_session_data.get('squad_after_retention', []):
-                    player_detail = next((p.copy() for p in initial_pool if p['name'] == player_name), None)
+                    player_detail = initial_pool_index.get(player_name)
                     if player_detail:
                         price = team_session_data.get('player_prices', {}).get(player_name, 0) # Default to 0 if price not found
                         player_with_price = {**player_detail, "Price": price}
@@ -329,67 +605,139 @@ class AuctionManager:
                 print(f"Warning: Team ID {team_id} from session state not found in AuctionManager's initial teams.")
 
         self.current_auction_pool_for_bidding = [p.copy() for p in auction_pool_after_retention_list]
-        random.shuffle(self.current_auction_pool_for_bidding)
+        self.rng.shuffle(self.current_auction_pool_for_bidding)
         self.current_player_auction_index = -1
         self.sold_players_log = []
         self.unsold_players_log = []
+        self._logs_shared = False
+
+    def fork(self, rng=None, hooks=None, bid_log=None):
+        """Copy-on-write twin for what-if rollouts.
+
+        The fork shares the pools, the sale logs and every squad with this manager; a team's squad is
+        copied the first time either side changes it, and the logs on the first sale or no-sale. The
+        cost is one small object per team, independent of pool and squad sizes. rng defaults to a copy
+        of this manager's generator state (the same draws), hooks to the shared registry rather than
+        this manager's (so a fork never publishes live events) and bid_log to a small fresh log.
+        """
+        twin = AuctionManager.__new__(AuctionManager)
+        twin.__dict__.update(self.__dict__)
+        if rng is None and isinstance(self.rng, random.Random):
+            rng = random.Random()
+            rng.setstate(self.rng.getstate())
+        twin.rng = rng or self.rng
+        twin.hooks = hooks or AUCTION_HOOKS
+        twin.bid_log = bid_log if bid_log is not None else bid_event_log.BidEventLog(FORK_BID_LOG_MAX_EVENTS)
+        twin._current_lot_first_event = twin.bid_log.total_recorded
+        twin._bid_lock = threading.Lock()
+        twin.teams = {team_name: team.fork() for team_name, team in self.teams.items()}
+        if self.current_highest_bidder_team_obj is not None:
+            twin.current_highest_bidder_team_obj = twin.teams[self.current_highest_bidder_team_obj.name]
+        twin._logs_shared = self._logs_shared = True
+        return twin
+
+    def _own_logs(self):
+        if self._logs_shared:
+            self.sold_players_log = list(self.sold_players_log)
+            self.unsold_players_log = list(self.unsold_players_log)
+            self._logs_shared = False
 
     def get_team_object_by_name(self, team_name_str):
         return self.teams.get(team_name_str.upper())
 
+    @_lifecycle_phase("start_bidding_for_next_player")
     def start_bidding_for_next_player(self):
-        self.current_player_auction_index += 1
-        if self.current_player_auction_index < len(self.current_auction_pool_for_bidding):
-            self.current_player_up_for_auction = self.current_auction_pool_for_bidding[self.current_player_auction_index]
-            self.current_bids_log_for_player = []
-            self.current_highest_bid_amount = self.current_player_up_for_auction.get("base_price", 20)
-            self.current_highest_bidder_team_obj = None
-            self._log_bid_event("System", f"Auction started for {self.current_player_up_for_auction.get('name','Unknown')} (Role: {self.current_player_up_for_auction.get('role','N/A')}) at base price {self.current_highest_bid_amount}L.")
-            return self.current_player_up_for_auction, self.current_highest_bid_amount, self.is_auction_over() # Return auction_over flag
-        else:
-            self.current_player_up_for_auction = None
-            self._log_bid_event("System", "All players auctioned.")
-            # self.auction_over_flag = True # Set flag here
-            return None, 0, self.is_auction_over() # Return auction_over flag
+        with self._bid_lock:
+            self.bid_version += 1
+            self.current_player_auction_index += 1
+            if self.current_player_auction_index < len(self.current_auction_pool_for_bidding):
+                self.current_player_up_for_auction = self.current_auction_pool_for_bidding[self.current_player_auction_index]
+                self._current_lot_first_event = self.bid_log.total_recorded
+                self.current_highest_bid_amount = self.current_player_up_for_auction.get("base_price", 20)
+                self.current_highest_bidder_team_obj = None
+                self.bid_log.record(bid_event_log.EVENT_LOT_OPENED, None, self.current_highest_bid_amount, self.current_player_up_for_auction)
+                return self.current_player_up_for_auction, self.current_highest_bid_amount, self.is_auction_over() # Return auction_over flag
+            else:
+                self.current_player_up_for_auction = None
+                self.bid_log.record(bid_event_log.EVENT_ALL_LOTS_DONE)
+                # self.auction_over_flag = True # Set flag here
+                return None, 0, self.is_auction_over() # Return auction_over flag
 
     def is_auction_over(self):
         return self.current_player_auction_index >= len(self.current_auction_pool_for_bidding) -1 and self.current_player_up_for_auction is None
 
 
-    def _log_bid_event(self, bidder_name, message_or_amount_info):
-        entry = {"bidder": bidder_name, "info": message_or_amount_info, "timestamp": datetime.datetime.now().strftime("%H:%M:%S")}
-        self.current_bids_log_for_player.append(entry)
-
-    def process_user_bid(self, user_team_obj, bid_amount_by_user):
-        if not self.current_player_up_for_auction: return False, "No player is currently up for auction."
-        can_bid, reason = user_team_obj.can_add_player(self.current_player_up_for_auction, bid_amount_by_user)
+    @property
+    def current_bids_log_for_player(self):
+        # [{"bidder", "info", "timestamp"}] for the current lot, formatted on access from the event log
+        return self.bid_log.entries(self._current_lot_first_event)
+
+    def current_lot_state(self):
+        # What a bidder needs to place a versioned bid; read without the lock, so treat it as a hint
+        player = self.current_player_up_for_auction
+        bidder = self.current_highest_bidder_team_obj
+        return {"version": self.bid_version, "lot": self.current_player_auction_index,
+                "player": player.get("name") if player else None, "amount": self.current_highest_bid_amount,
+                "bidder": bidder.name if bidder else None}
+
+    @_lifecycle_phase("process_user_bid")
+    def process_user_bid(self, user_team_obj, bid_amount_by_user, expected_version=None):
+        # expected_version: the bid_version the bidder saw (see current_lot_state). Bids made against an
+        # older version are rejected as stale; without it a bid only has to beat the current highest.
+        if expected_version is not None and expected_version != self.bid_version:
+            return False, STALE_BID_MESSAGE # Cheap early reject; checked again under the lock
+        player = self.current_player_up_for_auction
+        if not player: return False, "No player is currently up for auction."
+        can_bid, reason = user_team_obj.can_add_player(player, bid_amount_by_user)
         if not can_bid: return False, reason
-        if bid_amount_by_user <= self.current_highest_bid_amount: return False, "Your bid must be higher than the current highest bid."
-        self.current_highest_bid_amount = bid_amount_by_user
-        self.current_highest_bidder_team_obj = user_team_obj
-        self._log_bid_event(user_team_obj.name, f"bids {bid_amount_by_user}L.")
-        return True, f"Your bid of {bid_amount_by_user}L for {self.current_player_up_for_auction.get('name','Unknown')} is now the highest."
-
+        with self._bid_lock:
+            if expected_version is not None and expected_version != self.bid_version:
+                return False, STALE_BID_MESSAGE
+            if self.current_player_up_for_auction is not player: return False, "No player is currently up for auction."
+            if bid_amount_by_user <= self.current_highest_bid_amount: return False, "Your bid must be higher than the current highest bid."
+            self.current_highest_bid_amount = bid_amount_by_user
+            self.current_highest_bidder_team_obj = user_team_obj
+            self.bid_version += 1
+            self.bid_log.record(bid_event_log.EVENT_BID, user_team_obj.name, bid_amount_by_user)
+        return True, f"Your bid of {bid_amount_by_user}L for {player.get('name','Unknown')} is now the highest."
+
+    @_lifecycle_phase("trigger_ai_bids_after_user_action")
     def trigger_ai_bids_after_user_action(self, user_team_name_str_if_involved):
-        if not self.current_player_up_for_auction: return None, "No player to run AI bids for."
-        ai_teams_eligible_to_bid = [team for team_name, team in self.teams.items() if not self.current_highest_bidder_team_obj or team_name != self.current_highest_bidder_team_obj.name]
-        new_ai_bid_amount, winning_ai_team_after_this_round, ai_bid_logs_this_round = simulate_ai_bidding_for_player(self.current_player_up_for_auction, ai_teams_eligible_to_bid, self.current_highest_bid_amount, user_team_name_str_if_involved)
-        for log_entry in ai_bid_logs_this_round:
-             self._log_bid_event(log_entry["team_name"], f"bids {log_entry['bid_amount']}L.")
-        if winning_ai_team_after_this_round and new_ai_bid_amount > self.current_highest_bid_amount:
-            self.current_highest_bid_amount = new_ai_bid_amount
-            self.current_highest_bidder_team_obj = winning_ai_team_after_this_round
-            return winning_ai_team_after_this_round, f"{winning_ai_team_after_this_round.name} outbids with {new_ai_bid_amount}L."
+        # Read the lot once: another thread may close it or outbid while the AI decides
+        seen_version = self.bid_version
+        player = self.current_player_up_for_auction
+        if not player: return None, "No player to run AI bids for."
+        current_highest_bid_amount, current_highest_bidder = self.current_highest_bid_amount, self.current_highest_bidder_team_obj
+        ai_teams_eligible_to_bid = [team for team_name, team in self.teams.items() if not current_highest_bidder or team_name != current_highest_bidder.name]
+        new_ai_bid_amount, winning_ai_team_after_this_round, ai_bid_logs_this_round = simulate_ai_bidding_for_player(player, ai_teams_eligible_to_bid, current_highest_bid_amount, user_team_name_str_if_involved, self.rng)
+        if winning_ai_team_after_this_round:
+            with self._bid_lock:
+                # The AI decided against seen_version; if anyone bid meanwhile its decision is stale and dropped
+                if self.bid_version == seen_version and new_ai_bid_amount > self.current_highest_bid_amount:
+                    for log_entry in ai_bid_logs_this_round:
+                         self.bid_log.record(bid_event_log.EVENT_BID, log_entry["team_name"], log_entry["bid_amount"])
+                    self.current_highest_bid_amount = new_ai_bid_amount
+                    self.current_highest_bidder_team_obj = winning_ai_team_after_this_round
+                    self.bid_version += 1
+                    return winning_ai_team_after_this_round, f"{winning_ai_team_after_this_round.name} outbids with {new_ai_bid_amount}L."
         if self.current_highest_bidder_team_obj:
              return self.current_highest_bidder_team_obj, f"{self.current_highest_bidder_team_obj.name} remains the highest bidder with {self.current_highest_bid_amount}L."
         return None, "No AI bids placed or no AI outbid the current highest."
 
+    @_lifecycle_phase("finalize_current_player_auction")
+    @metrics.timed("game_logic.AuctionManager.finalize_current_player_auction")
     def finalize_current_player_auction(self):
+        with self._bid_lock: # Closing the lot must not interleave with a bid landing on it
+            self.bid_version += 1
+            return self._finalize_current_player_auction_locked()
+
+    def _finalize_current_player_auction_locked(self):
         if not self.current_player_up_for_auction: return False, "No player auction to finalize.", None, False
         player_being_sold_or_unsold = self.current_player_up_for_auction
         final_price = self.current_highest_bid_amount
         winning_team_obj = self.current_highest_bidder_team_obj
         player_name = player_being_sold_or_unsold.get('name', 'Unknown')
+        self._own_logs()
 
         if winning_team_obj:
             # Attempt to add player to squad. This method updates budget and squad list internally.
@@ -400,20 +748,20 @@ class AuctionManager:
                     "team_id": winning_team_obj.name,  # Store team ID
                     "role": player_being_sold_or_unsold.get("role","N/A")
                 })
-                self._log_bid_event("System", f"SOLD to {winning_team_obj.name} for {final_price}L.")
+                self.bid_log.record(bid_event_log.EVENT_SOLD, winning_team_obj.name, final_price, player_being_sold_or_unsold)
                 # After selling, the current player is done. Set to None for next player logic.
                 self.current_player_up_for_auction = None
                 return True, f"{player_name} sold to {winning_team_obj.name} for {final_price}L.", winning_team_obj.name, self.is_auction_over()
             else:
                 # This case implies can_add_player check failed post-bidding (e.g. budget constraint due to parallel action not modeled here)
                 # Or, more likely, a logic error if can_add_player was true during bidding.
-                self._log_bid_event("System", f"Sale FAILED for {player_name} to {winning_team_obj.name} (post-bid squad/budget issue). Player UNSOLD.")
+                self.bid_log.record(bid_event_log.EVENT_SALE_FAILED, winning_team_obj.name, final_price, player_being_sold_or_unsold)
                 self.unsold_players_log.append(player_being_sold_or_unsold)
                 self.current_player_up_for_auction = None
                 return False, f"Sale failed for {player_name}. Player UNSOLD.", None, self.is_auction_over()
         else:
             # No winning bidder, player is unsold
-            self._log_bid_event("System", f"{player_name} is UNSOLD at {player_being_sold_or_unsold.get('base_price',0)}L.")
+            self.bid_log.record(bid_event_log.EVENT_UNSOLD, None, player_being_sold_or_unsold.get('base_price',0), player_being_sold_or_unsold)
             self.unsold_players_log.append(player_being_sold_or_unsold)
             self.current_player_up_for_auction = None
             return False, f"{player_name} UNSOLD.", None, self.is_auction_over()
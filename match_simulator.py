@@ -0,0 +1,225 @@
+import argparse
+import random
+import time
+
+import numpy as np
+
+import auction_engine
+import game_logic
+
+# Ball-by-ball T20 match simulator for judging squads after the auction. Each XI's catalog stats
+# (runs, avg, sr for batting; wickets, eco for bowling) become per-ball rates. Small samples and NA
+# values are shrunk towards replacement-level rates. A batter/bowler matchup combines them with the
+# odds-ratio (log5) method: wicket probability from the batter's balls per dismissal and the bowler's
+# wicket factor, and the expected runs per ball (strike rate x economy / league rate) spread over
+# 0/1/2/3/4/6 by scaling a league outcome mix. No extras, no free hits.
+#
+# Matches are simulated in batches: every ball is one set of NumPy operations across all matches in
+# the batch (who is on strike, who bowls the over, wickets, the chase), so the Python loop runs 240
+# times per batch, not per match. Random draws are one (matches x 241) block per batch: the toss plus
+# one uniform per ball of each innings. Match i always uses the same draws for a given seed, so
+# results are deterministic per seed and do not depend on the batch size.
+#
+#     python match_simulator.py --matches 100000
+
+OUTCOME_RUNS = np.array([0, 1, 2, 3, 4, 6, 0]) # Index 6 is a wicket
+WICKET = 6
+LEAGUE_OUTCOME_MIX = np.array([0.38, 0.37, 0.07, 0.005, 0.12, 0.055]) # 0, 1, 2, 3, 4, 6 on balls without a wicket
+LEAGUE_RUNS_PER_BALL = 1.35
+LEAGUE_WICKET_RATE = 1 / 20
+REPLACEMENT_RUNS_PER_BALL = 1.10 # Batting rates for players without batting stats (tail-enders)
+REPLACEMENT_WICKET_RATE = 1 / 12
+REPLACEMENT_ECONOMY = 9.5 # Bowling rates for part-timers
+REPLACEMENT_WICKET_FACTOR = 0.75
+BATTING_PRIOR_RUNS = 100 # Shrinkage: a batter's own rates get weight runs / (runs + prior)
+BOWLING_PRIOR_WICKETS = 5
+XI_SIZE = 11
+BOWLERS_USED = 5
+OVERS = 20
+BALLS_PER_OVER = 6
+OVER_BOWLERS = np.arange(OVERS) % BOWLERS_USED # Four overs each, never two in a row
+DEFAULT_BATCH_SIZE = 4096
+MIN_DOT_PROBABILITY = 0.02
+
+
+def _stat(player, key):
+    value = player.get(key)
+    return value if isinstance(value, (int, float)) and value > 0 else None
+
+def batting_rates(player):
+    # (runs per ball, wicket probability per ball) for a batter
+    runs, sr, avg = player.get("runs", 0) or 0, _stat(player, "sr"), _stat(player, "avg")
+    if sr is None or avg is None or not runs:
+        return REPLACEMENT_RUNS_PER_BALL, REPLACEMENT_WICKET_RATE
+    weight = runs / (runs + BATTING_PRIOR_RUNS)
+    runs_per_ball = sr / 100
+    wicket_rate = min(0.5, runs_per_ball / avg) # Balls per dismissal = avg / (sr / 100)
+    return (weight * runs_per_ball + (1 - weight) * REPLACEMENT_RUNS_PER_BALL,
+            weight * wicket_rate + (1 - weight) * REPLACEMENT_WICKET_RATE)
+
+def bowling_rates(player, mean_bowler_wickets):
+    # (runs per ball conceded, wicket factor relative to the league rate) for a bowler
+    eco, wickets = _stat(player, "eco"), player.get("wickets", 0) or 0
+    if eco is None:
+        return REPLACEMENT_ECONOMY / BALLS_PER_OVER, REPLACEMENT_WICKET_FACTOR
+    weight = wickets / (wickets + BOWLING_PRIOR_WICKETS)
+    wicket_factor = (wickets + BOWLING_PRIOR_WICKETS) / (mean_bowler_wickets + BOWLING_PRIOR_WICKETS)
+    return (weight * eco + (1 - weight) * REPLACEMENT_ECONOMY) / BALLS_PER_OVER, float(np.clip(wicket_factor, 0.5, 2.0))
+
+def mean_bowler_wickets(players):
+    wickets = [p.get("wickets", 0) for p in players if _stat(p, "eco") is not None and p.get("wickets")]
+    return sum(wickets) / len(wickets) if wickets else 1.0
+
+
+class Lineup:
+    """Playing XI of one squad: batting order and five bowlers, as per-ball rate arrays."""
+    def __init__(self, name, squad, mean_wickets):
+        self.name = name
+        players = list(squad)
+        bowling = {id(p): bowling_rates(p, mean_wickets) for p in players}
+        batting = {id(p): batting_rates(p) for p in players}
+        # Five best bowlers (fewest runs conceded per wicket factor), then the best remaining batters
+        by_bowling = sorted(players, key=lambda p: bowling[id(p)][0] / bowling[id(p)][1])
+        attack = by_bowling[:BOWLERS_USED]
+        others = sorted((p for p in players if all(p is not b for b in attack)),
+                        key=lambda p: batting[id(p)][0] * (1 - batting[id(p)][1]) / batting[id(p)][1], reverse=True)
+        xi = attack + others[:XI_SIZE - len(attack)]
+        xi.sort(key=lambda p: batting[id(p)][0] / batting[id(p)][1], reverse=True) # Runs per dismissal sets the order
+        self.batting_order = [p.get("name") for p in xi]
+        self.bowlers = [p.get("name") for p in attack]
+        padding = XI_SIZE - len(xi) # Short squads field replacement players
+        self.bat_runs_per_ball = np.array([batting[id(p)][0] for p in xi] + [REPLACEMENT_RUNS_PER_BALL] * padding)
+        self.bat_wicket_rate = np.array([batting[id(p)][1] for p in xi] + [REPLACEMENT_WICKET_RATE] * padding)
+        bowler_padding = BOWLERS_USED - len(attack)
+        self.bowl_runs_per_ball = np.array([bowling[id(p)][0] for p in attack] + [REPLACEMENT_ECONOMY / BALLS_PER_OVER] * bowler_padding)
+        self.bowl_wicket_factor = np.array([bowling[id(p)][1] for p in attack] + [REPLACEMENT_WICKET_FACTOR] * bowler_padding)
+
+    @classmethod
+    def from_team(cls, team_obj, mean_wickets):
+        return cls(team_obj.name, team_obj.squad, mean_wickets)
+
+
+def matchup_table(batting_side, bowling_side):
+    # (11 batters, 5 bowlers, 7 outcomes) cumulative outcome probabilities for every matchup
+    def odds(p):
+        return p / (1 - p)
+    bowler_wicket_rate = np.clip(LEAGUE_WICKET_RATE * bowling_side.bowl_wicket_factor, 1e-4, 0.5)
+    wicket_odds = odds(batting_side.bat_wicket_rate)[:, None] * odds(bowler_wicket_rate)[None, :] / odds(LEAGUE_WICKET_RATE)
+    p_wicket = wicket_odds / (1 + wicket_odds)
+    runs_per_ball = batting_side.bat_runs_per_ball[:, None] * bowling_side.bowl_runs_per_ball[None, :] / LEAGUE_RUNS_PER_BALL
+    # Scale the non-dot outcomes so expected runs on a non-wicket ball match runs_per_ball / (1 - p_wicket)
+    base_runs = float(LEAGUE_OUTCOME_MIX @ OUTCOME_RUNS[:6])
+    max_scale = (1 - MIN_DOT_PROBABILITY) / (1 - LEAGUE_OUTCOME_MIX[0])
+    scale = np.minimum(runs_per_ball / (1 - p_wicket) / base_runs, max_scale)
+    probabilities = np.empty(p_wicket.shape + (7,))
+    probabilities[..., 1:6] = LEAGUE_OUTCOME_MIX[1:] * scale[..., None]
+    probabilities[..., 0] = 1 - probabilities[..., 1:6].sum(axis=-1)
+    probabilities[..., :6] *= (1 - p_wicket)[..., None]
+    probabilities[..., WICKET] = p_wicket
+    cumulative = np.cumsum(probabilities, axis=-1)
+    cumulative[..., -1] = 1.0
+    return cumulative
+
+def _simulate_innings(cumulative, side, uniforms, target=None):
+    # cumulative: (2 sides, 11, 5, 7); side: (m,) which table each match uses; uniforms: (m, 120)
+    m = len(side)
+    runs = np.zeros(m, dtype=np.int64)
+    wickets = np.zeros(m, dtype=np.int64)
+    balls = np.zeros(m, dtype=np.int64)
+    striker = np.zeros(m, dtype=np.int64)
+    non_striker = np.ones(m, dtype=np.int64)
+    next_batter = np.full(m, 2, dtype=np.int64)
+    active = np.ones(m, dtype=bool)
+    for ball in range(OVERS * BALLS_PER_OVER):
+        over, ball_in_over = divmod(ball, BALLS_PER_OVER)
+        thresholds = cumulative[side, striker, OVER_BOWLERS[over]]
+        outcome = (uniforms[:, ball, None] >= thresholds).sum(axis=1)
+        ball_runs = np.where(active, OUTCOME_RUNS[outcome], 0)
+        out = active & (outcome == WICKET)
+        runs += ball_runs
+        balls += active
+        wickets += out
+        striker = np.where(out, np.minimum(next_batter, XI_SIZE - 1), striker) # New batter takes strike
+        next_batter += out
+        swap = (ball_runs % 2 == 1) != (ball_in_over == BALLS_PER_OVER - 1) # Odd runs and the end of the over both change ends
+        striker, non_striker = np.where(swap, non_striker, striker), np.where(swap, striker, non_striker)
+        active &= wickets < XI_SIZE - 1
+        if target is not None:
+            active &= runs <= target
+        if not active.any():
+            break
+    return runs, wickets, balls
+
+def simulate_matches(lineup_a, lineup_b, num_matches, seed=0, batch_size=DEFAULT_BATCH_SIZE):
+    """Returns {"runs", "wickets", "balls": (n, 2) arrays for A and B, "winner": 0 A / 1 B / -1 tie, "a_batted_first"}."""
+    cumulative = np.stack([matchup_table(lineup_a, lineup_b), matchup_table(lineup_b, lineup_a)]) # Side 0: A batting
+    rng = np.random.default_rng(seed)
+    innings_balls = OVERS * BALLS_PER_OVER
+    runs = np.zeros((num_matches, 2), dtype=np.int64)
+    wickets = np.zeros((num_matches, 2), dtype=np.int64)
+    balls = np.zeros((num_matches, 2), dtype=np.int64)
+    a_batted_first = np.zeros(num_matches, dtype=bool)
+    for start in range(0, num_matches, batch_size):
+        stop = min(start + batch_size, num_matches)
+        draws = rng.random((stop - start, 1 + 2 * innings_balls)) # Row-major, so match i's draws do not depend on batching
+        a_first = draws[:, 0] < 0.5
+        first_side = np.where(a_first, 0, 1)
+        first = _simulate_innings(cumulative, first_side, draws[:, 1:1 + innings_balls])
+        second = _simulate_innings(cumulative, 1 - first_side, draws[:, 1 + innings_balls:], target=first[0])
+        for column, (first_value, second_value) in enumerate(zip(first, second)):
+            target_array = (runs, wickets, balls)[column]
+            target_array[start:stop, 0] = np.where(a_first, first_value, second_value)
+            target_array[start:stop, 1] = np.where(a_first, second_value, first_value)
+        a_batted_first[start:stop] = a_first
+    winner = np.where(runs[:, 0] > runs[:, 1], 0, np.where(runs[:, 1] > runs[:, 0], 1, -1))
+    return {"runs": runs, "wickets": wickets, "balls": balls, "winner": winner, "a_batted_first": a_batted_first}
+
+def round_robin(teams, matches_per_pair, seed=0, batch_size=DEFAULT_BATCH_SIZE):
+    """Every pair of teams plays matches_per_pair matches; returns {team name: {"played", "won", "tied", "win_rate", "mean_score"}}."""
+    all_players = [p for team in teams for p in team.squad]
+    mean_wickets = mean_bowler_wickets(all_players)
+    lineups = [Lineup.from_team(team, mean_wickets) for team in teams]
+    table = {lineup.name: {"played": 0, "won": 0, "tied": 0, "runs": 0} for lineup in lineups}
+    pair_seeds = np.random.SeedSequence(seed).spawn(len(lineups) * (len(lineups) - 1) // 2)
+    pair_number = 0
+    for i in range(len(lineups)):
+        for j in range(i + 1, len(lineups)):
+            result = simulate_matches(lineups[i], lineups[j], matches_per_pair, pair_seeds[pair_number], batch_size)
+            pair_number += 1
+            for position, lineup in ((0, lineups[i]), (1, lineups[j])):
+                row = table[lineup.name]
+                row["played"] += matches_per_pair
+                row["won"] += int((result["winner"] == position).sum())
+                row["tied"] += int((result["winner"] == -1).sum())
+                row["runs"] += int(result["runs"][:, position].sum())
+    for row in table.values():
+        row["win_rate"] = (row["won"] + 0.5 * row["tied"]) / row["played"] if row["played"] else 0.0
+        row["mean_score"] = row.pop("runs") / row["played"] if row["played"] else 0.0
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate T20 matches between squads from a headless auction.")
+    parser.add_argument("--matches", type=int, default=100000, help="Matches for the throughput benchmark")
+    parser.add_argument("--round-robin", type=int, default=2000, help="Matches per pair for the squad table")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    teams = list(auction_engine.HeadlessAuctionEngine().run(seed=args.seed)["manager"].teams.values())
+    mean_wickets = mean_bowler_wickets([p for team in teams for p in team.squad])
+    lineup_a, lineup_b = Lineup.from_team(teams[0], mean_wickets), Lineup.from_team(teams[1], mean_wickets)
+    simulate_matches(lineup_a, lineup_b, min(args.matches, args.batch_size), args.seed, args.batch_size) # Warm-up
+    start = time.perf_counter()
+    result = simulate_matches(lineup_a, lineup_b, args.matches, args.seed, args.batch_size)
+    elapsed = time.perf_counter() - start
+    print(f"{args.matches} matches {lineup_a.name} v {lineup_b.name} in {elapsed:.2f} s ({args.matches / elapsed:,.0f} matches/s); "
+          f"mean score {result['runs'].mean():.1f}/{result['wickets'].mean():.1f}, "
+          f"{lineup_a.name} win rate {(result['winner'] == 0).mean():.3f}")
+
+    table = round_robin(teams, args.round_robin, args.seed, args.batch_size)
+    for team_name, row in sorted(table.items(), key=lambda item: item[1]["win_rate"], reverse=True):
+        print(f"  {team_name:5s} win rate {row['win_rate']:.3f}  mean score {row['mean_score']:.1f}  ({row['played']} matches)")
+
+if __name__ == "__main__":
+    main()
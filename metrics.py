@@ -0,0 +1,174 @@
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Minimal in-process metrics: latency histograms, counters and gauges, rendered in the Prometheus
+# text exposition format. Timing spans are no-ops while the registry is disabled, so they can stay in
+# hot code. Set AUCTION_METRICS_ENABLED=0 to turn everything off (the Flask hooks are then not installed).
+
+DEFAULT_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+DEFAULT_SIZE_BUCKETS = (64, 256, 1024, 2048, 4096, 8192, 16384, 65536)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1) # Last slot is the +Inf bucket
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.bucket_counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Thread-safe store of named metrics; labels are passed as tuples of (name, value) pairs."""
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._histograms = {} # (metric name, labels) -> Histogram
+        self._counters = {}
+        self._gauges = {}
+        self._help = {}
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def histogram(self, name, labels=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        # Returns the live Histogram so hot callers can resolve it once (see timed())
+        key = (name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            return histogram
+
+    def observe(self, name, value, labels=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        key = (name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc_counter(self, name, amount=1, labels=()):
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def add_to_gauge(self, name, amount, labels=()):
+        key = (name, labels)
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            for histogram in self._histograms.values(): # Zeroed in place; timed() holds references to them
+                histogram.bucket_counts = [0] * len(histogram.bucket_counts)
+                histogram.total = 0.0
+                histogram.count = 0
+            self._counters.clear()
+            self._gauges.clear()
+
+    def render_prometheus(self):
+        with self._lock:
+            histograms = [(key, list(h.bucket_counts), h.buckets, h.total, h.count) for key, h in self._histograms.items()]
+            counters = list(self._counters.items())
+            gauges = list(self._gauges.items())
+
+        output_lines = []
+        described = set()
+        def header(name, metric_type):
+            if name not in described:
+                described.add(name)
+                if name in self._help:
+                    output_lines.append(f"# HELP {name} {self._help[name]}")
+                output_lines.append(f"# TYPE {name} {metric_type}")
+
+        for (name, labels), value in sorted(counters):
+            header(name, "counter")
+            output_lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), value in sorted(gauges):
+            header(name, "gauge")
+            output_lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), bucket_counts, buckets, total, count in sorted(histograms, key=lambda h: h[0]):
+            header(name, "histogram")
+            cumulative = 0
+            for upper_bound, bucket_count in zip(buckets + ("+Inf",), bucket_counts):
+                cumulative += bucket_count
+                output_lines.append(f"{name}_bucket{_format_labels(labels + (('le', str(upper_bound)),))} {cumulative}")
+            output_lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            output_lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(output_lines) + "\n"
+
+
+def _escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label_value(value)}"' for key, value in labels) + "}"
+
+
+def disable_in_pool_worker():
+    # For process-pool initializers: workers never serve /metrics, so their spans would only cost time
+    REGISTRY.enabled = False
+
+
+REGISTRY = MetricsRegistry(enabled=os.environ.get("AUCTION_METRICS_ENABLED", "1").lower() not in ("0", "false", "no", "off"))
+REGISTRY.describe("auction_span_seconds", "Time spent in named game_logic spans.")
+
+SPAN_METRIC = "auction_span_seconds"
+
+
+class _TimingSpan:
+    __slots__ = ("labels", "start")
+
+    def __init__(self, span_name):
+        self.labels = (("span", span_name),)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        REGISTRY.observe(SPAN_METRIC, time.perf_counter() - self.start, self.labels)
+        return False
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+def span(span_name):
+    # with metrics.span("name"): ... records into auction_span_seconds{span="name"} when enabled
+    return _TimingSpan(span_name) if REGISTRY.enabled else _NULL_SPAN
+
+def timed(span_name):
+    # Decorator form of span(); costs one attribute check per call while metrics are disabled
+    histogram = REGISTRY.histogram(SPAN_METRIC, (("span", span_name),))
+    registry_lock = REGISTRY._lock
+    perf_counter = time.perf_counter
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not REGISTRY.enabled:
+                return func(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                with registry_lock:
+                    histogram.observe(elapsed)
+        return wrapper
+    return decorator
@@ -0,0 +1,134 @@
+import json
+import os
+import sys
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import auction_engine
+import game_logic
+import metrics
+
+# Monte Carlo pricing: runs many seeded headless auctions across processes and reduces them,
+# per player, to sale-price percentiles, probability of going unsold and winning-team shares.
+# Partial results are merged as chunks finish, and prices are kept as histograms (bids move
+# in fixed steps), so memory depends on the pool size, not on the number of auctions.
+
+DEFAULT_PERCENTILES = (10, 25, 50, 75, 90)
+
+
+class PlayerPriceAggregator:
+    """Streaming per-player reducer; partial aggregators from workers are combined with merge()."""
+    def __init__(self):
+        self.auctions_run = 0
+        self.price_histograms = {} # player name -> Counter(price -> times sold at that price)
+        self.unsold_counts = Counter()
+        self.winner_counts = {} # player name -> Counter(team id -> wins)
+
+    def add_auction_result(self, result):
+        self.auctions_run += 1
+        for player_name, team_id, price in result["sale_log"]:
+            price_histogram = self.price_histograms.get(player_name)
+            if price_histogram is None:
+                price_histogram = self.price_histograms[player_name] = Counter()
+                self.winner_counts[player_name] = Counter()
+            price_histogram[price] += 1
+            self.winner_counts[player_name][team_id] += 1
+        self.unsold_counts.update(result["unsold"])
+
+    def merge(self, other):
+        self.auctions_run += other.auctions_run
+        for player_name, price_histogram in other.price_histograms.items():
+            self.price_histograms.setdefault(player_name, Counter()).update(price_histogram)
+            self.winner_counts.setdefault(player_name, Counter()).update(other.winner_counts[player_name])
+        self.unsold_counts.update(other.unsold_counts)
+        return self
+
+    def summary(self, percentiles=DEFAULT_PERCENTILES):
+        player_summaries = {}
+        for player_name in set(self.price_histograms) | set(self.unsold_counts):
+            price_histogram = self.price_histograms.get(player_name, Counter())
+            times_sold = sum(price_histogram.values())
+            times_unsold = self.unsold_counts.get(player_name, 0)
+            times_auctioned = times_sold + times_unsold
+            winner_counts = self.winner_counts.get(player_name, Counter())
+            player_summaries[player_name] = {
+                "times_auctioned": times_auctioned,
+                "retained_probability": 1 - times_auctioned / self.auctions_run if self.auctions_run else 0.0,
+                "unsold_probability": times_unsold / times_auctioned if times_auctioned else 0.0,
+                "price_percentiles": histogram_percentiles(price_histogram, percentiles),
+                "winning_team_distribution": {team_id: wins / times_sold for team_id, wins in winner_counts.most_common()},
+            }
+        return {"auctions_run": self.auctions_run, "players": player_summaries}
+
+
+def histogram_percentiles(histogram, percentiles=DEFAULT_PERCENTILES):
+    # Nearest-rank percentiles over a value -> count histogram; None when nothing was recorded
+    total = sum(histogram.values())
+    if not total:
+        return {p: None for p in percentiles}
+    sorted_values = sorted(histogram.items())
+    results = {}
+    for p in sorted(percentiles):
+        target_rank = max(1, -(-p * total // 100)) # ceil(p/100 * total)
+        cumulative = 0
+        for value, count in sorted_values:
+            cumulative += count
+            if cumulative >= target_rank:
+                results[p] = value
+                break
+    return results
+
+
+# --- Worker side: the catalog and engine are built once per process by the pool initializer ---
+_worker_engine = None
+
+def _init_worker(auction_pool, teams_json, retention_policy, pool_worker=False):
+    global _worker_engine
+    if pool_worker:
+        metrics.disable_in_pool_worker()
+    catalog = game_logic.AuctionCatalog(auction_pool, teams_json)
+    _worker_engine = auction_engine.HeadlessAuctionEngine(catalog, retention_policy=retention_policy)
+
+def _run_seed_chunk(start_seed, num_auctions):
+    aggregator = PlayerPriceAggregator()
+    for seed in range(start_seed, start_seed + num_auctions):
+        aggregator.add_auction_result(_worker_engine.run(seed))
+    return aggregator
+
+
+def estimate_price_distributions(num_auctions, base_seed=0, catalog=None,
+                                 retention_policy=auction_engine.ai_random_retention_policy,
+                                 max_workers=None, chunk_size=200, percentiles=DEFAULT_PERCENTILES):
+    # Runs seeds base_seed .. base_seed+num_auctions-1; the summary is the same for any worker count.
+    # max_workers=1 runs in-process without a pool.
+    catalog = catalog or game_logic.get_auction_catalog()
+    initargs = (catalog.pool_as_list(), catalog.teams_json_as_dict(), retention_policy)
+    chunks = [(start, min(chunk_size, base_seed + num_auctions - start))
+              for start in range(base_seed, base_seed + num_auctions, chunk_size)]
+    total = PlayerPriceAggregator()
+
+    if max_workers == 1:
+        _init_worker(*initargs)
+        for start_seed, count in chunks:
+            total.merge(_run_seed_chunk(start_seed, count))
+        return total.summary(percentiles)
+
+    max_workers = max_workers or os.cpu_count() or 1
+    max_in_flight = max_workers * 2 # Bounded submission keeps pending results (and memory) flat as N grows
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=initargs + (True,)) as executor:
+        pending = set()
+        chunk_iter = iter(chunks)
+        for start_seed, count in chunk_iter:
+            pending.add(executor.submit(_run_seed_chunk, start_seed, count))
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    total.merge(future.result())
+        for future in pending:
+            total.merge(future.result())
+    return total.summary(percentiles)
+
+
+if __name__ == "__main__":
+    num_auctions_arg = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    print(json.dumps(estimate_price_distributions(num_auctions_arg), indent=2, sort_keys=True))
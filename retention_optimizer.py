@@ -0,0 +1,224 @@
+import argparse
+import itertools
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import auction_engine
+import bid_advisor
+import game_logic
+import metrics
+
+# Retention recommendations for the user's team. A retention subset is scored by simulating the
+# rest of the auction after it and taking bid_advisor.squad_score of the user's team at the end.
+# Every subset is run on the same scenario seeds. A seed fixes the AI teams' retention counts
+# (random.randint in 'any number' mode, as process_retention_choices draws them) and the auction's
+# random draws, so subsets are compared on paired runs and averaging over seeds averages over the
+# AI retention randomness.
+#
+# Work per seed is shared between subsets: the manager with every AI team's retention applied is
+# built once per seed (and cached per worker), and each subset runs on a fork of it with only the
+# user's retention applied.
+#
+# Search: score no retention and every single retention first, which gives each player's marginal
+# gain. Rank all subsets (up to max_retained players) by the sum of their players' gains, then race
+# the best max_candidates of them. Each round adds seeds and keeps the better half, until top_k
+# remain or the time budget runs out. exhaustive=True races every subset instead.
+#
+#     python retention_optimizer.py --team csk --budget-seconds 5
+
+DEFAULT_MAX_RETAINED = 8
+DEFAULT_MAX_CANDIDATES = 64
+DEFAULT_TOP_K = 5
+DEFAULT_BUDGET_SECONDS = 5.0
+SINGLES_SEEDS = 24 # Seeds for the no-retention / single-player round
+FIRST_ROUND_SEEDS = 8
+SEEDS_PER_TASK = 4
+_AUCTION_SEED_SALT = 0x5EED # Auction draws come from a different stream than AI retention draws
+_MAX_CACHED_SCENARIOS = 512
+
+
+# -------------------- Scenarios (run in workers, or in-process with max_workers=1) --------------------
+_worker_catalog = None
+_worker_scenarios = {}
+
+def _init_worker(auction_pool, teams_json, pool_worker=False):
+    global _worker_catalog
+    if pool_worker:
+        metrics.disable_in_pool_worker()
+    _worker_catalog = game_logic.AuctionCatalog(auction_pool, teams_json)
+    _worker_scenarios.clear()
+
+def _scenario_prefix(config, seed):
+    # Manager after every AI team's retention; the user's team still holds its whole squad
+    key = (config, seed)
+    manager = _worker_scenarios.get(key)
+    if manager is None:
+        user_team_id, rosters, exact_count = config
+        retention_policy = auction_engine.ai_random_retention_policy if exact_count is None else auction_engine.exact_retention_policy(exact_count)
+        rng = random.Random(seed)
+        manager = game_logic.AuctionManager(_worker_catalog.auction_pool, {team_id: list(names) for team_id, names in rosters},
+                                            rng=rng, hooks=game_logic.AuctionHookRegistry())
+        decisions = [(team_obj, retention_policy(team_id, team_obj, rng), None, False)
+                     for team_id, team_obj in manager.teams.items() if team_id != user_team_id.upper()]
+        pool = list(manager.original_master_auction_pool)
+        game_logic.perform_retention_for_all_teams(decisions, pool)
+        manager.current_auction_pool_for_bidding = pool
+        if len(_worker_scenarios) >= _MAX_CACHED_SCENARIOS:
+            _worker_scenarios.clear()
+        _worker_scenarios[key] = manager
+    return manager
+
+def _score_subset(prefix, user_team_id, subset, seed):
+    manager = prefix.fork(rng=random.Random(seed ^ _AUCTION_SEED_SALT))
+    user_team = manager.teams[user_team_id.upper()]
+    pool = list(manager.current_auction_pool_for_bidding)
+    game_logic.perform_retention_for_all_teams([(user_team, len(subset), list(subset), True)], pool)
+    manager.rng.shuffle(pool)
+    manager.current_auction_pool_for_bidding = pool
+    auction_engine.run_auction_to_end(manager, manager.rng)
+    return bid_advisor.squad_score(user_team)
+
+def _evaluate_task(config, subsets, seeds, deadline):
+    # ([seeds done], {subset: [score per seed]}); stops between seeds once the deadline (time.time()) passes
+    scores = {subset: [] for subset in subsets}
+    seeds_done = []
+    for seed in seeds:
+        if time.time() >= deadline:
+            break
+        seeds_done.append(seed)
+        prefix = _scenario_prefix(config, seed)
+        for subset in subsets:
+            scores[subset].append(_score_subset(prefix, config[0], subset, seed))
+    return seeds_done, scores
+
+
+class _CandidateStats:
+    __slots__ = ("subset", "scores")
+
+    def __init__(self, subset):
+        self.subset = subset
+        self.scores = {} # seed -> score
+
+    def summary(self, baseline_scores):
+        gains = [score - baseline_scores[seed] for seed, score in self.scores.items() if seed in baseline_scores]
+        n = len(gains)
+        mean_gain = sum(gains) / n if n else 0.0
+        half_width = math.inf
+        if n > 1:
+            variance = sum((gain - mean_gain) ** 2 for gain in gains) / (n - 1)
+            half_width = bid_advisor.CONFIDENCE_Z * math.sqrt(variance / n)
+        return {"retain": list(self.subset), "scenarios": len(self.scores),
+                "mean_score": sum(self.scores.values()) / len(self.scores) if self.scores else None,
+                "gain_vs_no_retention": mean_gain, "gain_ci95": half_width}
+
+
+class RetentionOptimizer:
+    """Ranks retention subsets for one team; keeps its process pool between calls."""
+    def __init__(self, catalog=None, max_workers=None):
+        # max_workers=1 evaluates in-process without a pool
+        self.catalog = catalog or game_logic.get_auction_catalog()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        initargs = (self.catalog.pool_as_list(), self.catalog.teams_json_as_dict())
+        self._executor = None
+        if self.max_workers > 1:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker, initargs=initargs + (True,))
+        else:
+            _init_worker(*initargs)
+
+    def _evaluate(self, config, candidates, seeds, deadline):
+        # Scores every candidate on the given seeds in per-seed-batch tasks; tasks skip seeds past the deadline
+        subsets = [candidate.subset for candidate in candidates]
+        by_subset = {candidate.subset: candidate for candidate in candidates}
+        batches = [seeds[i:i + SEEDS_PER_TASK] for i in range(0, len(seeds), SEEDS_PER_TASK)]
+        if self._executor is None:
+            results = [_evaluate_task(config, subsets, batch, deadline) for batch in batches]
+        else:
+            results = [future.result() for future in [self._executor.submit(_evaluate_task, config, subsets, batch, deadline)
+                                                      for batch in batches]]
+        seeds_run = 0
+        for seeds_done, scores in results:
+            seeds_run += len(seeds_done)
+            for subset, subset_scores in scores.items():
+                by_subset[subset].scores.update(zip(seeds_done, subset_scores))
+        return seeds_run
+
+    def recommend(self, user_team_id, team_rosters=None, exact_count=None, max_retained=DEFAULT_MAX_RETAINED,
+                  budget_seconds=DEFAULT_BUDGET_SECONDS, top_k=DEFAULT_TOP_K, max_candidates=DEFAULT_MAX_CANDIDATES,
+                  exhaustive=False, seed=0):
+        """Returns {"ranked": subset summaries, best first (survivors of the last round first), "scenarios", "elapsed_seconds"}.
+
+        exact_count: 'exact' mode, where every team retains exactly that many; otherwise AI teams retain
+        a random 1-4 as in 'any number' mode and the user's subsets range over 0..max_retained players.
+        """
+        started = time.perf_counter()
+        deadline = time.time() + budget_seconds
+        rosters = team_rosters if team_rosters is not None else self.catalog.teams_json
+        squad_names = list(rosters[user_team_id])
+        config = (user_team_id, tuple(sorted((team_id, tuple(names)) for team_id, names in rosters.items())), exact_count)
+        sizes = [exact_count] if exact_count is not None else range(0, min(max_retained, len(squad_names)) + 1)
+        next_seed = seed
+
+        def new_seeds(count):
+            nonlocal next_seed
+            next_seed += count
+            return list(range(next_seed - count, next_seed))
+
+        baseline = _CandidateStats(())
+        # Singles round: each player's marginal gain over retaining nobody, on shared seeds
+        singles = {name: _CandidateStats((name,)) for name in squad_names}
+        scenarios = self._evaluate(config, [baseline] + list(singles.values()), new_seeds(SINGLES_SEEDS), deadline)
+        gains = {name: stats.summary(baseline.scores)["gain_vs_no_retention"] for name, stats in singles.items()}
+
+        all_subsets = [subset for size in sizes for subset in itertools.combinations(squad_names, size)]
+        if not exhaustive:
+            all_subsets.sort(key=lambda subset: sum(gains[name] for name in subset), reverse=True)
+            all_subsets = all_subsets[:max_candidates]
+        known = {(): baseline, **{stats.subset: stats for stats in singles.values()}}
+        live = [known.get(subset) or _CandidateStats(subset) for subset in all_subsets]
+        eliminated = []
+        round_seeds = FIRST_ROUND_SEEDS
+        while True:
+            scenarios += self._evaluate(config, live + ([baseline] if baseline not in live else []), new_seeds(round_seeds), deadline)
+            ranked = sorted(live, key=lambda stats: stats.summary(baseline.scores)["gain_vs_no_retention"], reverse=True)
+            if len(ranked) <= top_k or time.time() >= deadline:
+                live = ranked
+                break
+            keep = max(top_k, len(ranked) // 2)
+            live, dropped = ranked[:keep], ranked[keep:]
+            eliminated = dropped + eliminated
+            round_seeds *= 2
+        return {"ranked": [stats.summary(baseline.scores) for stats in live + eliminated],
+                "scenarios": scenarios, "elapsed_seconds": time.perf_counter() - started}
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank retention subsets for a team by simulated auction outcomes.")
+    parser.add_argument("--team", default="csk")
+    parser.add_argument("--exact", type=int, default=None, help="'Exact' mode: every team retains this many")
+    parser.add_argument("--budget-seconds", type=float, default=DEFAULT_BUDGET_SECONDS)
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP_K)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--exhaustive", action="store_true", help="Race every subset instead of the best by marginal gains")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    optimizer = RetentionOptimizer(max_workers=args.workers)
+    try:
+        result = optimizer.recommend(args.team, exact_count=args.exact, budget_seconds=args.budget_seconds,
+                                     top_k=args.top, exhaustive=args.exhaustive, seed=args.seed)
+    finally:
+        optimizer.close()
+    print(f"{len(result['ranked'])} subsets ranked over {result['scenarios']} scenario seeds in {result['elapsed_seconds']:.2f} s")
+    for summary in result["ranked"][:args.top]:
+        print(f"  gain {summary['gain_vs_no_retention']:8.1f} +/- {summary['gain_ci95']:6.1f} over {summary['scenarios']:3d} scenarios: "
+              f"{', '.join(summary['retain']) or '(none)'}")
+
+if __name__ == "__main__":
+    main()
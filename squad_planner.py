@@ -0,0 +1,337 @@
+import argparse
+import heapq
+import math
+import random
+import time
+
+import numpy as np
+
+import game_logic
+
+# Best completion of one team's squad from the players still in the auction. Picks the set of
+# players with the highest total demand whose expected prices fit the budget, that fits the free
+# squad slots, meets every role minimum (min_batters, min_bowlers, min_wicketkeepers,
+# min_allrounders) and stays within max_overseas. Expected prices default to base_price + demand
+# (the AI's valuation at neutral urgency); pass expected_prices (e.g. price_distribution medians)
+# for better ones. Prices are counted in price_unit steps, rounded up.
+#
+# Solver: a 0/1 knapsack DP over (overseas used, players added, progress towards the role minimum,
+# cost), vectorised with NumPy over everything but the items. Roles are processed one group at a
+# time. Within a role only players that fewer than free-slots others beat on both demand and price
+# can be in an optimal plan, so the rest are never fed to the DP. The DP state before each role group
+# is cached: when a sale removes a candidate, only that role's group and the ones after it are
+# recomputed, and only once a player in the current plan has gone; removing any other player costs
+# nothing. A sale to the planned team itself (budget and squad change) re-solves from the start.
+#
+# Attach to a manager as a lifecycle hook so it follows every sale:
+#     planner = SquadPlanner(manager.teams["CSK"], manager.current_auction_pool_for_bidding)
+#     manager.hooks = manager.hooks.copy(); manager.hooks.register(planner, ("finalize_current_player_auction",))
+#
+# Benchmark over a synthetic 1k-player auction:
+#     python squad_planner.py --players 1000
+
+DEFAULT_PRICE_UNIT = 10
+PLANNER_ROLES = game_logic.ROLE_CATEGORIES + (None,) # None: roles outside the four categories (no minimum)
+_NEG_INF = -np.inf
+
+
+def default_expected_price(player):
+    return player.get("base_price", 20) + player.get("demand", 0)
+
+def _role_minimums(team_obj):
+    return {"Batter": team_obj.min_batters, "Bowler": team_obj.min_bowlers,
+            "Wicketkeeper": team_obj.min_wicketkeepers, "All-Rounder": team_obj.min_allrounders, None: 0}
+
+
+class _PlanItem:
+    __slots__ = ("name", "player", "role", "cost", "value", "overseas")
+
+    def __init__(self, player, expected_price, price_unit):
+        self.name = player.get("name")
+        self.player = player
+        self.role = game_logic.get_role_category(player.get("role", ""))
+        self.cost = max(0, math.ceil(expected_price / price_unit))
+        self.value = player.get("demand", 0)
+        self.overseas = 1 if player.get("overseas") else 0
+
+
+class SquadPlanner:
+    """Keeps the best valid completion of one team's squad current as players leave the pool."""
+    def __init__(self, team_obj, remaining_players, expected_prices=None, price_unit=DEFAULT_PRICE_UNIT):
+        self.team = team_obj
+        self.price_unit = price_unit
+        self.expected_prices = expected_prices or {}
+        self.items = {} # name -> _PlanItem for every player still available
+        self.items_by_role = {role: [] for role in PLANNER_ROLES}
+        for player in remaining_players:
+            self.add_player(player)
+        self.solves = 0 # Role groups run through the DP, for measuring incremental updates
+        self._team_state = None
+        self._lot_player = None
+        self._reset()
+
+    # -------- Pool changes --------
+    def add_player(self, player):
+        name = player.get("name")
+        if name in self.items:
+            return
+        price = self.expected_prices.get(name, default_expected_price(player))
+        item = self.items[name] = _PlanItem(player, price, self.price_unit)
+        self.items_by_role[item.role].append(item)
+        if hasattr(self, "_group_states"):
+            self._reset() # A new player can raise the cost cap, so start over
+
+    def remove_player(self, player_name):
+        # The player was sold, went unsold or was otherwise taken out of the pool
+        item = self.items.pop(player_name, None)
+        if item is None:
+            return
+        self.items_by_role[item.role].remove(item)
+        if item in self._candidate_sets.get(item.role, ()):
+            # The DP tables are now stale from this role on, but a plan without this player stays optimal
+            # (it is still valid and nothing better appeared), so re-solving waits until a planned player leaves
+            self._dirty_group = min(self._dirty_group, PLANNER_ROLES.index(item.role))
+            if self._plan is not None and item.name in self._plan_names:
+                self._plan = None
+
+    def team_changed(self):
+        # Call after the planned team's budget or squad changed (it bought a player, retention, ...)
+        self._reset()
+
+    # -------- Lifecycle hook (finalize_current_player_auction) --------
+    def before_phase(self, phase, manager):
+        if phase == "finalize_current_player_auction":
+            self._lot_player = manager.current_player_up_for_auction
+
+    def after_phase(self, phase, manager, result, elapsed_seconds):
+        if phase == "finalize_current_player_auction" and self._lot_player is not None:
+            self.remove_player(self._lot_player.get("name"))
+            self._lot_player = None
+            if self._team_state != self._current_team_state():
+                self.team_changed()
+
+    # -------- Solver state --------
+    def _current_team_state(self):
+        team = self.team
+        return (team.budget, len(team.squad), tuple(team.role_counts.values()), team.overseas_count,
+                team.max_squad_size, team.max_overseas, tuple(_role_minimums(team).values()))
+
+    def _reset(self):
+        team = self.team
+        self._team_state = self._current_team_state()
+        self.slots = max(0, team.max_squad_size - len(team.squad))
+        self.deficits = {role: max(0, minimum - team.count_players_by_role(role)) if role else 0
+                         for role, minimum in _role_minimums(team).items()}
+        self.overseas_capacity = team.max_overseas - team.overseas_count # Negative: already over the limit, nothing is valid
+        self.budget_units = max(0, int(team.budget // self.price_unit))
+        # No plan can cost more than its slots' worth of the most expensive players, so that caps the cost axis
+        top_costs = heapq.nlargest(self.slots, (item.cost for item in self.items.values()))
+        self.capacity = min(self.budget_units, sum(top_costs))
+        self.overseas_levels = max(0, min(self.overseas_capacity, self.slots)) if any(item.overseas for item in self.items.values()) else 0
+        self._candidate_sets = {}
+        self._group_states = [None] * len(PLANNER_ROLES) # DP state entering each role group
+        self._group_choices = [None] * len(PLANNER_ROLES)
+        self._dirty_group = 0
+        self._plan = None
+        self._plan_names = frozenset()
+
+    def _candidates(self, role):
+        # Drops players that at least `slots` others of the role beat on both demand and price
+        # (an overseas player never counts as beating a domestic one)
+        limit = self.slots
+        ordered = sorted(self.items_by_role[role], key=lambda item: (item.cost, -item.value))
+        kept, best_all, best_domestic = [], [], []
+        for item in ordered:
+            best = best_all if item.overseas else best_domestic
+            if limit == 0 or (len(best) >= limit and best[0] >= item.value):
+                continue
+            kept.append(item)
+            for heap in ((best_all,) if item.overseas else (best_all, best_domestic)):
+                if len(heap) < limit:
+                    heapq.heappush(heap, item.value)
+                elif item.value > heap[0]:
+                    heapq.heapreplace(heap, item.value)
+        return kept
+
+    def _solve(self):
+        levels, slots, capacity = self.overseas_levels, self.slots, self.capacity
+        if self._group_states[0] is None:
+            start = np.full((levels + 1, slots + 1, capacity + 1), _NEG_INF)
+            start[0, 0, 0] = 0.0
+            self._group_states[0] = start
+        for group in range(self._dirty_group, len(PLANNER_ROLES)):
+            role = PLANNER_ROLES[group]
+            candidates = self._candidate_sets[role] = self._candidates(role)
+            state, choices = self._run_group(self._group_states[group], candidates, self.deficits[role])
+            self._group_choices[group] = (candidates, choices)
+            if group + 1 < len(PLANNER_ROLES):
+                self._group_states[group + 1] = state
+            else:
+                self._final_state = state
+            self.solves += 1
+        self._dirty_group = len(PLANNER_ROLES)
+
+    def _run_group(self, entering, candidates, deficit):
+        # State gains a role-progress axis j (players of this role taken, capped at the deficit)
+        levels, slots, capacity = entering.shape
+        state = np.full((levels, slots, deficit + 1, capacity), _NEG_INF)
+        state[:, :, 0, :] = entering
+        choices = [] # Per item: 1 = taken from j - 1, 2 = taken at the cap j == deficit, 0 = not taken
+        for item in candidates:
+            cost, overseas = item.cost, item.overseas
+            choice = np.zeros(state.shape, dtype=np.int8)
+            if cost < capacity and overseas < levels and slots > 1:
+                source = state[:levels - overseas, :slots - 1, :, :capacity - cost] + item.value
+                target = state[overseas:, 1:, :, cost:]
+                marks = choice[overseas:, 1:, :, cost:]
+                if deficit:
+                    improved = source[:, :, :deficit, :] > target[:, :, 1:, :]
+                    target[:, :, 1:, :][improved] = source[:, :, :deficit, :][improved]
+                    marks[:, :, 1:, :][improved] = 1
+                improved = source[:, :, deficit, :] > target[:, :, deficit, :]
+                target[:, :, deficit, :][improved] = source[:, :, deficit, :][improved]
+                marks[:, :, deficit, :][improved] = 2
+            choices.append(choice)
+        return state[:, :, deficit, :].copy(), choices
+
+    # -------- Results --------
+    def plan(self):
+        """Returns {"feasible", "players", "expected_cost", "total_demand", "slots_after", "budget_after"}."""
+        if self._team_state != self._current_team_state():
+            self._reset()
+        if self._plan is not None:
+            return self._plan
+        self._solve()
+        final = self._final_state
+        if self.overseas_capacity < 0 or not np.isfinite(final).any():
+            self._plan = {"feasible": False, "players": [], "expected_cost": 0, "total_demand": 0,
+                          "slots_after": self.slots, "budget_after": self.team.budget}
+            self._plan_names = frozenset()
+            return self._plan
+        # Highest demand; among equals the cheapest, then the fewest players
+        best_value = final.max()
+        overseas_used, added, cost = min(zip(*np.nonzero(final == best_value)), key=lambda index: (index[2], index[1]))
+        chosen = self._backtrack(int(overseas_used), int(added), int(cost))
+        expected_cost = sum(self.expected_prices.get(item.name, default_expected_price(item.player)) for item in chosen)
+        self._plan = {"feasible": True, "players": [item.name for item in chosen], "expected_cost": expected_cost,
+                      "total_demand": sum(item.value for item in chosen), "slots_after": self.slots - len(chosen),
+                      "budget_after": self.team.budget - expected_cost}
+        self._plan_names = frozenset(self._plan["players"])
+        return self._plan
+
+    def _backtrack(self, overseas_used, added, cost):
+        chosen = []
+        for group in range(len(PLANNER_ROLES) - 1, -1, -1):
+            candidates, choices = self._group_choices[group]
+            j = self.deficits[PLANNER_ROLES[group]]
+            for item, choice in zip(reversed(candidates), reversed(choices)):
+                mark = choice[overseas_used, added, j, cost]
+                if mark:
+                    chosen.append(item)
+                    overseas_used -= item.overseas
+                    added -= 1
+                    cost -= item.cost
+                    if mark == 1:
+                        j -= 1
+        chosen.reverse()
+        return chosen
+
+    def completable_players(self):
+        """Names of remaining players that can be part of some valid completion within budget.
+
+        A player qualifies when buying them at their expected price still leaves enough slots and
+        budget to fill every role minimum with the cheapest remaining players (overseas capacity is
+        checked for the player only).
+        """
+        if self._team_state != self._current_team_state():
+            self._reset()
+        cheapest = {} # role -> (costs sorted ascending, prefix sums)
+        for role in PLANNER_ROLES:
+            costs = sorted(item.cost for item in self.items_by_role[role])
+            prefix = [0]
+            for item_cost in costs:
+                prefix.append(prefix[-1] + item_cost)
+            cheapest[role] = (costs, prefix)
+        fill_cost = {role: cheapest[role][1][deficit] if deficit <= len(cheapest[role][0]) else math.inf
+                     for role, deficit in self.deficits.items()}
+        total_fill, total_deficit = sum(fill_cost.values()), sum(self.deficits.values())
+        names = []
+        for item in self.items.values():
+            if self.slots < 1 or item.overseas > self.overseas_capacity:
+                continue
+            deficit = self.deficits[item.role]
+            if deficit:
+                costs, prefix = cheapest[item.role]
+                if deficit > len(costs):
+                    continue # Not enough players of this role left even with this one
+                # Cheapest other players still needed for this role: the player covers one of the minimum
+                own_role_fill = prefix[deficit] - item.cost if item.cost <= costs[deficit - 1] else prefix[deficit - 1]
+                players_needed = total_deficit
+                needed_cost = item.cost + total_fill - fill_cost[item.role] + own_role_fill
+            else:
+                players_needed = total_deficit + 1
+                needed_cost = item.cost + total_fill
+            if players_needed <= self.slots and needed_cost <= self.budget_units:
+                names.append(item.name)
+        return names
+
+
+# -------------------- Benchmark --------------------
+def build_synthetic_catalog(num_players, seed=0):
+    import catalog_generator
+    bat_stats, bowl_stats, teams_json = catalog_generator.generate_catalog(num_players, seed=seed)
+    pool = game_logic.build_auction_pool(bat_stats, bowl_stats, teams_json)
+    return game_logic.AuctionCatalog(pool, teams_json)
+
+def run_benchmark(num_players, team_name="CSK", seed=0, budget=None):
+    catalog = build_synthetic_catalog(num_players, seed) if num_players else game_logic.get_auction_catalog()
+    rng = random.Random(seed)
+    manager = game_logic.AuctionManager(catalog.auction_pool, catalog.teams_json_as_dict(), rng=rng)
+    for team in manager.teams.values():
+        team.squad = team.squad[:2] # Leave room for the plan to matter
+        if budget is not None:
+            team.budget = budget
+    manager.current_auction_pool_for_bidding = [p for p in manager.original_master_auction_pool
+                                                if not any(p["name"] == s["name"] for t in manager.teams.values() for s in t.squad)]
+    rng.shuffle(manager.current_auction_pool_for_bidding)
+    team = manager.teams[team_name]
+    start = time.perf_counter()
+    planner = SquadPlanner(team, manager.current_auction_pool_for_bidding)
+    planner.plan()
+    initial_seconds = time.perf_counter() - start
+    manager.hooks = manager.hooks.copy()
+    manager.hooks.register(planner, ("finalize_current_player_auction",))
+    lot_seconds, lots, solves_before = [], 0, planner.solves
+    while True:
+        player, _price, _over = manager.start_bidding_for_next_player()
+        if player is None:
+            break
+        manager.trigger_ai_bids_after_user_action(team_name)
+        if rng.random() < 0.1 and player["name"] in planner.plan()["players"]:
+            manager.process_user_bid(team, manager.current_highest_bid_amount + 10)
+        manager.finalize_current_player_auction()
+        start = time.perf_counter()
+        planner.plan()
+        planner.completable_players()
+        lot_seconds.append(time.perf_counter() - start)
+        lots += 1
+    lot_seconds.sort()
+    return {"players": len(catalog.auction_pool), "lots": lots, "initial_ms": initial_seconds * 1000,
+            "lot_mean_ms": sum(lot_seconds) / max(1, lots) * 1000,
+            "lot_max_ms": (lot_seconds[-1] if lot_seconds else 0) * 1000,
+            "group_solves_per_lot": (planner.solves - solves_before) / max(1, lots), "squad_size": len(team.squad)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Squad planner benchmark over a full auction.")
+    parser.add_argument("--players", type=int, default=1000, help="Synthetic catalog size (0: repository catalog)")
+    parser.add_argument("--team", default="CSK")
+    parser.add_argument("--budget", type=float, default=None, help="Override every team's budget")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    result = run_benchmark(args.players, args.team, args.seed, args.budget)
+    print(f"{result['players']} players, {result['lots']} lots: initial plan {result['initial_ms']:.1f} ms, "
+          f"per lot mean {result['lot_mean_ms']:.2f} ms / max {result['lot_max_ms']:.2f} ms, "
+          f"{result['group_solves_per_lot']:.2f} role groups re-solved per lot, final squad {result['squad_size']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import random
+
+import numpy as np
+
+import game_logic
+
+# NumPy version of one round of simulate_ai_bidding_for_player, evaluated for every team against a
+# block of players at once. Team state is held as arrays (budgets, squad sizes, role counts and
+# minimums). Random draws come from the same rng, in the same order, as calling the scalar function
+# once per player, so the bids match the scalar path under the same seed.
+
+URGENCY_BY_ROLE_CATEGORY = np.array([3.0, 3.0, 3.5, 2.5]) # Batter, Bowler, Wicketkeeper, All-Rounder
+ROLE_CATEGORY_CODES = {category: code for code, category in enumerate(game_logic.ROLE_CATEGORIES)}
+NO_TEAM = -1
+
+
+class TeamStateArrays:
+    """Column view of a list of Team objects; call refresh() after the teams change."""
+    def __init__(self, teams):
+        self.teams = list(teams)
+        self.names_upper = [t.name.upper() for t in self.teams]
+        self.max_squad_sizes = np.array([t.max_squad_size for t in self.teams], dtype=np.int64)
+        self.role_minimums = np.array(
+            [[t.min_batters, t.min_bowlers, t.min_wicketkeepers, t.min_allrounders] for t in self.teams],
+            dtype=np.int64).reshape(len(self.teams), len(game_logic.ROLE_CATEGORIES))
+        self.refresh()
+
+    def refresh(self):
+        self.budgets = np.array([t.budget for t in self.teams], dtype=np.int64)
+        self.squad_sizes = np.array([len(t.squad) for t in self.teams], dtype=np.int64)
+        self.role_counts = np.array(
+            [[t.role_counts[category] for category in game_logic.ROLE_CATEGORIES] for t in self.teams],
+            dtype=np.int64).reshape(len(self.teams), len(game_logic.ROLE_CATEGORIES))
+
+    def team_index(self, team_name):
+        return self.names_upper.index(team_name.upper())
+
+
+class PlayerBlock:
+    """Column view of the fields the AI bidding reads from a list of player dicts."""
+    def __init__(self, players):
+        self.players = list(players)
+        self.base_prices = np.array([p.get("base_price", 20) for p in self.players], dtype=np.float64)
+        self.demands = np.array([p.get("demand", 0) for p in self.players], dtype=np.float64)
+        role_categories = [game_logic.get_role_category(p.get("role", "Batter")) for p in self.players]
+        self.role_codes = np.array([ROLE_CATEGORY_CODES.get(c, -1) for c in role_categories], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.players)
+
+
+def urgency_matrix(team_arrays, player_block):
+    # (players, teams) needs_role_urgency values
+    role_codes = player_block.role_codes
+    has_category = role_codes >= 0
+    safe_codes = np.where(has_category, role_codes, 0)
+    below_minimum = team_arrays.role_counts[:, safe_codes].T < team_arrays.role_minimums[:, safe_codes].T
+    role_urgent = has_category[:, None] & below_minimum
+    fallback = np.where(team_arrays.squad_sizes < team_arrays.max_squad_sizes / 2, 1.5, 1.0)
+    return np.where(role_urgent, URGENCY_BY_ROLE_CATEGORY[safe_codes][:, None], fallback[None, :])
+
+def eligibility_matrix(team_arrays, current_bids, excluded_team_indices=None, user_team_name=""):
+    # (players, teams) mask of teams that can_add_player at the minimum next bid and may bid at all
+    eligible = (team_arrays.squad_sizes < team_arrays.max_squad_sizes)[None, :] & \
+               (team_arrays.budgets[None, :] >= (current_bids + 10)[:, None])
+    if user_team_name:
+        user_team_name_upper = user_team_name.upper()
+        not_user = np.array([name != user_team_name_upper for name in team_arrays.names_upper])
+        eligible &= not_user[None, :]
+    if excluded_team_indices is not None:
+        excluded_team_indices = np.asarray(excluded_team_indices)
+        rows = np.nonzero(excluded_team_indices != NO_TEAM)[0]
+        eligible[rows, excluded_team_indices[rows]] = False
+    return eligible
+
+def expected_willingness_to_pay(team_arrays, player_block, urgency=None):
+    # (players, teams) cap each team would put on each player with the random multipliers at their means
+    urgency = urgency_matrix(team_arrays, player_block) if urgency is None else urgency
+    perceived_value = player_block.base_prices[:, None] + player_block.demands[:, None] * urgency * 1.0
+    budget_cap = np.minimum(team_arrays.budgets * 0.4, team_arrays.budgets - 10)
+    return np.minimum(perceived_value, budget_cap[None, :])
+
+
+def evaluate_ai_bids_block(team_arrays, player_block, current_bids=None, excluded_team_indices=None,
+                           user_team_name="", rng=random):
+    # One AI bidding round for each player in the block against the current team state, equivalent to
+    # simulate_ai_bidding_for_player(player, teams minus excluded, current_bid, user_team_name, rng) per player.
+    # Returns (new_bids, winner_indices) with winner NO_TEAM where no AI bid was placed, plus the matrices used.
+    num_players = len(player_block)
+    current_bids = player_block.base_prices.astype(np.int64) if current_bids is None else np.asarray(current_bids, dtype=np.int64)
+    eligible = eligibility_matrix(team_arrays, current_bids, excluded_team_indices, user_team_name)
+    urgency = urgency_matrix(team_arrays, player_block)
+
+    # Top candidate: highest urgency, then highest budget, then first in team order (as max() in the scalar path)
+    has_bidder = eligible.any(axis=1)
+    masked_urgency = np.where(eligible, urgency, -np.inf)
+    best_urgency = masked_urgency.max(axis=1, initial=-np.inf)
+    candidates = eligible & (masked_urgency == best_urgency[:, None])
+    masked_budgets = np.where(candidates, team_arrays.budgets[None, :], np.iinfo(np.int64).min)
+    best_budget = masked_budgets.max(axis=1, initial=np.iinfo(np.int64).min)
+    top_team = np.argmax(candidates & (masked_budgets == best_budget[:, None]), axis=1)
+
+    # Draw in player order, three values per player that has a bidder, exactly like the scalar loop
+    value_multipliers = np.ones(num_players)
+    budget_fractions = np.zeros(num_players)
+    increments = np.zeros(num_players, dtype=np.int64)
+    for player_pos in np.nonzero(has_bidder)[0]:
+        value_multipliers[player_pos] = rng.uniform(0.7, 1.3)
+        budget_fractions[player_pos] = rng.uniform(0.3, 0.5)
+        increments[player_pos] = rng.choice(game_logic.AI_BID_INCREMENTS)
+
+    rows = np.arange(num_players)
+    top_budgets = team_arrays.budgets[top_team]
+    role_need_multipliers = urgency[rows, top_team]
+    perceived_value = player_block.base_prices + (player_block.demands * role_need_multipliers * value_multipliers)
+    max_willing = np.minimum(np.minimum(perceived_value, top_budgets * budget_fractions), top_budgets - 10)
+    potential_bids = (np.trunc((current_bids + increments) / 10) * 10).astype(np.int64)
+
+    places_bid = has_bidder & (potential_bids <= top_budgets) & (potential_bids <= max_willing) & (potential_bids > current_bids)
+    new_bids = np.where(places_bid, potential_bids, current_bids)
+    winner_indices = np.where(places_bid, top_team, NO_TEAM)
+    return new_bids, winner_indices, {"eligible": eligible, "urgency": urgency, "max_willing": max_willing}